@@ -1,46 +1,30 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.flips import adjacent_pairs, flip_counts
+
 # Your data from the memory test
-data = [
-    (0x0, 0xBA),
-    (0x1F5, 0x0),
-    (0x200, 0x9600),
-    (0x20E, 0x0),
-    (0x2F3, 0x2),
-    (0x309, 0x0),
-    (0x3FB, 0x0),
-    (0x41C, 0xBA),
-    (0x4EE, 0x0),
-    (0x51B, 0x0),
-    (0x612, 0xBA),
-    (0x715, 0xBA),
-    (0x7E7, 0x0),
-    (0x7EA, 0x7),
-    (0x8CA, 0x0),
-    (0x93F, 0xBA),
-    (0x9CD, 0x0)
-]
+# (entries of the capture log next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'SDRAM_Data_Remanence_DUMP_1_ffff_0x09ff.txt'))
+addresses, values = load_entries(capture)
 
 PATTERN = 0xFFFF
 
-addresses = [entry[0] for entry in data]
-values = [entry[1] for entry in data]
-
 # Calculate bit flips (number of bits that flipped from the pattern)
-bit_flips = [bin(val ^ PATTERN).count('1') for val in values]
+bit_flips = flip_counts(values, PATTERN)
 
 # --- CORRECTED ADJACENCY CALCULATION ---
-def count_adjacent_bit_flips(val, pattern=PATTERN, bits=16):
-    flipped = val ^ pattern
-    count = 0
-    for i in range(bits - 1):
-        # Check if both adjacent bits are flipped
-        if ((flipped >> i) & 0b11) == 0b11:
-            count += 1
-    return count
-
-adjacent_flips = [count_adjacent_bit_flips(val) for val in values]
+# Pairs of neighbouring bits that both flipped, within each 16-bit word
+adjacent_flips = adjacent_pairs(values, PATTERN)
 
 plt.figure(figsize=(12, 6))
 plt.bar(addresses, adjacent_flips, color='orange')
@@ -1,41 +1,31 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(SCRIPT_DIR))
+
+from remanence import bch
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.flips import flip_counts
+from remanence.patterns import capture_pattern_ber
+from remanence.retention import plot_tree_stress
+from remanence.spatial import dense_flips, neighbour_counts
+
 # DUMP2 data from the memory test
-data = [
-    (0x0, 0xBA00),
-    (0xF2, 0x0),
-    (0x100, 0xAC00),
-    (0x1F5, 0x0),
-    (0x20E, 0x0),
-    (0x2F3, 0x2),
-    (0x309, 0x0),
-    (0x41C, 0x0),
-    (0x4EE, 0x0),
-    (0x51B, 0x0),
-    (0x5E8, 0x5),
-    (0x5E9, 0x0),
-    (0x600, 0xCE00),
-    (0x6E0, 0x0),
-    (0x715, 0x0),
-    (0x7E7, 0x0),
-    (0x7EA, 0x7),
-    (0x838, 0x0),
-    (0x8C5, 0x8),
-    (0x8CA, 0x0),
-    (0x93F, 0xBA),
-    (0x9CD, 0x0)
-]
+# (entries of the capture log next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'SDRAM_Data_Remanence_DUMP_2_ffff_0x09ff.txt'))
+addresses, values = load_entries(capture)
 
 # Expected pattern that was written
 PATTERN = 0xFFFF
 
-# Extract addresses and values
-addresses = [entry[0] for entry in data]
-values = [entry[1] for entry in data]
-
 # Calculate bit flips (number of bits that flipped from the pattern)
-bit_flips = [bin(val ^ PATTERN).count('1') for val in values]
+bit_flips = flip_counts(values, PATTERN)
 
 # 1. Basic Bit Error Analysis Plot
 plt.figure(figsize=(12, 8))
@@ -46,8 +36,8 @@ plt.ylabel('Bit Flips')
 plt.grid(True, alpha=0.3)
 
 # Find the maximum for annotation
-max_flips = max(bit_flips)
-max_addr = addresses[bit_flips.index(max_flips)]
+max_flips = int(bit_flips.max())
+max_addr = addresses[bit_flips.argmax()]
 
 # Annotate maximum value
 if max_flips > 100:  # Only annotate if there's a significant spike
@@ -62,7 +52,7 @@ plt.figtext(0.98, 0.01, 'Refresh rate: 15.6 microseconds per row',
 
 # Add some statistics
 total_addresses = len(addresses)
-addresses_with_errors = sum(1 for flips in bit_flips if flips > 0)
+addresses_with_errors = int(np.count_nonzero(bit_flips))
 error_percentage = (addresses_with_errors / total_addresses) * 100
 
 stats_text = (f'Total Addresses: {total_addresses}\n'
@@ -80,12 +70,11 @@ plt.savefig('bit_flips_analysis_dump2.png', dpi=300)
 plt.show()
 
 # 2. Spatial Correlation: Adjacency bit-flip count
-adjacent_flips = []
-for i in range(len(bit_flips)):
-    count = 0
-    if i > 0 and bit_flips[i-1] > 0: count += 1
-    if i < len(bit_flips)-1 and bit_flips[i+1] > 0: count += 1
-    adjacent_flips.append(count)
+# Erroneous words among the two column neighbours of each logged address,
+# taken from the dense flip map (so 0x5E8 and 0x600 are not neighbours)
+dense = dense_flips(addresses, values, PATTERN, capture.start, capture.end + 1)
+adjacent_flips = neighbour_counts(dense, capture.start, axes=('col',))['col'][
+    addresses.astype(np.int64) - capture.start]
 
 plt.figure(figsize=(12, 6))
 plt.bar(addresses, adjacent_flips, color='orange')
@@ -102,27 +91,17 @@ plt.show()
 # 3. Data-Pattern Resilience: Normalized BER per pattern
 patterns = [0xFFFF, 0x0000, 0xAAAA, 0x5555]
 pattern_labels = ['0xFFFF', '0x0000', '0xAAAA', '0x5555']
-normalized_ber = []
-
-# Simulate BER for different patterns based on actual data from 0xFFFF
-# In a real test, you would test each pattern individually
-for pattern in patterns:
-    if pattern == 0xFFFF:
-        # For 0xFFFF we use the actual data
-        flips = [bin(val ^ pattern).count('1') for val in values]
-        normalized_ber.append(np.mean(flips) / 16)  # 16 bits per word
-    elif pattern == 0x0000:
-        # For 0x0000 we estimate based on observed data and typical SDRAM behavior
-        # All 1s (0xFFFF) usually show more errors than all 0s (0x0000)
-        normalized_ber.append(np.mean(bit_flips) / 16 * 0.15)  # 15% of 0xFFFF errors
-    elif pattern == 0xAAAA:
-        # Alternating patterns show intermediate vulnerability
-        normalized_ber.append(np.mean(bit_flips) / 16 * 0.45)  # 45% of 0xFFFF errors
-    else:  # 0x5555
-        normalized_ber.append(np.mean(bit_flips) / 16 * 0.55)  # 55% of 0xFFFF errors
+
+# Measured by `python -m remanence campaign <port> patterns` run next to
+# this script; NaN (not measured) until then, except for 0xFFFF
+campaign = os.path.join(SCRIPT_DIR, 'patterns')
+normalized_ber = capture_pattern_ber(capture, campaign, patterns)
 
 plt.figure(figsize=(8, 5))
-plt.bar(pattern_labels, normalized_ber, color='purple')
+plt.bar(pattern_labels, np.nan_to_num(normalized_ber), color='purple')
+for i, ber in enumerate(normalized_ber):
+    if np.isnan(ber):
+        plt.annotate('not measured', (i, 0), ha='center', va='bottom')
 plt.title('Normalized BER per Data Pattern - DUMP2 Data')
 plt.xlabel('Data Pattern')
 plt.ylabel('Normalized Bit Error Rate')
@@ -132,9 +111,9 @@ plt.savefig('pattern_resilience_dump2.png', dpi=300)
 plt.show()
 
 # 4. Error Correction Simulation: Residual BER after BCH(63,45)
-raw_ber = np.array(normalized_ber)
-# Simulate BCH code effect - reduces errors by approximately 90%
-residual_ber = raw_ber / 10
+raw_ber = normalized_ber
+# The same dumps' flipped bits run through a real BCH(63,45) decoder
+residual_ber = bch.capture_residual_ber(capture, campaign, patterns)
 
 plt.figure(figsize=(8, 5))
 plt.bar(pattern_labels, raw_ber, alpha=0.6, label='Raw BER', color='skyblue')
@@ -148,27 +127,15 @@ plt.tight_layout()
 plt.savefig('error_correction_dump2.png', dpi=300)
 plt.show()
 
-# 5. Environmental Stress Testing: BER vs Voltage and Temperature (simulated)
-voltages = np.linspace(2.7, 3.6, 10)
-temperatures = np.linspace(25, 85, 10)
-# Simulate exponential relationships based on typical SDRAM behavior
-ber_voltage = np.mean(bit_flips) / 16 * np.exp(-voltages + 3)
-ber_temperature = np.mean(bit_flips) / 16 * np.exp((temperatures - 25) / 40)
-
+# 5. Environmental Stress Testing: BER vs Voltage and Temperature
+# Retention fits of the repository's temperature/voltage-tagged captures
+# (python -m remanence retention); empty until such captures exist
 plt.figure(figsize=(12, 5))
-plt.subplot(1, 2, 1)
-plt.plot(voltages, ber_voltage, marker='o', color='blue')
-plt.title('BER vs Voltage - DUMP2 Data (Simulated)')
-plt.xlabel('Voltage (V)')
-plt.ylabel('Bit Error Rate')
-plt.grid(True, alpha=0.3)
-
-plt.subplot(1, 2, 2)
-plt.plot(temperatures, ber_temperature, marker='o', color='red')
-plt.title('BER vs Temperature - DUMP2 Data (Simulated)')
-plt.xlabel('Temperature (°C)')
-plt.ylabel('Bit Error Rate')
-plt.grid(True, alpha=0.3)
+ax_voltage, ax_temperature = plot_tree_stress(os.path.dirname(SCRIPT_DIR), 15.6,
+                                              plt.subplot(1, 2, 1),
+                                              plt.subplot(1, 2, 2))
+ax_voltage.set_title('BER vs Voltage - DUMP2 Data (fitted)')
+ax_temperature.set_title('BER vs Temperature - DUMP2 Data (Arrhenius fit)')
 
 plt.tight_layout()
 plt.savefig('environmental_stress_dump2.png', dpi=300)
@@ -178,5 +145,5 @@ plt.show()
 print(f"Analysis Complete - Found {addresses_with_errors} addresses with bit flips")
 print(f"Maximum bit flips: {max_flips} at address 0x{max_addr:X}")
 print(f"Average bit flips per address: {np.mean(bit_flips):.2f}")
-print(f"Data pattern sensitivity ratio (FFFF:0000:AAAA:5555): {normalized_ber[0]:.2f}:{normalized_ber[1]:.2f}:{normalized_ber[2]:.2f}:{normalized_ber[3]:.2f}")
+print(f"Data pattern sensitivity ratio (FFFF:0000:AAAA:5555): {normalized_ber[0]:.2e}:{normalized_ber[1]:.2e}:{normalized_ber[2]:.2e}:{normalized_ber[3]:.2e}")
 print(f"Refresh rate: 15.6 microseconds per row")
@@ -1,33 +1,25 @@
+import os
+import sys
+
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..')))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.flips import flip_counts
+
 # Dataset: (Address, Observed Value)
-data = [
-    (0x9CD, 0xFFFF),
-    (0x93F, 0xBA),
-    (0x8CA, 0xFFFF),
-    (0x700, 0xD800),
-    (0x6E0, 0xFFFF),
-    (0x600, 0xCE00),
-    (0x5E9, 0xFFFF),
-    (0x5E6, 0x5),
-    (0x51B, 0xBA),
-    (0x4EE, 0xFFFF),
-    (0x4DF, 0x4),
-    (0x41C, 0x0),
-    (0x3F4, 0x3),
-    (0x309, 0x0),
-    (0x300, 0x8000),
-    (0x20E, 0x0),
-    (0x1F5, 0xFFFF),
-    (0x107, 0x0),
-    (0xB8,  0x100),
-    (0x0,   0x0)
-]
+# (entries of the data.txt capture next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'data.txt'))
+addresses, values = load_entries(capture)
 
 PATTERN = 0xFFFF
 TOTAL_BITS_TESTED = 40960  # 10 rows × 4096 bits (i.e., 2560 words × 16 bits)
 
 # Calculate bit flips
-bit_flips = [bin(PATTERN ^ val).count('1') for _, val in data]
-bit_flip_sum = sum(bit_flips)
+bit_flips = flip_counts(values, PATTERN)
+bit_flip_sum = int(bit_flips.sum())
 bit_flip_percentage = (bit_flip_sum / TOTAL_BITS_TESTED) * 100
 
 # Output
@@ -1,36 +1,29 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..')))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.flips import flip_counts
+
 # Dataset: (Address, Observed Value)
-data = [
-    (0x9CD, 0xFFFF),
-    (0x93F, 0xBA),
-    (0x8CA, 0xFFFF),
-    (0x700, 0xD800),
-    (0x6E0, 0xFFFF),
-    (0x600, 0xCE00),
-    (0x5E9, 0xFFFF),
-    (0x5E6, 0x5),
-    (0x51B, 0xBA),
-    (0x4EE, 0xFFFF),
-    (0x4DF, 0x4),
-    (0x41C, 0x0),
-    (0x3F4, 0x3),
-    (0x309, 0x0),
-    (0x300, 0x8000),
-    (0x20E, 0x0),
-    (0x1F5, 0xFFFF),
-    (0x107, 0x0),
-    (0xB8,  0x100),
-    (0x0,   0x0)
-]
+# (entries of the data.txt capture next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'data.txt'))
+addresses, values = load_entries(capture)
+addresses = addresses.astype(np.int64)  # signed, for the axis limits
 
 PATTERN = 0xFFFF
 
 # Extract and sort
-data_sorted = sorted(data, key=lambda x: x[0])
-addresses = [addr for addr, _ in data_sorted]
-bit_flips = [bin(PATTERN ^ val).count('1') for _, val in data_sorted]
+order = np.argsort(addresses, kind='stable')
+addresses, values = addresses[order], values[order]
+bit_flips = flip_counts(values, PATTERN)
 
 # Plotting
 plt.figure(figsize=(12, 6))
@@ -50,9 +43,9 @@ plt.xticks(xticks, xtick_labels, rotation=45, ha='right')
 plt.xlim(min(addresses) - 8, max(addresses) + 8)
 
 # Stats annotation
-total_flips = sum(bit_flips)
-max_flips = max(bit_flips)
-max_addr = addresses[bit_flips.index(max_flips)]
+total_flips = int(bit_flips.sum())
+max_flips = int(bit_flips.max())
+max_addr = addresses[bit_flips.argmax()]
 stats_text = (
     f"Total Bit Flips: {total_flips}   |   "
     f"Bit Flip %: {(total_flips / 40960) * 100:.3f}%   |   "
@@ -1,31 +1,27 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..')))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.flips import flip_counts
+
 # New dataset: (Address, Observed Value)
-data = [
-    (0x9CD, 0xFFFF),
-    (0x93F, 0xBA),
-    (0x8CA, 0xFFFF),
-    (0x700, 0xD800),
-    (0x6E0, 0xFFFF),
-    (0x600, 0xCE00),
-    (0x5E9, 0xFFFF),
-    (0x5E6, 0x5),
-    (0x51B, 0xBA),
-    (0x4EE, 0xFFFF),
-    (0x4DF, 0x4),
-    (0x3F4, 0x3),
-    (0x309, 0x0),
-    (0x300, 0x8000),
-    (0x1F5, 0xFFFF),
-    (0x0, 0xBA),
-]
+# (no log of this run was kept: the entries transcribed from this
+# script's old list, see transcribed.txt)
+capture, = discover(os.path.join(SCRIPT_DIR, 'transcribed.txt'))
+addresses, values = load_entries(capture)
 
 PATTERN = 0xFFFF
 
 # Extract addresses and calculate bit flips
-addresses = [addr for addr, _ in data]
-bit_flips = [bin(PATTERN ^ val).count('1') for _, val in data]
+bit_flips = flip_counts(values, PATTERN)
 
 # Plot
 plt.figure(figsize=(12, 6))
@@ -42,10 +38,10 @@ xtick_labels_filtered = [f'0x{addr:X}' for addr in xticks_filtered]
 plt.xticks(xticks_filtered, xtick_labels_filtered, rotation=45, ha='right')
 
 # Stats box
-total_flips = sum(bit_flips)
-affected_addrs = sum(1 for b in bit_flips if b > 0)
-max_flips = max(bit_flips)
-max_addr = addresses[bit_flips.index(max_flips)]
+total_flips = int(bit_flips.sum())
+affected_addrs = int(np.count_nonzero(bit_flips))
+max_flips = int(bit_flips.max())
+max_addr = addresses[bit_flips.argmax()]
 stats_text = (
     f"Total Bit Flips: {total_flips}\n"
     f"Affected Addresses: {affected_addrs}\n"
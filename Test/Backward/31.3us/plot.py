@@ -1,27 +1,21 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..')))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.spatial import dense_flips
+
 # New dataset: (Address, Observed Value)
-data = [
-    (0x9CD, 0xFFFF),
-    (0x93F, 0x00BA),
-    (0x8CA, 0xFFFF),
-    (0x838, 0x0000),
-    (0x700, 0xD800),
-    (0x6E0, 0xFFFF),
-    (0x600, 0xCE00),
-    (0x5E9, 0xFFFF),
-    (0x5E6, 0x0005),
-    (0x51B, 0x00BA),
-    (0x4EE, 0xFFFF),
-    (0x4DF, 0x0004),
-    (0x3F4, 0x0003),
-    (0x309, 0x0000),
-    (0x300, 0x8000),
-    (0x20E, 0x0000),
-    (0x1F5, 0xFFFF),
-    (0x107, 0x00BA)
-]
+# (entries of the data.txt capture next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'data.txt'))
+addresses, values = load_entries(capture)
 
 PATTERN = 0xFFFF
 
@@ -30,14 +24,8 @@ x_min = 0x100  # Start slightly before lowest address in dataset
 x_max = 0xA00  # End slightly after highest address
 x_range = np.arange(x_min, x_max + 1)
 
-# Create an array for bit flips aligned with the full x_range
-bit_flips_full = np.zeros_like(x_range, dtype=int)
-
-# Populate bit flip counts into the range
-for addr, val in data:
-    if x_min <= addr <= x_max:
-        idx = addr - x_min
-        bit_flips_full[idx] = bin(val ^ PATTERN).count('1') if val != PATTERN else 0
+# Bit flip counts aligned with the full x_range (0 where nothing was logged)
+bit_flips_full = dense_flips(addresses, values, PATTERN, x_min, x_max + 1)
 
 # Plotting vertical lines for each address with bit flips
 plt.figure(figsize=(14, 5))
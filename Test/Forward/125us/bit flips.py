@@ -1,88 +1,34 @@
+import os
+import sys
+
 import numpy as np
 
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..')))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.flips import flip_counts
+
 # Dataset for 125µs refresh period
-data = [
-    (0x0, 0x0),
-    (0x80, 0xB100),
-    (0xBC, 0xAA00),
-    (0xEF, 0x3300),
-    (0xF2, 0xFFFF),
-    (0x1DF, 0xC4),
-    (0x1F5, 0xFFFF),
-    (0x2A5, 0xFFFF),
-    (0x300, 0x8000),
-    (0x309, 0x0),
-    (0x3BB, 0xFFFF),
-    (0x481, 0xFFFF),
-    (0x531, 0xFFFF),
-    (0x5A4, 0xFFFF),
-    (0x5A5, 0xFFFF),
-    (0x5E1, 0x1),
-    (0x62E, 0xFE),
-    (0x62F, 0xFE5B),
-    (0x633, 0x1300),
-    (0x637, 0x1300),
-    (0x63E, 0x202),
-    (0x643, 0x30B),
-    (0x646, 0x1B00),
-    (0x649, 0x0),
-    (0x686, 0x4B00),
-    (0x687, 0x0),
-    (0x688, 0x0),
-    (0x689, 0x0),
-    (0x68A, 0x0),
-    (0x68B, 0x0),
-    (0x68C, 0x0),
-    (0x68D, 0x0),
-    (0x68E, 0x0),
-    (0x68F, 0x0),
-    (0x690, 0x0),
-    (0x692, 0x0),
-    (0x693, 0x0),
-    (0x694, 0x0),
-    (0x695, 0x0),
-    (0x696, 0x0),
-    (0x697, 0x0),
-    (0x698, 0x0),
-    (0x699, 0x0),
-    (0x69B, 0x400),
-    (0x69F, 0x24B),
-    (0x6A2, 0x3),
-    (0x6BC, 0xBFA),
-    (0x6C6, 0x2),
-    (0x6C7, 0x0),
-    (0x6C8, 0x0),
-    (0x6CA, 0x0),
-    (0x6CB, 0x0),
-    (0x6CC, 0x0),
-    (0x6CE, 0x0),
-    (0x6CF, 0x0),
-    (0x6D0, 0x0),
-    (0x6D7, 0x303),
-    (0x6E0, 0xFFFF),
-    (0x6EF, 0x6),
-    (0x715, 0xBA),
-    (0x7E7, 0xFFFF),
-    (0x800, 0xA00),
-    (0x838, 0x0),
-    (0x8CA, 0xFFFF),
-    (0x93F, 0xBA),
-    (0x9CD, 0xFFFF)
-]
+# (entries of the data.txt capture next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'data.txt'))
+addresses, values = load_entries(capture)
 
 # Constants
 PATTERN = 0xFFFF
 TOTAL_ADDRESS_SPACE = 0x09FF + 1  # 2560 addresses (0x0000 to 0x09FF)
 
 # Bit flip calculation
-bit_flips = [bin(val ^ PATTERN).count('1') for _, val in data]
-bit_flip_sum = sum(bit_flips)
+bit_flips = flip_counts(values, PATTERN)
+bit_flip_sum = int(bit_flips.sum())
 
 # Average over all addresses
 average_flips = bit_flip_sum / TOTAL_ADDRESS_SPACE
 
 # Output
 print(f"Total addresses in range: {TOTAL_ADDRESS_SPACE}")
-print(f"Observed entries with errors or test values: {len(data)}")
+print(f"Observed entries with errors or test values: {len(values)}")
 print(f"Total bit flips observed: {bit_flip_sum}")
 print(f"Average bit flips per address (across all memory): {average_flips:.6f}")
@@ -1,82 +1,30 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
+import numpy as np
+
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..')))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.flips import flip_counts
 
 # New dataset
-data = [
-    (0x0, 0x0),
-    (0x80, 0xB100),
-    (0xBC, 0xAA00),
-    (0xEF, 0x3300),
-    (0xF2, 0xFFFF),
-    (0x1DF, 0xC4),
-    (0x1F5, 0xFFFF),
-    (0x2A5, 0xFFFF),
-    (0x300, 0x8000),
-    (0x309, 0x0),
-    (0x3BB, 0xFFFF),
-    (0x481, 0xFFFF),
-    (0x531, 0xFFFF),
-    (0x5A4, 0xFFFF),
-    (0x5A5, 0xFFFF),
-    (0x5E1, 0x1),
-    (0x62E, 0xFE),
-    (0x62F, 0xFE5B),
-    (0x633, 0x1300),
-    (0x637, 0x1300),
-    (0x63E, 0x202),
-    (0x643, 0x30B),
-    (0x646, 0x1B00),
-    (0x649, 0x0),
-    (0x686, 0x4B00),
-    (0x687, 0x0),
-    (0x688, 0x0),
-    (0x689, 0x0),
-    (0x68A, 0x0),
-    (0x68B, 0x0),
-    (0x68C, 0x0),
-    (0x68D, 0x0),
-    (0x68E, 0x0),
-    (0x68F, 0x0),
-    (0x690, 0x0),
-    (0x692, 0x0),
-    (0x693, 0x0),
-    (0x694, 0x0),
-    (0x695, 0x0),
-    (0x696, 0x0),
-    (0x697, 0x0),
-    (0x698, 0x0),
-    (0x699, 0x0),
-    (0x69B, 0x400),
-    (0x69F, 0x24B),
-    (0x6A2, 0x3),
-    (0x6BC, 0xBFA),
-    (0x6C6, 0x2),
-    (0x6C7, 0x0),
-    (0x6C8, 0x0),
-    (0x6CA, 0x0),
-    (0x6CB, 0x0),
-    (0x6CC, 0x0),
-    (0x6CE, 0x0),
-    (0x6CF, 0x0),
-    (0x6D0, 0x0),
-    (0x6D7, 0x303),
-    (0x6E0, 0xFFFF),
-    (0x6EF, 0x6),
-    (0x715, 0xBA),
-    (0x7E7, 0xFFFF),
-    (0x800, 0xA00),
-    (0x838, 0x0),
-    (0x8CA, 0xFFFF),
-    (0x93F, 0xBA),
-    (0x9CD, 0xFFFF),
-]
+# (entries of the data.txt capture next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'data.txt'))
+addresses, values = load_entries(capture)
 
 PATTERN = 0xFFFF
 X_LIMIT = 0x9CD  # Plot up to highest address
 
 # Filter and sort data
-filtered_data = sorted([(addr, val) for addr, val in data if addr <= X_LIMIT], key=lambda x: x[0])
-addresses = [addr for addr, _ in filtered_data]
-bit_flips = [bin(PATTERN ^ val).count('1') for _, val in filtered_data]
+keep = np.flatnonzero(addresses <= X_LIMIT)
+keep = keep[np.argsort(addresses[keep], kind='stable')]
+addresses, values = addresses[keep], values[keep]
+bit_flips = flip_counts(values, PATTERN)
 
 # Plot
 plt.figure(figsize=(12, 6))
@@ -96,10 +44,10 @@ plt.xticks(xticks, xtick_labels, rotation=45, ha='right')
 plt.xlim(min(addresses), X_LIMIT)
 
 # Stats
-total_flips = sum(bit_flips)
-affected_addrs = sum(1 for b in bit_flips if b > 0)
-max_flips = max(bit_flips)
-max_addr = addresses[bit_flips.index(max_flips)]
+total_flips = int(bit_flips.sum())
+affected_addrs = int(np.count_nonzero(bit_flips))
+max_flips = int(bit_flips.max())
+max_addr = addresses[bit_flips.argmax()]
 stats_text = f"Max Bit Flips: {max_flips} at 0x{max_addr:X}"
 
 plt.figtext(0.99, 0.01, stats_text, fontsize=9, ha='right')
@@ -1,36 +1,26 @@
+import os
+import sys
+
 import numpy as np
 
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..')))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.flips import flip_counts
+
 # Your current dataset
-data = [
-    (0x0, 0xBA),
-    (0xF2, 0xFFFF),
-    (0x100, 0xAC00),
-    (0x1FC, 0x1),
-    (0x2F3, 0x2),
-    (0x309, 0x0),
-    (0x3FB, 0xFFFF),
-    (0x41C, 0xBA),
-    (0x4E1, 0x4),
-    (0x4EE, 0xFFFF),
-    (0x51B, 0xBA),
-    (0x5E8, 0x5),
-    (0x5E9, 0xFFFF),
-    (0x612, 0x0),
-    (0x6E0, 0xFFFF),
-    (0x715, 0xBA),
-    (0x7E7, 0xFFFF),
-    (0x800, 0xA00),
-    (0x838, 0x0),
-    (0x8CA, 0xFFFF),
-    (0x93F, 0xBA),
-    (0x9C4, 0xFFFF)
-]
+# (entries of the data.txt capture next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'data.txt'))
+addresses, values = load_entries(capture)
 
 PATTERN = 0xFFFF
 total_address_space = 0x9C4 + 1  # 2501 addresses
 
-bit_flips = [bin(val ^ PATTERN).count('1') for _, val in data]
-bit_flip_sum = sum(bit_flips)
+bit_flips = flip_counts(values, PATTERN)
+bit_flip_sum = int(bit_flips.sum())
 
 # Remaining addresses assumed to have 0 bit flips
 full_avg = bit_flip_sum / total_address_space
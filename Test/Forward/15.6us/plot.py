@@ -1,37 +1,26 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..')))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.flips import flip_counts
+
 # Dataset: (Address, Observed Value)
-data = [
-    (0x0, 0xBA),
-    (0xF2, 0xFFFF),
-    (0x100, 0xAC00),
-    (0x1FC, 0x1),
-    (0x2F3, 0x2),
-    (0x309, 0x0),
-    (0x3FB, 0xFFFF),
-    (0x41C, 0xBA),
-    (0x4E1, 0x4),
-    (0x4EE, 0xFFFF),
-    (0x51B, 0xBA),
-    (0x5E8, 0x5),
-    (0x5E9, 0xFFFF),
-    (0x612, 0x0),
-    (0x6E0, 0xFFFF),
-    (0x715, 0xBA),
-    (0x7E7, 0xFFFF),
-    (0x800, 0xA00),
-    (0x838, 0x0),
-    (0x8CA, 0xFFFF),
-    (0x93F, 0xBA),
-    (0x9C4, 0xFFFF)
-]
+# (entries of the data.txt capture next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'data.txt'))
+addresses, values = load_entries(capture)
 
 PATTERN = 0xFFFF
 
 # Extract addresses and calculate bit flips
-addresses = [addr for addr, _ in data]
-bit_flips = [bin(PATTERN ^ val).count('1') for _, val in data]
+bit_flips = flip_counts(values, PATTERN)
 
 # Plot
 plt.figure(figsize=(12, 6))
@@ -48,10 +37,10 @@ xtick_labels_filtered = [f'0x{addr:X}' for addr in xticks_filtered]
 plt.xticks(xticks_filtered, xtick_labels_filtered, rotation=45, ha='right')
 
 # Stats box
-total_flips = sum(bit_flips)
-affected_addrs = sum(1 for b in bit_flips if b > 0)
-max_flips = max(bit_flips)
-max_addr = addresses[bit_flips.index(max_flips)]
+total_flips = int(bit_flips.sum())
+affected_addrs = int(np.count_nonzero(bit_flips))
+max_flips = int(bit_flips.max())
+max_addr = addresses[bit_flips.argmax()]
 stats_text = (
     f"Max Bit Flips: {max_flips} at 0x{max_addr:X}"
 )
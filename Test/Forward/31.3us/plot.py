@@ -1,38 +1,21 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..')))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.spatial import dense_flips
+
 # Dataset for 31.3µs refresh period
-data = [
-    (0x3C, 0xFFFF),
-    (0x31E, 0xFFFF),
-    (0x3E7, 0xFFFF),
-    (0x4A6, 0xFE1F),
-    (0x4E2, 0xFFFF),
-    (0x500, 0xFFFF),
-    (0x55A, 0x3),
-    (0x55D, 0xB),
-    (0x55E, 0x0),
-    (0x56E, 0x130B),
-    (0x570, 0x0),
-    (0x571, 0x0),
-    (0x572, 0x31B),
-    (0x573, 0x4B00),
-    (0x575, 0x300),
-    (0x57E, 0x5B02),
-    (0x582, 0x1),
-    (0x58C, 0x0),
-    (0x58F, 0x1B1B),
-    (0x591, 0x302),
-    (0x5AF, 0x0),
-    (0x5B0, 0x0),
-    (0x5B1, 0x0),
-    (0x5D3, 0x1B00),
-    (0x5E3, 0xFFFF),
-    (0x5FD, 0xFFFF),
-    (0x605, 0xFFFF),
-    (0x618, 0xFFFF),
-    (0x6CF, 0x0)
-]
+# (entries of the data.txt capture next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'data.txt'))
+addresses, values = load_entries(capture)
 
 PATTERN = 0xFFFF
 
@@ -41,14 +24,8 @@ x_min = 0x49C
 x_max = 0x6D0
 x_range = np.arange(x_min, x_max + 1)
 
-# Create an array for bit flips aligned with the full range, default 0
-bit_flips_full = np.zeros_like(x_range, dtype=int)
-
-# Map bit flips data into full array
-for addr, val in data:
-    if x_min <= addr <= x_max:
-        idx = addr - x_min
-        bit_flips_full[idx] = bin(val ^ PATTERN).count('1')
+# Bit flip counts aligned with the full range, default 0
+bit_flips_full = dense_flips(addresses, values, PATTERN, x_min, x_max + 1)
 
 # Plot vertical green lines for addresses with bit flips
 plt.figure(figsize=(14, 5))
@@ -1,51 +1,30 @@
+import os
+import sys
+
 import matplotlib.pyplot as plt
 import numpy as np
 
+# Make the shared remanence package importable when run from this folder
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..', '..')))
+
+from remanence.analysis import load_entries
+from remanence.datasets import discover
+from remanence.flips import flip_counts
+
 # Dataset
-data = [
-    (0xC, 0xC),
-    (0x1C, 0xFFFF),
-    (0x71, 0x0),
-    (0x73, 0xFF),
-    (0x7C, 0x7C00),
-    (0xA0, 0x0),
-    (0xA1, 0xB),
-    (0xA2, 0xFF),
-    (0xA4, 0xDA6D),
-    (0xCE, 0x0),
-    (0xCF, 0x2),
-    (0xD7, 0x303),
-    (0xDD, 0x0),
-    (0xDE, 0x1F03),
-    (0xDF, 0x0),
-    (0xE0, 0x203),
-    (0xE8, 0x0),
-    (0xF3, 0x13),
-    (0xF5, 0x300),
-    (0x1B0, 0xB00),
-    (0x1F2, 0x1B09),
-    (0x232, 0x200),
-    (0x245, 0xFB5B),
-    (0x262, 0x85),
-    (0x263, 0xFFFF),
-    (0x2B1, 0x3),
-    (0x2B4, 0x300),
-    (0x2B5, 0x302),
-    (0x2B8, 0x3),
-    (0x2B9, 0x1B03),
-    (0x3AC, 0x3),
-    (0x3B1, 0x1B02),
-    (0x5E9, 0xFFFF),
-    (0x622, 0xFFFF)
-]
+# (entries of the data.txt capture next to this script)
+capture, = discover(os.path.join(SCRIPT_DIR, 'data.txt'))
+addresses, values = load_entries(capture)
 
 PATTERN = 0xFFFF
 X_LIMIT = 0x3B1  # x-axis max
 
 # Filter and sort data up to limit
-data_sorted = sorted([(addr, val) for addr, val in data if addr <= X_LIMIT], key=lambda x: x[0])
-addresses = [addr for addr, _ in data_sorted]
-bit_flips = [bin(PATTERN ^ val).count('1') for _, val in data_sorted]
+keep = np.flatnonzero(addresses <= X_LIMIT)
+keep = keep[np.argsort(addresses[keep], kind='stable')]
+addresses, values = addresses[keep], values[keep]
+bit_flips = flip_counts(values, PATTERN)
 
 # Plot
 plt.figure(figsize=(12, 6))
@@ -65,10 +44,10 @@ plt.xticks(xticks, xtick_labels, rotation=45, ha='right')
 plt.xlim(min(addresses), X_LIMIT)
 
 # Stats
-total_flips = sum(bit_flips)
-affected_addrs = sum(1 for b in bit_flips if b > 0)
-max_flips = max(bit_flips)
-max_addr = addresses[bit_flips.index(max_flips)]
+total_flips = int(bit_flips.sum())
+affected_addrs = int(np.count_nonzero(bit_flips))
+max_flips = int(bit_flips.max())
+max_addr = addresses[bit_flips.argmax()]
 stats_text = (
     f"Max Bit Flips: {max_flips} at 0x{max_addr:X}"
 )
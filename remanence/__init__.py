@@ -0,0 +1,10 @@
+"""Shared analysis helpers for the MT48LC4M16A2 data-remanence captures."""
+
+from .dumplog import DumpLog, load_dump_log
+from .flips import (adjacency_stats, adjacent_pairs, burst_histogram,
+                    flip_counts, flip_masks, flip_stats, lane_flips,
+                    longest_run, popcount)
+from .geometry import CHIP, CHIP_WORDS, ROW_SIZE, Geometry
+from .index import ErrorIndex
+from .store import (DumpStore, create_dump_store, open_dump_store,
+                    store_from_log)
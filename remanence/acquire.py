@@ -0,0 +1,292 @@
+"""Acquisition of dumps into .rdump stores.
+
+Reads go up the address range ('forward') or down it ('backward'). The
+board streams every block request upward, so a backward block read
+issues one request per row, rows from the top down: each row is still
+opened before every row below it, which is what the scan direction is
+about, at the cost of more round trips.
+
+Progress is checkpointed to `<store>.ckpt` next to the store: the highest
+address below which everything has been read, and a bitmap of completed
+CHUNK_WORDS blocks. After a dropped connection, acquiring again with the
+checkpoint re-reads only the blocks it does not list as complete.
+"""
+
+import base64
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from .geometry import CHIP
+from .protocol import CHUNK_SIZE, CHUNK_WORDS, RETRY_COUNT, decode_chunks
+
+# Chunks per block request; 64 chunks is 16K words per round trip
+REQUEST_CHUNKS = 64
+
+CHECKPOINT_SUFFIX = '.ckpt'
+CHECKPOINT_EVERY = 5.0  # seconds between checkpoints
+
+DIRECTIONS = ('forward', 'backward')
+
+
+def checkpoint_path(store_path):
+    return store_path + CHECKPOINT_SUFFIX
+
+
+class Checkpoint:
+    """Completed blocks of an acquisition over [start, stop).
+
+    With `path` None the progress is only tracked in memory.
+    """
+
+    def __init__(self, path, start, stop, block_words=CHUNK_WORDS,
+                 every=CHECKPOINT_EVERY):
+        self.path = path
+        self.start = start
+        self.stop = stop
+        self.block_words = block_words
+        self.every = every
+        self.done = np.zeros(-(-(stop - start) // block_words), dtype=bool)
+        self._saved = time.monotonic()
+
+    def __repr__(self):
+        return (f'Checkpoint({self.path!r}, 0x{self.start:X}-0x{self.stop:X}, '
+                f'{int(self.done.sum())}/{len(self.done)} blocks, '
+                f'contiguous=0x{self.contiguous:X})')
+
+    @property
+    def contiguous(self):
+        """First address not covered by the leading run of complete blocks."""
+        missing = np.flatnonzero(~self.done)
+        if not len(missing):
+            return self.stop
+        return self.start + int(missing[0]) * self.block_words
+
+    def block_address(self, block):
+        return self.start + block * self.block_words
+
+    def missing(self):
+        """Indices of blocks still to be read."""
+        return np.flatnonzero(~self.done)
+
+    def mark(self, blocks):
+        self.done[blocks] = True
+
+    def mark_from_store(self, store, lo=None, hi=None):
+        """Mark the blocks in [lo, hi) whose words are all valid in store."""
+        lo = self.start if lo is None else lo
+        hi = self.stop if hi is None else hi
+        first = (lo - self.start) // self.block_words
+        last = -(-(hi - self.start) // self.block_words)
+        block_lo = self.block_address(first)
+        block_hi = min(self.block_address(last), self.stop)
+        valid = store.valid(block_lo, block_hi)
+        # The last block may be short; pad it as valid
+        pad = (last - first) * self.block_words - len(valid)
+        valid = np.concatenate([valid, np.ones(pad, dtype=bool)])
+        complete = valid.reshape(-1, self.block_words).all(axis=1)
+        self.done[first:last] |= complete
+
+    def save(self, store=None):
+        """Write the checkpoint, after flushing store so it never claims
+        words that are not on disk yet."""
+        if store is not None:
+            store.flush()
+        self._saved = time.monotonic()
+        if self.path is None:
+            return
+        state = {
+            'start': self.start,
+            'stop': self.stop,
+            'block_words': self.block_words,
+            'contiguous': self.contiguous,
+            'complete': int(self.done.sum()),
+            'blocks': len(self.done),
+            'done': base64.b64encode(
+                np.packbits(self.done, bitorder='little').tobytes()).decode(),
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(state, f, indent=1)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+    def maybe_save(self, store=None):
+        if time.monotonic() - self._saved >= self.every:
+            self.save(store)
+
+    def remove(self):
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    @classmethod
+    def load(cls, path, every=CHECKPOINT_EVERY):
+        with open(path) as f:
+            state = json.load(f)
+        ckpt = cls(path, state['start'], state['stop'], state['block_words'],
+                   every)
+        bits = np.frombuffer(base64.b64decode(state['done']), dtype=np.uint8)
+        ckpt.done[:] = np.unpackbits(bits, bitorder='little',
+                                     count=len(ckpt.done)).astype(bool)
+        return ckpt
+
+
+def resume_checkpoint(store, start=None, stop=None, every=CHECKPOINT_EVERY):
+    """Checkpoint to continue an interrupted acquisition of store.
+
+    Uses the saved `.ckpt` when there is one for the same range, and
+    otherwise rebuilds the block bitmap from the store's validity bits
+    (which survive a crashed process as long as the memmap pages reached
+    the page cache).
+    """
+    start = store.base if start is None else start
+    stop = store.base + len(store) if stop is None else stop
+    path = checkpoint_path(store.path)
+    if os.path.exists(path):
+        ckpt = Checkpoint.load(path, every)
+        if (ckpt.start, ckpt.stop, ckpt.block_words) != \
+                (start, stop, CHUNK_WORDS):
+            raise ValueError(f'{path} covers 0x{ckpt.start:X}-0x{ckpt.stop:X}, '
+                             f'not 0x{start:X}-0x{stop:X}')
+    else:
+        ckpt = Checkpoint(path, start, stop, every=every)
+    ckpt.mark_from_store(store)
+    return ckpt
+
+
+def _runs(chunks, limit, groups=None, reverse=False):
+    # Split sorted chunk indices into runs of consecutive indices <= limit
+    # that never span two `groups` values; top run first with reverse
+    if not len(chunks):
+        return
+    cut = np.diff(chunks) != 1
+    if groups is not None:
+        cut |= np.diff(groups) != 0
+    runs = np.split(chunks, np.flatnonzero(cut) + 1)
+    for run in (reversed(runs) if reverse else runs):
+        parts = range(0, len(run), limit)
+        for lo in (reversed(parts) if reverse else parts):
+            part = run[lo:lo + limit]
+            yield int(part[0]), len(part)
+
+
+def _check_direction(direction):
+    if direction not in DIRECTIONS:
+        raise ValueError(f'direction must be one of {DIRECTIONS}, '
+                         f'not {direction!r}')
+    return direction == 'backward'
+
+
+def _checkpoint(start, stop, checkpoint):
+    if checkpoint is None:
+        return Checkpoint(None, start, stop)
+    if (checkpoint.start, checkpoint.stop) != (start, stop) or \
+            checkpoint.block_words != CHUNK_WORDS:
+        raise ValueError('checkpoint does not match the acquisition range')
+    return checkpoint
+
+
+def _finish(store, ckpt):
+    store.flush()
+    if len(ckpt.missing()):
+        ckpt.save()
+    else:
+        ckpt.remove()
+
+
+def block_acquire(client, store, start=None, stop=None,
+                  request_chunks=REQUEST_CHUNKS, passes=RETRY_COUNT,
+                  checkpoint=None, direction='forward', geometry=CHIP):
+    """Fill store[start:stop) with block reads, in `direction` order.
+
+    Every chunk is CRC-checked on arrival and written straight into the
+    store's memmap; chunks that fail (bad CRC, lost bytes, wrong address)
+    are collected and re-requested as coalesced runs, up to `passes`
+    times. Only the chunks `checkpoint` lists as missing are read, and it
+    is saved as chunks complete. Bad, lost and misplaced chunks are
+    counted in the client's metrics. Returns a dict with chunk counts and
+    the addresses of any chunks that never arrived intact.
+    """
+    backward = _check_direction(direction)
+    start = store.base if start is None else start
+    stop = store.base + len(store) if stop is None else stop
+    ckpt = _checkpoint(start, stop, checkpoint)
+    metrics = client.metrics
+    pending = ckpt.missing()
+    requests = 0
+    try:
+        for _ in range(passes):
+            if not len(pending):
+                break
+            rows = ((start + pending * CHUNK_WORDS) >> geometry.col_bits
+                    if backward else None)
+            for first, count in _runs(pending, request_chunks, rows,
+                                      backward):
+                raw = client.block(start + first * CHUNK_WORDS, count)
+                requests += 1
+                whole = len(raw) // CHUNK_SIZE
+                if whole < count:
+                    metrics.count(chunks_lost=count - whole)
+                if not whole:
+                    continue
+                addr, words, ok = decode_chunks(raw[:whole * CHUNK_SIZE])
+                expected = start + (first + np.arange(whole)) * CHUNK_WORDS
+                metrics.count(crc_chunk=int((~ok).sum()),
+                              chunks_misplaced=int((ok & (addr != expected))
+                                                   .sum()))
+                ok &= addr == expected
+                if whole == count and not ok[-1]:
+                    # A full-length stream whose last chunk is bad may be
+                    # out of step (extra bytes on the line): skip whatever
+                    # is left of it before the next request
+                    client.discard(CHUNK_SIZE)
+                for a, w in zip(addr[ok], words[ok]):
+                    a = int(a)
+                    store.write_range(a, w[:stop - a])
+                ckpt.mark(first + np.flatnonzero(ok))
+                metrics.count(words=int(np.minimum(
+                    stop - addr[ok].astype(np.int64), CHUNK_WORDS).sum()))
+                ckpt.maybe_save(store)
+            pending = ckpt.missing()
+    finally:
+        _finish(store, ckpt)
+    return {
+        'chunks': len(ckpt.done),
+        'requests': requests,
+        'failed': [ckpt.block_address(int(c)) for c in pending],
+    }
+
+
+def word_acquire(client, store, start=None, stop=None, batch=4096,
+                 passes=RETRY_COUNT, checkpoint=None, direction='forward'):
+    """Fill store[start:stop) with pipelined single-word reads, in
+    `direction` order."""
+    backward = _check_direction(direction)
+    start = store.base if start is None else start
+    stop = store.base + len(store) if stop is None else stop
+    ckpt = _checkpoint(start, stop, checkpoint)
+    failed = []
+    try:
+        for first, count in _runs(ckpt.missing(),
+                                  max(1, batch // CHUNK_WORDS),
+                                  reverse=backward):
+            lo = ckpt.block_address(first)
+            hi = min(ckpt.block_address(first + count), stop)
+            addresses = np.arange(lo, hi, dtype=np.uint32)
+            if backward:
+                addresses = addresses[::-1]
+            values, ok = client.read_many(addresses, passes)
+            store.write(addresses[ok], values[ok])
+            failed.extend(int(a) for a in addresses[~ok])
+            ckpt.mark_from_store(store, lo, hi)
+            ckpt.maybe_save(store)
+    finally:
+        _finish(store, ckpt)
+    return {'words': stop - start, 'failed': failed}
@@ -0,0 +1,90 @@
+"""Per-dataset analysis shared by the command line and the figure scripts."""
+
+import numpy as np
+
+from .dumplog import load_dump_log
+from .flips import adjacency_stats, flip_counts, flip_stats
+from .sparsediff import load_diff
+from .spatial import clustering, dense_flips
+from .store import open_dump_store
+
+
+def load_entries(dataset):
+    """Return (addresses, values) of every word listed in the capture.
+
+    For text logs these are the words that were printed; for .rdump
+    stores, every valid word in the image; for .rdiff files, the words
+    that differ from the pattern.
+    """
+    if dataset.kind == 'diff':
+        return load_diff(dataset.path).entries()
+    if dataset.kind == 'store':
+        store = open_dump_store(dataset.path)
+        valid = store.valid()
+        addresses = np.flatnonzero(valid).astype(np.uint32) + store.base
+        return addresses, np.asarray(store.values[valid])
+    log = load_dump_log(dataset.path)
+    inside = (log.addresses >= dataset.start) & (log.addresses <= dataset.end)
+    return log.addresses[inside], log.values[inside]
+
+
+def analyze_dataset(dataset, radius=1):
+    """Flip statistics, adjacency and spatial clustering of one capture.
+
+    Returns a plain dict (picklable, so it can come back from a worker
+    process) holding the dataset description, the summary numbers and the
+    sparse per-error-word arrays the figures are drawn from.
+    """
+    addresses, values = load_entries(dataset)
+    pattern = dataset.pattern
+    flips = flip_counts(values, pattern)
+    errors = flips > 0
+
+    stats = flip_stats(values, pattern, total_words=dataset.total_words)
+    adjacency = adjacency_stats(values[errors], pattern)
+    dense = dense_flips(addresses, values, pattern, dataset.start,
+                        dataset.end + 1)
+    spatial = clustering(dense, dataset.start, radius=radius)
+
+    max_index = stats.pop('max_index')
+    stats['max_address'] = (None if max_index is None
+                            else int(addresses[max_index]))
+    return {
+        'dataset': dataset.as_dict(),
+        'stats': stats,
+        'adjacency': {
+            'total_pairs': adjacency['total_pairs'],
+            'max_run': adjacency['max_run'],
+            'bursts': adjacency['bursts'],
+        },
+        'clustering': {axis: {k: v for k, v in spatial[axis].items()
+                              if k != 'neighbour_errors'}
+                       for axis in ('col', 'row', 'bank')},
+        'entries': {
+            'addresses': addresses,
+            'values': values,
+            'flips': flips,
+        },
+        'errors': {
+            'addresses': addresses[errors],
+            'flips': flips[errors],
+            'pairs': adjacency['pairs'],
+            'longest': adjacency['longest'],
+            'col_neighbours': spatial['col']['neighbour_errors'][
+                addresses[errors].astype(np.int64) - dataset.start],
+        },
+    }
+
+
+def analyze_cached(dataset, cache=None, radius=1):
+    """analyze_dataset() through a ResultCache, when one is given."""
+    if cache is None:
+        return analyze_dataset(dataset, radius)
+    params = {k: v for k, v in dataset.as_dict().items()
+              if k not in ('path', 'name')}
+    result = cache.cached('analyze_dataset', dataset.path,
+                          lambda: analyze_dataset(dataset, radius),
+                          radius=radius, **params)
+    # The same capture may be found under another name or path
+    result['dataset'] = dataset.as_dict()
+    return result
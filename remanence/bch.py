@@ -0,0 +1,341 @@
+"""Binary BCH codes over GF(2^m) for residual-BER evaluation.
+
+The DUMP scripts labelled `raw_ber / 10` as "Residual BER after
+BCH(63,45)". Here the code is real: a systematic, narrow-sense primitive
+BCH code (default BCH(63,45), t = 3, over GF(2^6) with x^6 + x + 1),
+encoded and decoded on whole arrays of codewords, each held in one uint64
+(bit i = coefficient of x^i; parity in bits 0..n-k-1, data above it).
+
+Decoding is batched: the odd syndromes come from per-byte lookup tables
+(8 gathers per codeword); codewords with a zero syndrome stop there; the
+rest go through a vectorized Berlekamp-Massey and a Chien search over
+every position at once.
+
+Measured error maps are replayed by linearity: the dump's flipped bits,
+in address order, are packed k bits at a time into the data part of
+all-zero codewords, so whatever the decoder leaves behind is the residual
+error. The parity bits would live in separate check storage that no dump
+covers, so they are taken as error-free.
+"""
+
+import numpy as np
+
+from .analysis import load_entries
+from .flips import popcount
+from .geometry import WORD_BITS
+from .patterns import PATTERNS, campaign_dumps
+from .spatial import dense_masks
+
+# Decoder status per codeword
+CLEAN, CORRECTED, FAILED = 0, 1, 2
+
+# Codewords per decoding batch
+BATCH = 1 << 18
+
+# Primitive polynomials (bit i = coefficient of x^i) by field degree
+PRIMITIVE = {3: 0b1011, 4: 0b10011, 5: 0b100101, 6: 0b1000011,
+             7: 0b10001001, 8: 0b100011101}
+
+
+class GF2m:
+    """GF(2^m) arithmetic on integer arrays through log/antilog tables."""
+
+    def __init__(self, m, primitive=None):
+        self.m = m
+        self.order = (1 << m) - 1
+        primitive = primitive or PRIMITIVE[m]
+        exp = np.zeros(2 * self.order, dtype=np.int64)
+        x = 1
+        for i in range(self.order):
+            exp[i] = x
+            x <<= 1
+            if x >> m:
+                x ^= primitive
+        exp[self.order:] = exp[:self.order]
+        self.exp = exp
+        self.log = np.zeros(self.order + 1, dtype=np.int64)
+        self.log[exp[:self.order]] = np.arange(self.order)
+        # Full multiplication and inverse tables: one gather per product
+        logs = self.log[1:]
+        self.product = np.zeros((self.order + 1,) * 2, dtype=np.int64)
+        self.product[1:, 1:] = exp[(logs[:, None] + logs[None, :])
+                                   % self.order]
+        self.inverse = np.zeros(self.order + 1, dtype=np.int64)
+        self.inverse[1:] = exp[-logs % self.order]
+
+    def pow(self, i):
+        """alpha^i for any integer (array) i."""
+        return self.exp[np.mod(i, self.order)]
+
+    def mul(self, a, b):
+        return self.product[a, b]
+
+    def div(self, a, b):
+        """a / b; b must be non-zero wherever a is."""
+        return self.product[a, self.inverse[b]]
+
+
+def _poly_mul(a, b):
+    # Product of two GF(2) polynomials held as integer bit masks
+    result = 0
+    while b:
+        if b & 1:
+            result ^= a
+        a <<= 1
+        b >>= 1
+    return result
+
+
+def _poly_mod(a, g):
+    degree = g.bit_length() - 1
+    while a.bit_length() - 1 >= degree:
+        a ^= g << (a.bit_length() - 1 - degree)
+    return a
+
+
+def _byte_tables(columns):
+    # tables[p][v] = XOR of columns[8p + k] over the set bits k of byte v
+    nbytes = (len(columns) + 7) // 8
+    columns = np.r_[np.asarray(columns, dtype=np.int64),
+                    np.zeros(8 * nbytes - len(columns), dtype=np.int64)]
+    values = np.arange(256)
+    tables = np.zeros((nbytes, 256), dtype=np.int64)
+    for p in range(nbytes):
+        for k in range(8):
+            tables[p] ^= np.where(values >> k & 1, columns[8 * p + k], 0)
+    return tables
+
+
+def _lookup(tables, words):
+    # XOR of tables[p][byte p of each word], words a uint64 array
+    as_bytes = words.view(np.uint8).reshape(-1, 8)
+    result = np.zeros(len(words), dtype=np.int64)
+    for p in range(len(tables)):
+        result ^= tables[p][as_bytes[:, p]]
+    return result
+
+
+def _pack_bits(bits):
+    # (N, <=64) bool array, column i = bit i -> uint64 per row
+    padded = np.zeros((len(bits), 64), dtype=np.uint8)
+    padded[:, :bits.shape[1]] = bits
+    return np.packbits(padded, axis=1, bitorder='little').view('<u8')[:, 0]
+
+
+class BCH:
+    """Narrow-sense primitive binary BCH code of length 2^m - 1 <= 63."""
+
+    def __init__(self, m=6, t=3, primitive=None):
+        if not 3 <= m <= 6:
+            raise ValueError('codewords must fit in 64 bits (3 <= m <= 6)')
+        self.field = field = GF2m(m, primitive)
+        self.t = t
+        self.n = field.order
+        # Generator: product of the distinct minimal polynomials of
+        # alpha^1 .. alpha^2t
+        generator, seen = 1, set()
+        for j in range(1, 2 * t + 1):
+            conjugates = {j * 2 ** i % self.n for i in range(m)}
+            if conjugates & seen:
+                continue
+            seen |= conjugates
+            minimal = np.array([1], dtype=np.int64)  # coefficients, x^0 first
+            for c in conjugates:
+                root = int(field.exp[c])
+                minimal = (np.r_[0, minimal] ^
+                           np.r_[field.mul(minimal, root), 0])
+            generator = _poly_mul(generator, int(
+                (minimal.astype(np.uint64) << np.arange(len(minimal),
+                                                        dtype=np.uint64)).sum()))
+        self.generator = generator
+        self.parity_bits = generator.bit_length() - 1
+        self.k = self.n - self.parity_bits
+        self.data_mask = np.uint64(((1 << self.k) - 1) << self.parity_bits)
+
+        # Parity of each data bit, and the odd syndromes of each code bit
+        # packed m bits apiece (S1 | S3 << m | S5 << 2m ...)
+        parity = [_poly_mod(1 << (self.parity_bits + i), generator)
+                  for i in range(self.k)]
+        self._parity = _byte_tables(parity)
+        odd = np.arange(1, 2 * t, 2)
+        syndromes = np.zeros(self.n, dtype=np.int64)
+        for s, j in enumerate(odd):
+            syndromes |= field.pow(j * np.arange(self.n)) << (m * s)
+        self._syndromes = _byte_tables(syndromes)
+        # Chien tables: c * alpha^(-i j) for every field element c, every
+        # position i and every locator degree j <= t
+        positions = np.arange(self.n)
+        self._chien = np.stack([
+            field.mul(np.arange(field.order + 1)[:, None],
+                      field.pow(-j * positions)[None, :])
+            for j in range(t + 1)]).astype(np.uint8)
+
+    def __repr__(self):
+        return f'BCH({self.n},{self.k}, t={self.t})'
+
+    def encode(self, data):
+        """Systematic codewords (uint64) of k-bit data words."""
+        data = np.asarray(data, dtype=np.uint64)
+        return (data << np.uint64(self.parity_bits)) | \
+            _lookup(self._parity, data).astype(np.uint64)
+
+    def extract(self, codewords):
+        """Data bits of codewords."""
+        return np.asarray(codewords, dtype=np.uint64) >> \
+            np.uint64(self.parity_bits)
+
+    def syndromes(self, received):
+        """(N, 2t) syndromes S1..S2t of received words."""
+        field, m, t = self.field, self.field.m, self.t
+        packed = _lookup(self._syndromes, np.asarray(received, np.uint64))
+        s = np.zeros((len(packed), 2 * t + 1), dtype=np.int64)
+        for i in range(t):
+            s[:, 2 * i + 1] = packed >> (m * i) & field.order
+        for j in range(2, 2 * t + 1, 2):  # S_2j = S_j^2 in characteristic 2
+            s[:, j] = field.mul(s[:, j // 2], s[:, j // 2])
+        return s[:, 1:]
+
+    def locator(self, syndromes):
+        """Berlekamp-Massey over a batch: (locator coefficients (N, 2t+1),
+        lowest first, and the locator degree L of each word)."""
+        field, t = self.field, self.t
+        s = np.asarray(syndromes)
+        count = len(s)
+        size = 2 * t + 1
+        c = np.zeros((count, size), dtype=np.int64)
+        c[:, 0] = 1
+        # x^shift B(x), kept shifted so no per-word gather is needed
+        xb = np.zeros((count, size), dtype=np.int64)
+        xb[:, 1] = 1
+        length = np.zeros(count, dtype=np.int64)
+        last = np.ones(count, dtype=np.int64)
+        for step in range(2 * t):
+            discrepancy = s[:, step].copy()
+            for i in range(1, min(step, size - 1) + 1):
+                discrepancy ^= field.mul(c[:, i], s[:, step - i])
+            fix = discrepancy != 0
+            grow = fix & (2 * length <= step)
+            # On growth B becomes the old C; either way x^shift moves on
+            source = np.where(grow[:, None], c, xb)
+            c = np.where(fix[:, None],
+                         c ^ field.mul(field.div(discrepancy, last)[:, None],
+                                       xb), c)
+            last = np.where(grow, discrepancy, last)
+            length = np.where(grow, step + 1 - length, length)
+            xb = np.zeros_like(source)
+            xb[:, 1:] = source[:, :-1]
+        return c, length
+
+    def chien(self, locator):
+        """(N, n) bool: position i is in error where locator(alpha^-i) = 0.
+
+        `locator` holds coefficients 0..t; each adds one table row per
+        word, so the search over all n positions is t + 1 gathers.
+        """
+        value = self._chien[0][locator[:, 0]]
+        for j in range(1, locator.shape[1]):
+            value ^= self._chien[j][locator[:, j]]
+        return value == 0
+
+    def decode(self, received):
+        """Correct up to t errors per word.
+
+        Returns (decoded codewords, status) with status CLEAN, CORRECTED
+        or FAILED; FAILED words (more errors than the locator can place)
+        are returned as received.
+        """
+        received = np.asarray(received, dtype=np.uint64)
+        decoded = received.copy()
+        status = np.zeros(len(received), dtype=np.int8)
+        for lo in range(0, len(received), BATCH):
+            chunk = received[lo:lo + BATCH]
+            s = self.syndromes(chunk)
+            dirty = np.flatnonzero(s.any(axis=1))
+            if not len(dirty):
+                continue
+            locator, length = self.locator(s[dirty])
+            degree = np.max(np.where(locator != 0, np.arange(locator.shape[1]),
+                                     0), axis=1)
+            ok = (length <= self.t) & (degree == length)
+            roots = np.zeros((len(dirty), self.n), dtype=bool)
+            roots[ok] = self.chien(locator[ok, :self.t + 1])
+            ok &= roots.sum(axis=1) == length
+            index = lo + dirty
+            decoded[index[ok]] ^= _pack_bits(roots[ok])
+            status[index] = np.where(ok, CORRECTED, FAILED)
+        return decoded, status
+
+    def error_codewords(self, masks):
+        """Pack dense per-word flip masks, in address order, into the data
+        bits of (otherwise all-zero) codewords; the last one is zero-padded.
+        """
+        bits = np.unpackbits(np.ascontiguousarray(masks, dtype='<u2')
+                             .view(np.uint8), bitorder='little')
+        count = -(-len(bits) // self.k)
+        bits = np.r_[bits, np.zeros(count * self.k - len(bits), np.uint8)]
+        columns = np.zeros((count, self.parity_bits + self.k), dtype=np.uint8)
+        columns[:, self.parity_bits:] = bits.reshape(count, self.k)
+        return _pack_bits(columns)
+
+    def evaluate(self, errors):
+        """Decode error patterns (received = all-zero codeword + errors).
+
+        Returns raw and residual data-bit error counts and the number of
+        codewords that were clean, corrected, detected as uncorrectable,
+        miscorrected (decoded to a wrong codeword) or undetected (errors
+        forming a codeword).
+        """
+        errors = np.asarray(errors, dtype=np.uint64)
+        decoded, status = self.decode(errors)
+        data = self.data_mask
+        wrong = decoded != 0
+        erroneous = errors != 0
+        return {
+            'code': repr(self),
+            'codewords': len(errors),
+            'data_bits': len(errors) * self.k,
+            'raw_bits': int(popcount(errors & data).sum(dtype=np.int64)),
+            'residual_bits': int(popcount(decoded & data).sum(dtype=np.int64)),
+            'error_codewords': int(erroneous.sum()),
+            'corrected': int(((status == CORRECTED) & ~wrong).sum()),
+            'uncorrectable': int((status == FAILED).sum()),
+            'miscorrected': int(((status == CORRECTED) & wrong).sum()),
+            'undetected': int(((status == CLEAN) & erroneous).sum()),
+        }
+
+
+BCH_63_45 = BCH(6, 3)
+
+
+def residual_ber(masks, code=BCH_63_45):
+    """Raw and post-decoding BER of dense per-word flip masks."""
+    result = code.evaluate(code.error_codewords(masks))
+    bits = len(masks) * WORD_BITS
+    result['words'] = len(masks)
+    result['raw_ber'] = result['raw_bits'] / bits if bits else 0.0
+    result['residual_ber'] = result['residual_bits'] / bits if bits else 0.0
+    return result
+
+
+def bch_dataset(dataset, code=BCH_63_45):
+    """residual_ber() of one capture over its whole [start, end] range;
+    words a log does not list (or a store never read) count as intact."""
+    addresses, values = load_entries(dataset)
+    masks = dense_masks(addresses, values, dataset.pattern, dataset.start,
+                        dataset.end + 1)
+    return dict(residual_ber(masks, code), dataset=dataset.as_dict())
+
+
+def capture_residual_ber(capture, campaign, patterns=PATTERNS,
+                         code=BCH_63_45):
+    """Residual BER after `code` of each of `patterns` for a capture and
+    its campaign directory, pooled over every dump of the pattern (see
+    patterns.campaign_dumps()); NaN for patterns never measured."""
+    dumps = campaign_dumps(capture, campaign)
+    residual = []
+    for pattern in patterns:
+        results = [bch_dataset(ds, code) for ds in dumps.get(pattern, [])]
+        bits = sum(r['words'] for r in results) * WORD_BITS
+        residual.append(sum(r['residual_bits'] for r in results) / bits
+                        if bits else np.nan)
+    return np.array(residual)
@@ -0,0 +1,110 @@
+"""On-disk result cache keyed by input content and analysis parameters.
+
+An entry's key is the SHA-256 of the capture file together with the
+parameters that influence the result (pattern, address range, ...), so
+editing a log or changing `TOTAL_ADDRESS_SPACE` invalidates it while
+re-running a figure script does not. Entries are pickles written
+atomically; a hit refreshes the file's mtime and the least recently used
+entries are evicted once the directory grows past `max_bytes`.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+DEFAULT_DIR = os.environ.get('REMANENCE_CACHE', '.remanence-cache')
+DEFAULT_MAX_BYTES = 512 << 20
+
+# Bump when the layout of cached results changes
+VERSION = 1
+
+_HASH_BLOCK = 1 << 20
+
+
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of analysis results in a directory."""
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, path, **params):
+        params = json.dumps(params, sort_keys=True, default=str)
+        h = hashlib.sha256(f'{VERSION}\0{file_digest(path)}\0{params}'.encode())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pkl')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def put(self, key, value):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until under max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(('.pkl', '.tmp')):
+                os.unlink(entry.path)
+
+    def cached(self, name, path, compute, **params):
+        """Return compute() from the cache, storing it on a miss.
+
+        `name` identifies the computation, `path` is the input file and
+        `params` everything else the result depends on.
+        """
+        key = self.key(path, name=name, **params)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
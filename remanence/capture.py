@@ -0,0 +1,157 @@
+"""asyncio capture service for long serial sessions.
+
+A full TEST sweep runs for hours; instead of relying on the Serial
+Monitor's scrollback, capture() records the board's output itself:
+
+    reader  -> raw queue -> decoder -> write queue -> writer
+                                  \\-> statistics <- reporter
+
+The reader pulls bytes off the port in a worker thread, the decoder
+splits them into whole lines and parses the `[0xADDR] = 0xVAL` entries,
+and the writer appends the raw text to a log (so load_dump_log() and the
+figure scripts can read it later) and the parsed words to an optional
+.rdump store, also off the event loop. Both queues are bounded: when the
+disk falls behind, the reader stops pulling until there is room again, so
+bytes wait in the OS serial buffer instead of being dropped here.
+"""
+
+import asyncio
+import time
+
+from .dumplog import parse_entries
+
+QUEUE_SIZE = 256
+READ_SIZE = 4096
+REPORT_EVERY = 5.0
+
+
+class CaptureStats:
+    def __init__(self):
+        self.started = time.monotonic()
+        self.bytes = 0
+        self.lines = 0
+        self.entries = 0
+        self.written = 0
+
+    def snapshot(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            'elapsed': elapsed,
+            'bytes': self.bytes,
+            'entries': self.entries,
+            'written': self.written,
+            'bytes_per_s': self.bytes / elapsed,
+            'entries_per_s': self.entries / elapsed,
+        }
+
+
+def format_report(stats, raw_queue, write_queue):
+    s = stats.snapshot()
+    return (f"[{s['elapsed']:8.1f}s] {s['bytes']} bytes "
+            f"({s['bytes_per_s']:.0f} B/s), {s['entries']} entries "
+            f"({s['entries_per_s']:.0f}/s), {s['written']} written, "
+            f"queues {raw_queue.qsize()}/{write_queue.qsize()}")
+
+
+async def _reader(port, raw_queue, stats, stop):
+    loop = asyncio.get_running_loop()
+    try:
+        while not stop.is_set():
+            data = await loop.run_in_executor(None, port.read, READ_SIZE)
+            if data:
+                stats.bytes += len(data)
+                await raw_queue.put(data)
+    finally:
+        # Also when port.read fails (a USB disconnect): the decoder and
+        # writer still get their sentinel and finish what was read
+        stop.set()
+        await raw_queue.put(None)
+
+
+async def _decoder(raw_queue, write_queue, stats):
+    pending = b''
+    while True:
+        data = await raw_queue.get()
+        if data is None:
+            if pending:
+                await write_queue.put((pending, *parse_entries(pending)))
+            break
+        pending += data
+        cut = pending.rfind(b'\n') + 1
+        if not cut:
+            continue
+        lines, pending = pending[:cut], pending[cut:]
+        addresses, values = parse_entries(lines)
+        stats.lines += lines.count(b'\n')
+        stats.entries += len(addresses)
+        await write_queue.put((lines, addresses, values))
+    await write_queue.put(None)
+
+
+def _persist(log, store, text, addresses, values):
+    log.write(text)
+    log.flush()
+    if store is not None and len(addresses):
+        inside = (addresses >= store.base) & \
+            (addresses < store.base + len(store))
+        store.write(addresses[inside], values[inside])
+        return int(inside.sum())
+    return len(addresses)
+
+
+async def _writer(write_queue, log, store, stats):
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await write_queue.get()
+        if item is None:
+            break
+        stats.written += await loop.run_in_executor(None, _persist, log,
+                                                    store, *item)
+    if store is not None:
+        await loop.run_in_executor(None, store.flush)
+
+
+async def _reporter(stats, raw_queue, write_queue, every, report):
+    while True:
+        await asyncio.sleep(every)
+        report(format_report(stats, raw_queue, write_queue))
+
+
+async def capture(port, log_path, store=None, stop=None, duration=None,
+                  queue_size=QUEUE_SIZE, report_every=REPORT_EVERY,
+                  report=print):
+    """Record the port until `stop` is set or `duration` seconds pass.
+
+    Returns the final CaptureStats snapshot. An error reading the port
+    ends the capture; what was read is still written, then the error is
+    raised.
+    """
+    stop = stop or asyncio.Event()
+    stats = CaptureStats()
+    raw_queue = asyncio.Queue(queue_size)
+    write_queue = asyncio.Queue(queue_size)
+    with open(log_path, 'ab') as log:
+        tasks = [
+            asyncio.create_task(_reader(port, raw_queue, stats, stop)),
+            asyncio.create_task(_decoder(raw_queue, write_queue, stats)),
+            asyncio.create_task(_writer(write_queue, log, store, stats)),
+        ]
+        reporter = None
+        if report_every:
+            reporter = asyncio.create_task(
+                _reporter(stats, raw_queue, write_queue, report_every, report))
+        try:
+            if duration is not None:
+                try:
+                    await asyncio.wait_for(stop.wait(), duration)
+                except asyncio.TimeoutError:
+                    stop.set()
+            await asyncio.gather(*tasks)
+        finally:
+            stop.set()
+            if reporter is not None:
+                reporter.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+    if report_every:
+        report(format_report(stats, raw_queue, write_queue))
+    return stats.snapshot()
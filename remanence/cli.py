@@ -0,0 +1,745 @@
+"""Command line entry point: `python -m remanence <command> ...`"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from .analysis import analyze_cached
+from .cache import DEFAULT_DIR, DEFAULT_MAX_BYTES, ResultCache
+from .datasets import discover, parse_refresh, select, select_dicts
+from .metrics import METRICS_SUFFIX
+from .protocol import CMD_TIMEOUT
+from .render import TEMPLATES, figure, render_all, save
+from .sweep import N_BOOT, plot_sweep, run_sweep
+
+
+def run_parallel(func, items, jobs=None):
+    """Map func over items in a process pool, preserving order."""
+    items = list(items)
+    if jobs == 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    workers = min(jobs or os.cpu_count() or 1, len(items))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, items))
+
+
+def _jsonable(obj):
+    if isinstance(obj, dict):
+        return {k: _jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_jsonable(v) for v in obj]
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    return obj
+
+
+def _selected(args):
+    datasets = select(discover(*args.paths), args.refresh, args.direction,
+                      args.kind)
+    if not datasets:
+        sys.exit('no datasets found')
+    return datasets
+
+
+def _print_summary(result):
+    ds, st = result['dataset'], result['stats']
+    refresh = ds['refresh_us']
+    refresh = f'{refresh:g}us' if refresh is not None else '?'
+    max_addr = st['max_address']
+    max_addr = f'0x{max_addr:X}' if max_addr is not None else '-'
+    print(f"{ds['name']}")
+    print(f"  refresh {refresh}, {ds['direction']}, pattern "
+          f"0x{ds['pattern']:04X}, range 0x{ds['start']:04X}-0x{ds['end']:04X}")
+    print(f"  addresses with errors: {st['error_words']} / {st['total_words']}"
+          f"   total bit flips: {st['total_flips']}"
+          f"   max: {st['max_flips']} at {max_addr}")
+    print(f"  average bit flips per address: {st['avg_flips']:.6f}"
+          f"   bit flip percentage: {100 * st['ber']:.4f}%")
+    adj = result['adjacency']
+    print(f"  adjacent bit-flip pairs: {adj['total_pairs']}"
+          f"   longest flipped run: {adj['max_run']}")
+    col = result['clustering']['col']
+    print(f"  errors with an erroneous column neighbour: "
+          f"{100 * col['clustered_fraction']:.1f}% "
+          f"(independent: {100 * col['expected_fraction']:.1f}%)")
+
+
+def _cache(args):
+    if args.no_cache:
+        return None
+    return ResultCache(args.cache_dir, args.cache_size << 20)
+
+
+def cmd_analyze(args):
+    analyze = partial(analyze_cached, cache=_cache(args))
+    results = run_parallel(analyze, _selected(args), args.jobs)
+    for result in results:
+        _print_summary(result)
+    if args.json:
+        summary = [{k: v for k, v in r.items()
+                    if k not in ('entries', 'errors')} for r in results]
+        with open(args.json, 'w') as f:
+            json.dump(_jsonable(summary), f, indent=2)
+
+
+def cmd_sweep(args):
+    sweep = run_sweep(_selected(args), _cache(args), args.boot,
+                      args.confidence, partial(run_parallel, jobs=args.jobs))
+    level = f'{100 * args.confidence:g}% CI'
+    for direction, rows in sorted(sweep.items()):
+        print(f'{direction}:')
+        print(f'  {"refresh":>9}  {"runs":>4}  {"bit flip %":>10}  {level}')
+        for row in rows:
+            print(f"  {row['refresh_us']:>7g}us  {row['runs']:>4}  "
+                  f"{row['percentage']:>10.4f}  "
+                  f"[{row['ci_low']:.4f}, {row['ci_high']:.4f}]")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(_jsonable(sweep), f, indent=2)
+    if args.plot:
+        save(plot_sweep(sweep, figure('sweep', (8, 5)).add_subplot()).figure,
+             args.plot)
+
+
+def cmd_render(args):
+    datasets = _selected(args)
+    cache = _cache(args)
+    os.makedirs(args.output, exist_ok=True)
+    written = render_all(datasets, args.output, cache, args.figure,
+                         args.dpi, map_func=partial(run_parallel,
+                                                    jobs=args.jobs))
+    if not args.no_sweep:
+        sweep = run_sweep(datasets, cache,
+                          map_func=partial(run_parallel, jobs=args.jobs))
+        if sweep:
+            path = os.path.join(args.output, 'bit_flip_vs_refresh.png')
+            ax = plot_sweep(sweep, figure('sweep', (8, 5)).add_subplot())
+            save(ax.figure, path, args.dpi)
+            written.append(path)
+    print(f'wrote {len(written)} figures to {args.output}')
+
+
+def cmd_simulate(args):
+    from .device import PtyServer
+    from .simulator import RemanenceDevice, RetentionModel
+    from .store import create_dump_store
+
+    refresh_us = parse_refresh(args.refresh)
+    model = RetentionModel(max_temperature_c=args.temperature, seed=args.seed)
+    device = RemanenceDevice(model, refresh_us, args.temperature,
+                             drop_rate=args.drop_rate, seed=args.seed)
+    if args.dump:
+        image = device.snapshot(args.pattern)
+        store = create_dump_store(args.dump, refresh_us=refresh_us,
+                                  direction='forward', pattern=args.pattern,
+                                  board=f'sim-{args.seed}',
+                                  temperature_c=args.temperature)
+        store.write_range(0, image)
+        store.flush()
+        print(f'wrote simulated dump to {args.dump}')
+        return
+    with PtyServer(device) as server:
+        print(f'simulated device on {server.path} (Ctrl-C to stop)',
+              flush=True)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+
+def _int(text):
+    return int(text, 0)
+
+
+def cmd_acquire(args):
+    from .acquire import (Checkpoint, block_acquire, checkpoint_path,
+                          resume_checkpoint, word_acquire)
+    from .host import Client, open_serial
+    from .store import create_dump_store, open_dump_store
+
+    if args.resume:
+        store = open_dump_store(args.output, mode='r+')
+        checkpoint = resume_checkpoint(store, every=args.checkpoint_every)
+        print(f'resuming from 0x{checkpoint.contiguous:X}: '
+              f'{len(checkpoint.missing())} of {len(checkpoint.done)} '
+              f'blocks missing')
+    else:
+        if os.path.exists(args.output) and not args.force:
+            sys.exit(f'{args.output} already exists: pass --resume to finish '
+                     f'it or --force to start it over')
+        store = create_dump_store(
+            args.output, words=args.stop - args.start, base=args.start,
+            refresh_us=parse_refresh(args.refresh) if args.refresh else None,
+            direction=args.direction, pattern=args.pattern,
+            board=args.board, temperature_c=args.temperature,
+            voltage_v=args.voltage)
+        checkpoint = Checkpoint(checkpoint_path(args.output), store.base,
+                                store.base + len(store),
+                                every=args.checkpoint_every)
+    client = Client(open_serial(args.port, args.baud), window=args.window,
+                    timeout=args.timeout)
+    started = time.monotonic()
+    # A reopened store keeps the direction it was started in
+    direction = store.meta.get('direction') or args.direction
+    acquire = word_acquire if args.word else block_acquire
+    result = acquire(client, store, checkpoint=checkpoint, direction=direction)
+    elapsed = time.monotonic() - started
+    print(f'read {store.coverage()} / {len(store)} words in {elapsed:.1f}s; '
+          f'{len(result["failed"])} failed')
+    print(client.metrics.summary())
+    client.metrics.save(args.metrics or args.output + METRICS_SUFFIX)
+    return 1 if result['failed'] else 0
+
+
+def cmd_capture(args):
+    import asyncio
+    import signal
+
+    from .capture import capture
+    from .host import open_serial
+    from .store import create_dump_store, open_dump_store
+
+    store = None
+    if args.store:
+        if os.path.exists(args.store):
+            store = open_dump_store(args.store, mode='r+')
+        else:
+            store = create_dump_store(args.store, words=args.words)
+    port = open_serial(args.port, args.baud)
+
+    async def run():
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGINT, stop.set)
+        return await capture(port, args.log, store, stop, args.duration,
+                             report_every=args.report)
+
+    asyncio.run(run())
+
+
+def cmd_orchestrate(args):
+    from .orchestrator import by_port, load_plan, orchestrate
+
+    jobs = load_plan(args.plan)
+    if args.dry_run:
+        for group in by_port(jobs):
+            print(group[0]['port'])
+            for job in group:
+                print(f"  {job['board']:>8} {job['refresh_us']:>7g}us "
+                      f"{job['direction']:9} -> {job['path']}")
+        return 0
+    entries = orchestrate(jobs)
+    return 1 if any('error' in e or e['failed'] for e in entries) else 0
+
+
+def cmd_encode(args):
+    from .analysis import load_entries
+    from .sparsediff import SparseDiff, diff_from_store, save_diff
+    from .store import open_dump_store
+
+    datasets = discover(args.input)
+    if not datasets:
+        sys.exit(f'{args.input}: not a recognised capture')
+    ds = datasets[0]
+    pattern = ds.pattern if args.pattern is None else args.pattern
+    if ds.kind == 'store':
+        diff = diff_from_store(open_dump_store(ds.path), pattern)
+    else:
+        # Text logs list the words of their framed range that differ
+        addresses, values = load_entries(ds)
+        meta = {k: v for k, v in ds.as_dict().items()
+                if k not in ('path', 'kind', 'pattern', 'start', 'end',
+                             'name')}
+        diff = SparseDiff.from_entries(addresses, values, pattern,
+                                       [(ds.start, ds.end + 1)], meta)
+    save_diff(diff, args.output)
+    before, after = os.path.getsize(args.input), os.path.getsize(args.output)
+    print(f'{len(diff)} words in {len(diff.starts)} runs over '
+          f'{diff.covered_words} covered: {before} -> {after} bytes')
+
+
+def cmd_decode(args):
+    from .sparsediff import load_diff
+    from .store import create_dump_store
+
+    diff = load_diff(args.input)
+    start, stop = diff.span or (0, 0)
+    values, valid = diff.dense(start, stop)
+    store = create_dump_store(args.output, words=stop - start, base=start,
+                              pattern=diff.pattern, **diff.meta)
+    store.values[:] = values
+    for a, b in diff.coverage:
+        store.mark_valid(a, b)
+    store.flush()
+    print(f'{store.coverage()} / {len(store)} words valid -> {args.output}')
+
+
+def _range(text):
+    """'6-7' or '0x1800-0x1FFF' -> inclusive (low, high)"""
+    lo, _, hi = text.partition('-')
+    return _int(lo), _int(hi or lo)
+
+
+def cmd_query(args):
+    from .flips import popcount
+    from .index import ErrorIndex
+
+    if args.index and os.path.exists(args.index):
+        index = ErrorIndex.load(args.index)
+        keep = select_dicts(index.datasets, args.refresh, args.direction,
+                            args.kind)
+    else:
+        index = ErrorIndex.build(_selected(args),
+                                 partial(run_parallel, jobs=args.jobs))
+        if args.index:
+            index.save(args.index)
+        keep = np.arange(len(index.datasets))
+    if args.rows:
+        first, last = _range(args.rows)
+        dumps, addresses, values = index.rows(first, last, args.bank, keep)
+    elif args.addresses:
+        lo, hi = _range(args.addresses)
+        dumps, addresses, values = index.range(lo, hi + 1, keep)
+    else:
+        dumps, addresses, values = index.ranges([(0, 1 << 32)], keep)
+    flips = popcount(index.flips(dumps, values))
+    found = np.bincount(dumps, minlength=len(index.datasets))
+    bits = np.bincount(dumps, flips, minlength=len(index.datasets))
+    for d in keep:
+        ds = index.datasets[d]
+        refresh = f"{ds['refresh_us']:g}us" if ds['refresh_us'] else '-'
+        print(f"{refresh:>8} {ds['direction']:9} {found[d]:>7} words "
+              f"{int(bits[d]):>8} bits  {ds['name']}")
+        if args.list:
+            for i in np.flatnonzero(dumps == d):
+                print(f'    0x{addresses[i]:06X} = 0x{values[i]:04X}')
+    print(f'{len(addresses)} error words in {len(keep)} dumps')
+
+
+def cmd_march(args):
+    from .march import MemoryModel, UartTarget, inject_random_faults, run_march
+
+    backgrounds = tuple(args.background or [0x0000])
+    if args.port:
+        from .host import Client, open_serial
+        target = UartTarget(Client(open_serial(args.port, args.baud),
+                                   window=args.window))
+    else:
+        target = MemoryModel(args.stop)
+        if args.inject:
+            inject_random_faults(target, args.inject, args.start, args.stop,
+                                 args.seed)
+    started = time.monotonic()
+    result = run_march(target, args.algorithm, args.start, args.stop,
+                       backgrounds)
+    elapsed = time.monotonic() - started
+    print(f'{result.algorithm} over 0x{args.start:X}-0x{args.stop:X}, '
+          f'backgrounds {", ".join(f"0x{b:04X}" for b in backgrounds)}: '
+          f'{result.errors} failing reads in {len(result.addresses)} words '
+          f'({elapsed:.1f}s)')
+    faults = result.faults
+    for cls, count in sorted(result.summary().items()):
+        print(f'  {cls:18} {count}')
+    if args.list:
+        for a, b, c, d in zip(faults['address'], faults['bit'],
+                              faults['class'], faults['candidates']):
+            bit = 'word' if b < 0 else f'bit {b}'
+            print(f'    0x{a:06X} {bit:7} {c:18} {d}')
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(_jsonable(result.as_dict()), f, indent=2)
+    return 1 if len(result.addresses) else 0
+
+
+def _patterns(text):
+    return [_int(p) for p in text.split(',')]
+
+
+def cmd_campaign(args):
+    from .host import Client, open_serial
+    from .patterns import pattern_campaign
+
+    client = Client(open_serial(args.port, args.baud), window=args.window)
+    pattern_campaign(
+        client, args.output, args.patterns, args.start, args.stop,
+        args.wait, refresh_us=parse_refresh(args.refresh) if args.refresh
+        else None, direction=args.direction, board=args.board,
+        temperature_c=args.temperature, voltage_v=args.voltage)
+    print(client.metrics.summary())
+
+
+def cmd_ber(args):
+    from .patterns import pattern_ber, plot_pattern_ber
+
+    rows = pattern_ber(_selected(args), partial(run_parallel, jobs=args.jobs))
+    print(f'{"pattern":>8} {"runs":>4} {"BER":>10} {"1->0 /1":>10} '
+          f'{"0->1 /0":>10}')
+    for row in rows:
+        down, up = row['ber_one_to_zero'], row['ber_zero_to_one']
+        print(f"  0x{row['pattern']:04X} {row['runs']:>4} {row['ber']:>10.3e} "
+              f"{'-' if down is None else f'{down:.3e}':>10} "
+              f"{'-' if up is None else f'{up:.3e}':>10}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(_jsonable(rows), f, indent=2)
+    if args.plot:
+        save(plot_pattern_ber(rows, figure('patterns', (8, 5)).add_subplot())
+             .figure, args.plot)
+
+
+def cmd_bch(args):
+    from .bch import BCH, bch_dataset
+
+    code = BCH(6, args.t)
+    results = run_parallel(partial(bch_dataset, code=code), _selected(args),
+                           args.jobs)
+    print(f'{code}: {"raw BER":>10} {"residual":>10} {"corrected":>9} '
+          f'{"uncorr.":>8} {"miscorr.":>8}  capture')
+    for r in results:
+        print(f"{' ' * len(repr(code))}  {r['raw_ber']:>10.3e} "
+              f"{r['residual_ber']:>10.3e} {r['corrected']:>9} "
+              f"{r['uncorrectable']:>8} {r['miscorrected']:>8}  "
+              f"{r['dataset']['name']}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(_jsonable(results), f, indent=2)
+
+
+def cmd_ecc(args):
+    from .ecc import CODES, Interleaving, combine, evaluate_dataset
+
+    codes = [CODES[name]() for name in args.code or CODES]
+    layouts = [Interleaving.parse(text) for text in args.interleave or ['1x1']]
+    per_dataset = run_parallel(
+        partial(evaluate_dataset, codes=codes, interleavings=layouts),
+        _selected(args), args.jobs)
+    rows = combine(r for results in per_dataset for r in results)
+    print(f'{"code":14} {"layout":>6} {"dumps":>5} {"raw BER":>10} '
+          f'{"residual":>10} {"uncorr./cw":>10} {"miscorr./cw":>11}')
+    for row in rows:
+        print(f"{row['code']:14} {row['interleaving']:>6} {row['dumps']:>5} "
+              f"{row['raw_ber']:>10.3e} {row['residual_ber']:>10.3e} "
+              f"{row['uncorrectable_rate']:>10.3e} "
+              f"{row['miscorrected_rate']:>11.3e}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(_jsonable({'pooled': rows, 'datasets': per_dataset}),
+                      f, indent=2)
+
+
+def _condition(entry):
+    parts = [f"{entry.get('board') or '-':>8}", f"{entry['direction']:9}"]
+    for key, unit in (('temperature_c', 'C'), ('voltage_v', 'V')):
+        value = entry.get(key)
+        if not isinstance(value, list):
+            parts.append(f'{value:>6g}{unit}' if value is not None
+                         else f'{"-":>7}')
+    return ' '.join(parts)
+
+
+def _estimate(value, se, fmt):
+    if value is None:
+        return '-'
+    return f'{value:{fmt}} ± {se:{fmt}}' if se is not None else \
+        f'{value:{fmt}}'
+
+
+def cmd_retention(args):
+    from .retention import fit_retention, plot_retention, plot_stress
+
+    model = fit_retention(_selected(args),
+                          partial(run_parallel, jobs=args.jobs), _cache(args))
+    print('log-normal retention (ln µs) per condition:')
+    for c in model['conditions']:
+        periods = ','.join(f'{t:g}' for t in c['refresh_us'])
+        print(f"  {_condition(c)}  mu {_estimate(c['mu'], c['mu_se'], '.3f'):>17}"
+              f"  sigma {_estimate(c['sigma'], c['sigma_se'], '.3f'):>15}"
+              f"  ({periods} µs, {c['captures']} captures)")
+    for title, fits, key, unit in (
+            ('Arrhenius', model['arrhenius'], 'activation_ev', 'eV'),
+            ('voltage', model['voltage'], 'beta_per_v', 'ln µs / V')):
+        if fits:
+            print(f'{title} fits:')
+        for f in fits:
+            print(f"  {_condition(f)}  "
+                  f"{_estimate(f[key], f[key + '_se'], '.4f')} {unit}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(_jsonable(model), f, indent=2)
+    if args.plot:
+        fig = figure('retention', (18, 5))
+        plot_retention(model, fig.add_subplot(1, 3, 1))
+        plot_stress(model, args.at, fig.add_subplot(1, 3, 2),
+                    fig.add_subplot(1, 3, 3))
+        save(fig, args.plot)
+
+
+def cmd_list(args):
+    for ds in _selected(args):
+        refresh = f'{ds.refresh_us:g}us' if ds.refresh_us else '-'
+        print(f'{ds.kind:6} {ds.direction:9} {refresh:8} {ds.name}')
+
+
+def _add_selection(parser):
+    parser.add_argument('paths', nargs='*', default=['.'],
+                        help='files or directories to search for captures')
+    parser.add_argument('--refresh', action='append',
+                        help='refresh period, e.g. 62.5us (repeatable)')
+    parser.add_argument('--direction', choices=('forward', 'backward'))
+    parser.add_argument('--kind', choices=('test', 'dump', 'store', 'diff'))
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='worker processes (default: all cores)')
+
+
+def _add_cache(parser):
+    parser.add_argument('--cache-dir', default=DEFAULT_DIR,
+                        help='result cache directory (default: %(default)s)')
+    parser.add_argument('--cache-size', type=int,
+                        default=DEFAULT_MAX_BYTES >> 20,
+                        help='cache size limit in MiB (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='recompute everything and leave the cache alone')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='remanence',
+        description='SDRAM data-remanence capture analysis')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('list', help='show the captures that were found')
+    _add_selection(p)
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser('analyze', help='bit-flip statistics per capture')
+    _add_selection(p)
+    _add_cache(p)
+    p.add_argument('--json', help='also write the summaries to this file')
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser('sweep',
+                       help='bit flip percentage per refresh period with '
+                            'bootstrap confidence intervals')
+    _add_selection(p)
+    _add_cache(p)
+    p.add_argument('--boot', type=int, default=N_BOOT,
+                   help='bootstrap replicates (default: %(default)s)')
+    p.add_argument('--confidence', type=float, default=0.95)
+    p.add_argument('--json', help='also write the sweep table to this file')
+    p.add_argument('--plot', help='save the sweep figure to this PNG')
+    p.set_defaults(func=cmd_sweep)
+
+    p = sub.add_parser('render',
+                       help='write all figures for all captures (headless)')
+    _add_selection(p)
+    _add_cache(p)
+    p.add_argument('-o', '--output', default='figures',
+                   help='output directory (default: %(default)s)')
+    p.add_argument('--figure', action='append', choices=sorted(TEMPLATES),
+                   help='only these figures (repeatable; default: all)')
+    p.add_argument('--dpi', type=int, default=300)
+    p.add_argument('--no-sweep', action='store_true',
+                   help='skip the refresh-sweep figure')
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser('simulate',
+                       help='serve a simulated chip on a pty, or write a '
+                            'simulated full-chip dump')
+    p.add_argument('--refresh', default='15.6us')
+    p.add_argument('--temperature', type=float, default=25.0,
+                   help='chip temperature in C (default: %(default)s)')
+    p.add_argument('--pattern', type=_int, default=0xFFFF)
+    p.add_argument('--drop-rate', type=float, default=0.0,
+                   help='fraction of command frames to lose')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--dump', help='write one decayed image to this .rdump')
+    p.set_defaults(func=cmd_simulate)
+
+    p = sub.add_parser('acquire', help='read a dump from the board into '
+                                       'an .rdump store')
+    p.add_argument('port', help='serial port (or pty) of the board')
+    p.add_argument('output', help='.rdump file to create or fill')
+    p.add_argument('--start', type=_int, default=0)
+    p.add_argument('--stop', type=_int, default=0x400000,
+                   help='first address not read (default: full chip)')
+    p.add_argument('--word', action='store_true',
+                   help='single-word R commands instead of block reads')
+    p.add_argument('--window', type=int, default=32,
+                   help='commands in flight in --word mode')
+    p.add_argument('--baud', type=int, default=115200)
+    p.add_argument('--refresh', help='refresh period, recorded in metadata')
+    p.add_argument('--direction', default='forward',
+                   choices=('forward', 'backward'))
+    p.add_argument('--pattern', type=_int, default=0xFFFF)
+    p.add_argument('--board')
+    p.add_argument('--temperature', type=float,
+                   help='measured chip temperature in °C, recorded in '
+                        'metadata')
+    p.add_argument('--voltage', type=float,
+                   help='measured supply voltage in V, recorded in metadata')
+    p.add_argument('--resume', action='store_true',
+                   help='re-read only the blocks missing from an interrupted '
+                        'run (uses OUTPUT.ckpt, or the store\'s valid bits)')
+    p.add_argument('--force', action='store_true',
+                   help='replace an existing OUTPUT with a new, empty store')
+    p.add_argument('--checkpoint-every', type=float, default=5.0,
+                   help='seconds between progress checkpoints')
+    p.add_argument('--timeout', type=float, default=CMD_TIMEOUT,
+                   help='seconds to wait for an ack before resending')
+    p.add_argument('--metrics', help='where to write the run\'s latency/'
+                                     'retry/CRC metrics (default: '
+                                     'OUTPUT.metrics.json)')
+    p.set_defaults(func=cmd_acquire)
+
+    p = sub.add_parser('capture',
+                       help='record the board\'s serial output to a log '
+                            '(and store) until Ctrl-C')
+    p.add_argument('port')
+    p.add_argument('log', help='text log to append to')
+    p.add_argument('--store', help='also write parsed entries to this .rdump')
+    p.add_argument('--words', type=_int, default=0x400000,
+                   help='size of a newly created --store')
+    p.add_argument('--baud', type=int, default=115200)
+    p.add_argument('--duration', type=float, help='stop after this many s')
+    p.add_argument('--report', type=float, default=5.0,
+                   help='seconds between throughput reports')
+    p.set_defaults(func=cmd_capture)
+
+    p = sub.add_parser('orchestrate',
+                       help='acquire on several rigs in parallel from a '
+                            'campaign plan')
+    p.add_argument('plan', help='JSON plan listing board/port/refresh jobs')
+    p.add_argument('-n', '--dry-run', action='store_true',
+                   help='show which jobs run on which port and exit')
+    p.set_defaults(func=cmd_orchestrate)
+
+    p = sub.add_parser('march', help='March test with fault classification, '
+                                     'on the board or an in-memory model')
+    p.add_argument('--port', help='serial port of the board (default: run '
+                                  'on an in-memory model)')
+    p.add_argument('-a', '--algorithm', default='march-c-',
+                   help='mats+, march-c-, march-b, march-ss or a sequence '
+                        'such as "any(w0); up(r0,w1); down(r1,w0)"')
+    p.add_argument('--start', type=_int, default=0)
+    p.add_argument('--stop', type=_int, default=0xA00,
+                   help='first address not tested (default: %(default)#x)')
+    p.add_argument('--background', type=_int, action='append',
+                   help='data background, repeatable (default: 0x0000)')
+    p.add_argument('--inject', type=int, default=0,
+                   help='random faults to put in the in-memory model')
+    p.add_argument('--seed', type=int, default=0)
+    p.add_argument('--window', type=int, default=1,
+                   help='commands in flight; above 1 an element whose '
+                        'commands had to be resent aborts the run '
+                        '(default: %(default)s, strict order)')
+    p.add_argument('--baud', type=int, default=115200)
+    p.add_argument('--list', action='store_true',
+                   help='print every classified fault')
+    p.add_argument('--json', help='write the result to this file')
+    p.set_defaults(func=cmd_march)
+
+    p = sub.add_parser('campaign', help='write each data pattern for real '
+                                        'and dump it, one .rdump per pattern')
+    p.add_argument('port')
+    p.add_argument('output', help='directory for the per-pattern dumps')
+    p.add_argument('--patterns', type=_patterns,
+                   default=[0xFFFF, 0x0000, 0xAAAA, 0x5555],
+                   help='comma-separated (default: 0xFFFF,0x0000,0xAAAA,'
+                        '0x5555)')
+    p.add_argument('--start', type=_int, default=0)
+    p.add_argument('--stop', type=_int, default=0xA00)
+    p.add_argument('--wait', type=float, default=0.0,
+                   help='seconds between writing a pattern and dumping it')
+    p.add_argument('--window', type=int, default=32)
+    p.add_argument('--baud', type=int, default=115200)
+    p.add_argument('--refresh', help='refresh period, recorded in metadata')
+    p.add_argument('--direction', default='forward',
+                   choices=('forward', 'backward'))
+    p.add_argument('--board')
+    p.add_argument('--temperature', type=float,
+                   help='measured chip temperature in °C, recorded in '
+                        'metadata')
+    p.add_argument('--voltage', type=float,
+                   help='measured supply voltage in V, recorded in metadata')
+    p.set_defaults(func=cmd_campaign)
+
+    p = sub.add_parser('ber', help='measured BER per data pattern')
+    _add_selection(p)
+    p.add_argument('--json', help='write the per-pattern rows to this file')
+    p.add_argument('--plot', help='save a bar chart to this image file')
+    p.set_defaults(func=cmd_ber)
+
+    p = sub.add_parser('bch', help='raw and residual BER after decoding '
+                                   'each capture with BCH(63,k)')
+    _add_selection(p)
+    p.add_argument('-t', type=int, default=3,
+                   help='correctable bits per codeword (default: 3, '
+                        'i.e. BCH(63,45))')
+    p.add_argument('--json', help='write the per-capture results here')
+    p.set_defaults(func=cmd_bch)
+
+    p = sub.add_parser('ecc', help='replay the measured errors through '
+                                   'SECDED, BCH and RS codes under '
+                                   'interleaving')
+    _add_selection(p)
+    p.add_argument('--code', action='append', choices=('secded', 'bch', 'rs'),
+                   help='code to evaluate, repeatable (default: all)')
+    p.add_argument('--interleave', action='append',
+                   help='ROWSxCOLS interleaving depth, repeatable, e.g. 1x16 '
+                        '(default: 1x1)')
+    p.add_argument('--json', help='write pooled and per-capture results here')
+    p.set_defaults(func=cmd_ecc)
+
+    p = sub.add_parser('retention', help='fit log-normal retention per '
+                                         'condition, Arrhenius and voltage '
+                                         'models across conditions')
+    _add_selection(p)
+    _add_cache(p)
+    p.add_argument('--json', help='write the fitted models to this file')
+    p.add_argument('--plot', help='save the fits and stress curves here')
+    p.add_argument('--at', type=parse_refresh, default=15.6,
+                   help='refresh period of the stress curves '
+                        '(default: %(default)s us)')
+    p.set_defaults(func=cmd_retention)
+
+    p = sub.add_parser('encode', help='convert a log or .rdump to a '
+                                      'compact sparse-diff .rdiff')
+    p.add_argument('input')
+    p.add_argument('output')
+    p.add_argument('--pattern', type=_int,
+                   help='written pattern (default: from the capture)')
+    p.set_defaults(func=cmd_encode)
+
+    p = sub.add_parser('decode', help='expand an .rdiff into a dense .rdump')
+    p.add_argument('input')
+    p.add_argument('output')
+    p.set_defaults(func=cmd_decode)
+
+    p = sub.add_parser('query', help='error words in an address or row '
+                                     'range across many captures')
+    _add_selection(p)
+    where = p.add_mutually_exclusive_group()
+    where.add_argument('--rows', help='inclusive row range, e.g. 6-7')
+    where.add_argument('--addresses',
+                       help='inclusive address range, e.g. 0x1800-0x1FFF')
+    p.add_argument('--bank', type=int, help='restrict --rows to one bank')
+    p.add_argument('--index', help='sparse index file (.npz) to load, or to '
+                                   'build and save if it does not exist')
+    p.add_argument('--list', action='store_true',
+                   help='print every matching word')
+    p.set_defaults(func=cmd_query)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,198 @@
+"""Discovery of the captures in the repository tree.
+
+Recognised layouts:
+
+    Test/{Forward,Backward}/<period>us/data.txt
+    Test/{Forward,Backward}/<period>us/transcribed.txt  (if no data.txt)
+    [Backward ]DUMP<n>/SDRAM_Data_Remanence_DUMP_<n>_<pattern>_0x<end>.txt
+    *.rdump, *.rdiff                            (metadata from the header)
+
+Test conditions (temperature_c, voltage_v, board, ...) come from the
+capture's own metadata, or else from the nearest `conditions.json` in its
+directory or a parent directory below the search root, e.g.
+
+    {"temperature_c": 45.0, "voltage_v": 3.3, "board": "rig1"}
+"""
+
+import json
+import os
+import re
+
+from .geometry import DUMP_END, DUMP_START
+from .sparsediff import is_diff_file, load_diff
+from .store import is_dump_store, open_dump_store
+
+DEFAULT_PATTERN = 0xFFFF
+
+_PERIOD_DIR = re.compile(r'^(\d+(?:\.\d+)?)us$')
+_DUMP_NAME = re.compile(r'_DUMP_(\d+)_([0-9a-fA-F]{4})_0x([0-9a-fA-F]+)\.txt$')
+
+# Refresh period of the DUMP captures by directory, as stated in each
+# directory's script (DUMP1 states none, so its period stays unknown)
+DUMP_REFRESH_US = {
+    'DUMP2': 15.6,
+    'Backward DUMP1': 7.8,
+    'Backward DUMP2': 7.8,
+}
+
+CONDITIONS_NAME = 'conditions.json'
+
+# Entries copied out of a script's old hard-coded list, for runs whose
+# serial log was never kept; a real data.txt always takes precedence
+TRANSCRIBED_NAME = 'transcribed.txt'
+
+
+class Dataset:
+    """One capture plus the conditions it was taken under."""
+
+    def __init__(self, path, kind, direction, refresh_us=None,
+                 pattern=DEFAULT_PATTERN, start=DUMP_START, end=DUMP_END,
+                 name=None, temperature_c=None, voltage_v=None, **meta):
+        self.path = path
+        self.kind = kind            # 'test', 'dump', 'store' or 'diff'
+        self.direction = direction  # 'forward' or 'backward'
+        self.refresh_us = refresh_us
+        self.pattern = pattern
+        self.start = start
+        self.end = end
+        self.name = name or path
+        self.temperature_c = temperature_c  # measured case temperature
+        self.voltage_v = voltage_v          # measured supply voltage
+        self.meta = meta
+
+    def __repr__(self):
+        return f'Dataset({self.name!r}, refresh_us={self.refresh_us})'
+
+    @property
+    def total_words(self):
+        return self.end - self.start + 1
+
+    def as_dict(self):
+        return dict(self.meta, path=self.path, kind=self.kind,
+                    direction=self.direction, refresh_us=self.refresh_us,
+                    pattern=self.pattern, start=self.start, end=self.end,
+                    name=self.name, temperature_c=self.temperature_c,
+                    voltage_v=self.voltage_v)
+
+
+def _direction(path):
+    parts = [p.lower() for p in os.path.normpath(path).split(os.sep)]
+    return 'backward' if any(p.startswith('backward') for p in parts) \
+        else 'forward'
+
+
+def _conditions(path, root):
+    # Merged conditions.json files from root down to the capture's
+    # directory; nearer files win
+    directory = os.path.dirname(os.path.abspath(path))
+    stop = os.path.abspath(root if os.path.isdir(root)
+                           else os.path.dirname(root) or '.')
+    found = []
+    while True:
+        candidate = os.path.join(directory, CONDITIONS_NAME)
+        if os.path.isfile(candidate):
+            with open(candidate) as f:
+                found.append(json.load(f))
+        parent = os.path.dirname(directory)
+        if directory == stop or parent == directory:
+            break
+        directory = parent
+    conditions = {}
+    for entry in reversed(found):
+        conditions.update(entry)
+    return conditions
+
+
+def _classify(path, root):
+    dataset = _identify(path, root)
+    if dataset is not None:
+        for key, value in _conditions(path, root).items():
+            if key in ('temperature_c', 'voltage_v'):
+                if getattr(dataset, key) is None:
+                    setattr(dataset, key, value)
+            else:
+                dataset.meta.setdefault(key, value)
+    return dataset
+
+
+def _identify(path, root):
+    name = os.path.relpath(path, root)
+    base = os.path.basename(path)
+    if base.endswith('.rdump') and is_dump_store(path):
+        meta = dict(open_dump_store(path).meta)
+        start = meta.pop('base')
+        end = start + meta.pop('words') - 1
+        pattern = meta.pop('pattern', None)
+        return Dataset(path, 'store', meta.pop('direction', None) or
+                       _direction(name), meta.pop('refresh_us', None),
+                       DEFAULT_PATTERN if pattern is None else pattern,
+                       start, end, name, **meta)
+    if base.endswith('.rdiff') and is_diff_file(path):
+        diff = load_diff(path)
+        meta = dict(diff.meta)
+        start, stop = diff.span or (0, 0)
+        return Dataset(path, 'diff', meta.pop('direction', None) or
+                       _direction(name), meta.pop('refresh_us', None),
+                       diff.pattern, start, stop - 1, name, **meta)
+    transcribed = base == TRANSCRIBED_NAME and not os.path.isfile(
+        os.path.join(os.path.dirname(path), 'data.txt'))
+    if base == 'data.txt' or transcribed:
+        match = _PERIOD_DIR.match(os.path.basename(os.path.dirname(path)))
+        if match:
+            meta = {'transcribed': True} if transcribed else {}
+            return Dataset(path, 'test', _direction(name),
+                           float(match.group(1)), name=name, **meta)
+    match = _DUMP_NAME.search(base)
+    if match:
+        folder = os.path.basename(os.path.dirname(os.path.abspath(path)))
+        return Dataset(path, 'dump', _direction(name),
+                       DUMP_REFRESH_US.get(folder),
+                       int(match.group(2), 16), DUMP_START,
+                       int(match.group(3), 16), name,
+                       dump=int(match.group(1)))
+    return None
+
+
+def discover(*roots):
+    """Find every recognised capture under the given files/directories."""
+    found = []
+    for root in roots or ('.',):
+        if os.path.isfile(root):
+            dataset = _classify(root, os.path.dirname(root) or '.')
+            if dataset is not None:
+                found.append(dataset)
+            continue
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith('.'))
+            for filename in sorted(filenames):
+                dataset = _classify(os.path.join(dirpath, filename), root)
+                if dataset is not None:
+                    found.append(dataset)
+    return found
+
+
+def parse_refresh(text):
+    """'62.5us', '62.5 µs' or '62.5' -> 62.5"""
+    text = text.strip().lower().replace('µs', '').replace('us', '')
+    return float(text)
+
+
+def select(datasets, refresh=None, direction=None, kind=None):
+    """Filter datasets by refresh period(s), scan direction and kind."""
+    if refresh:
+        periods = {parse_refresh(r) for r in refresh}
+        datasets = [d for d in datasets if d.refresh_us in periods]
+    if direction:
+        datasets = [d for d in datasets if d.direction == direction]
+    if kind:
+        datasets = [d for d in datasets if d.kind == kind]
+    return datasets
+
+
+def select_dicts(descriptions, refresh=None, direction=None, kind=None):
+    """Indices of Dataset.as_dict() entries passing the select() filters."""
+    periods = {parse_refresh(r) for r in refresh} if refresh else None
+    return [i for i, d in enumerate(descriptions)
+            if (periods is None or d['refresh_us'] in periods)
+            and (not direction or d['direction'] == direction)
+            and (not kind or d['kind'] == kind)]
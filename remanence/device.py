@@ -0,0 +1,133 @@
+"""Local stand-in for the FPGA end of the UART link.
+
+ArrayDevice answers the protocol.py command frames from a NumPy word
+array, and PtyServer exposes any such device on a pseudo-terminal so host
+code can open it exactly like the real serial port:
+
+    with PtyServer(ArrayDevice()) as server:
+        client = Client(open_serial(server.path))
+"""
+
+import os
+import select
+import threading
+import tty
+
+import numpy as np
+
+from .geometry import CHIP_WORDS
+from .protocol import (CHUNK_WORDS, CMD_BLOCK, CMD_READ, CMD_WRITE,
+                       FRAME_SIZE, FrameError, decode_command, encode_ack,
+                       encode_chunks, encode_word)
+
+
+class ArrayDevice:
+    """SDRAM stand-in holding one uint16 per address.
+
+    `drop_rate` silently discards that fraction of otherwise valid
+    commands, the way a frame corrupted on the wire would be lost, and
+    `corrupt_rate` flips a byte in that fraction of block-read chunks, so
+    retry paths can be exercised.
+    """
+
+    def __init__(self, words=CHIP_WORDS, fill=0xFFFF, drop_rate=0.0,
+                 seed=0, corrupt_rate=0.0):
+        self.memory = np.full(words, fill, dtype=np.uint16)
+        self.drop_rate = drop_rate
+        self.corrupt_rate = corrupt_rate
+        self.rng = np.random.default_rng(seed)
+        self._pending = bytearray()
+
+    def read_word(self, addr):
+        return int(self.memory[addr % len(self.memory)])
+
+    def read_block(self, start, count):
+        index = np.arange(start, start + count, dtype=np.int64) % len(self.memory)
+        return self.memory[index]
+
+    def write_word(self, addr, value):
+        self.memory[addr % len(self.memory)] = value
+
+    def handle(self, cmd, addr, data, seq):
+        """Response bytes for one valid command (empty to ignore it)."""
+        if cmd == CMD_WRITE:
+            self.write_word(addr, data)
+            return encode_ack(cmd, seq)
+        if cmd == CMD_READ:
+            return encode_ack(cmd, seq) + encode_word(self.read_word(addr))
+        if cmd == CMD_BLOCK:
+            chunks = encode_chunks(addr, self.read_block(addr, data * CHUNK_WORDS))
+            if self.corrupt_rate:
+                bad = np.flatnonzero(self.rng.random(len(chunks))
+                                     < self.corrupt_rate)
+                chunks[bad, 4] ^= 0x01
+            return encode_ack(cmd, seq) + chunks.tobytes()
+        return b''
+
+    def feed(self, data):
+        """Consume raw bytes from the host, return bytes to send back.
+
+        Frames failing their CRC are skipped one byte at a time until the
+        stream lines up on a valid frame again.
+        """
+        self._pending += data
+        out = bytearray()
+        while len(self._pending) >= FRAME_SIZE:
+            frame = bytes(self._pending[:FRAME_SIZE])
+            try:
+                command = decode_command(frame)
+            except FrameError:
+                del self._pending[0]
+                continue
+            del self._pending[:FRAME_SIZE]
+            if self.drop_rate and self.rng.random() < self.drop_rate:
+                continue
+            out += self.handle(*command)
+        return bytes(out)
+
+
+class PtyServer:
+    """Serve a device on a pseudo-terminal from a background thread."""
+
+    def __init__(self, device):
+        self.device = device
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.path = os.ttyname(self.slave)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        while not self._stop.is_set():
+            ready, _, _ = select.select([self.master], [], [], 0.05)
+            if not ready:
+                continue
+            try:
+                data = os.read(self.master, 1 << 16)
+            except OSError:
+                break
+            reply = self.device.feed(data)
+            while reply:
+                written = os.write(self.master, reply)
+                reply = reply[written:]
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
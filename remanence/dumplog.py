@@ -0,0 +1,252 @@
+"""Streaming parser for the serial dump logs.
+
+Handles the Serial Monitor captures (`SDRAM_Data_Remanence_DUMP_*.txt`) as
+well as the bare `Test/*/*/data.txt` files. Entry lines look like either
+
+    [0x62F] = 0xFE5B
+    (0x62F, 0xFE5B),
+
+with any number of blanks around the `=` or after the `,` (the logs have
+the odd hand-edited `[0x579] =0x0`), and may be wrapped in
+`BEGIN DUMP (0x0000-0x09FF)` / `END DUMP` framing next to banner text and a
+`March Test Complete. Errors: N` line.
+
+The file is memory-mapped and scanned in newline-aligned chunks with NumPy;
+there is no per-line Python work, so a multi-GB capture parses at roughly
+disk speed.
+"""
+
+import mmap
+import os
+
+import numpy as np
+
+CHUNK_SIZE = 1 << 24
+
+# Hex digit value for every byte, 0xFF for anything that isn't a hex digit
+_HEX = np.full(256, 0xFF, dtype=np.uint8)
+for _i, _c in enumerate(b'0123456789ABCDEF'):
+    _HEX[_c] = _i
+    _HEX[bytes([_c]).lower()[0]] = _i
+
+ADDR_DIGITS = 6   # 24-bit address field of the UART command
+VALUE_DIGITS = 4  # 16-bit data word
+
+# Longest run of blanks skipped around a separator
+MAX_BLANKS = 8
+
+
+class DumpLog:
+    """Entries of one capture as compact arrays, in capture order."""
+
+    def __init__(self, addresses, values, start=None, end=None, errors=None,
+                 path=None):
+        self.addresses = addresses  # uint32
+        self.values = values        # uint16
+        self.start = start          # first address of the framed range
+        self.end = end              # last address of the framed range
+        self.errors = errors        # from "Errors: N", if present
+        self.path = path
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __repr__(self):
+        return (f'DumpLog({self.path!r}, entries={len(self)}, '
+                f'range={self.address_range}, errors={self.errors})')
+
+    @property
+    def descending(self):
+        """True for backward scans (`BEGIN DUMP (0x09FF-0x0000)`)."""
+        if self.start is not None and self.end is not None:
+            return self.start > self.end
+        return len(self) > 1 and self.addresses[0] > self.addresses[-1]
+
+    @property
+    def address_range(self):
+        """Inclusive (low, high) address range covered by the capture."""
+        if self.start is not None and self.end is not None:
+            return min(self.start, self.end), max(self.start, self.end)
+        if len(self) == 0:
+            return None
+        return int(self.addresses.min()), int(self.addresses.max())
+
+    def sorted(self):
+        """Copy of the log with entries in ascending address order."""
+        order = np.argsort(self.addresses, kind='stable')
+        return DumpLog(self.addresses[order], self.values[order], self.start,
+                       self.end, self.errors, self.path)
+
+
+def _parse_hex(buf, pos, max_digits):
+    # Vectorized hex scan starting at every offset in pos. Returns the values,
+    # the number of digits consumed and the offset just past the digits.
+    n = len(buf)
+    value = np.zeros(len(pos), dtype=np.uint32)
+    ndigits = np.zeros(len(pos), dtype=np.int64)
+    running = np.ones(len(pos), dtype=bool)
+    for k in range(max_digits + 1):
+        idx = pos + k
+        inside = idx < n
+        digit = _HEX[buf[np.minimum(idx, n - 1)]]
+        ok = running & inside & (digit != 0xFF)
+        value = np.where(ok, (value << 4) | digit, value)
+        ndigits += ok
+        running = ok
+    # A run still going after max_digits is too long for the field
+    too_long = running
+    return value, ndigits, ~too_long & (ndigits > 0)
+
+
+def _skip_blanks(buf, pos):
+    # Advance every offset in pos past up to MAX_BLANKS spaces or tabs
+    n = len(buf)
+    for _ in range(MAX_BLANKS):
+        byte = buf[np.minimum(pos, n - 1)]
+        blank = (pos < n) & ((byte == ord(' ')) | (byte == ord('\t')))
+        if not blank.any():
+            break
+        pos = pos + blank
+    return pos
+
+
+def _match(buf, pos, pattern):
+    n = len(buf)
+    ok = np.ones(len(pos), dtype=bool)
+    for k, byte in enumerate(pattern):
+        idx = pos + k
+        ok &= (idx < n) & (buf[np.minimum(idx, n - 1)] == byte)
+    return ok
+
+
+def _scan_chunk(buf):
+    """Return (offsets, addresses, values) for every entry line in buf."""
+    if len(buf) < 3:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty.astype(np.uint32), empty.astype(np.uint16)
+
+    opens = np.flatnonzero((buf[:-2] == ord('[')) | (buf[:-2] == ord('(')))
+    opens = opens[(buf[opens + 1] == ord('0'))
+                  & ((buf[opens + 2] | 0x20) == ord('x'))]
+
+    addr, ndig, ok = _parse_hex(buf, opens + 3, ADDR_DIGITS)
+    after = opens + 3 + ndig
+
+    # "] = 0x" or ", 0x", blanks optional
+    bracket = (buf[opens] == ord('[')) & _match(buf, after, b']')
+    sep = _skip_blanks(buf, after + bracket)
+    bracket &= _match(buf, sep, b'=')
+    tuple_ = (buf[opens] == ord('(')) & _match(buf, sep, b',')
+    value_pos = _skip_blanks(buf, sep + 1)
+    ok &= (bracket | tuple_) & _match(buf, value_pos, b'0') \
+        & _match(buf, value_pos + 1, b'x')
+    value_pos += 2
+
+    value, _, value_ok = _parse_hex(buf, value_pos, VALUE_DIGITS)
+    ok &= value_ok
+
+    return opens[ok], addr[ok], value[ok].astype(np.uint16)
+
+
+def parse_entries(data):
+    """(addresses, values) of the complete entry lines in a bytes buffer."""
+    _, addresses, values = _scan_chunk(np.frombuffer(data, dtype=np.uint8))
+    return addresses, values
+
+
+def _frames(mm):
+    """(begin, end, start_addr, end_addr) byte spans of each framed dump."""
+    frames = []
+    pos = 0
+    while True:
+        begin = mm.find(b'BEGIN DUMP', pos)
+        if begin < 0:
+            begin = mm.find(b'Dumping', pos)
+            if begin < 0:
+                break
+        line_end = mm.find(b'\n', begin)
+        if line_end < 0:
+            line_end = len(mm)
+        header = mm[begin:line_end]
+        start = end = None
+        lo = header.find(b'(0x')
+        hi = header.find(b'-0x', lo)
+        if lo >= 0 and hi >= 0:
+            start = int(header[lo + 1:hi], 16)
+            end = int(header[hi + 1:header.find(b')', hi)], 16)
+        stop = len(mm)
+        for marker in (b'END DUMP', b'Dump complete'):
+            found = mm.find(marker, line_end)
+            if 0 <= found < stop:
+                stop = found
+        frames.append((line_end, stop, start, end))
+        pos = stop
+    return frames
+
+
+def _errors(mm):
+    # Last "Errors: N" count reported by the March test, if any
+    errors = None
+    pos = 0
+    while True:
+        found = mm.find(b'Errors:', pos)
+        if found < 0:
+            return errors
+        line_end = mm.find(b'\n', found)
+        if line_end < 0:
+            line_end = len(mm)
+        digits = mm[found + len(b'Errors:'):line_end].strip()
+        if digits.isdigit():
+            errors = int(digits)
+        pos = line_end
+
+
+def load_dump_log(path, chunk_size=CHUNK_SIZE):
+    """Parse a dump log into a DumpLog.
+
+    When the log contains `BEGIN DUMP` / `END DUMP` framing, only entries
+    inside the frames are kept; otherwise every entry line is.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return DumpLog(np.empty(0, np.uint32), np.empty(0, np.uint16),
+                       path=path)
+
+    with open(path, 'rb') as f, \
+            mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        frames = _frames(mm)
+        errors = _errors(mm)
+
+        offsets, addresses, values = [], [], []
+        pos = 0
+        while pos < size:
+            stop = min(pos + chunk_size, size)
+            if stop < size:
+                # Keep lines whole; a chunk without a newline runs on
+                newline = mm.rfind(b'\n', pos, stop)
+                if newline >= 0:
+                    stop = newline + 1
+            buf = np.frombuffer(mm, dtype=np.uint8, count=stop - pos,
+                                offset=pos)
+            off, addr, val = _scan_chunk(buf)
+            offsets.append(off + pos)
+            addresses.append(addr)
+            values.append(val)
+            del buf
+            pos = stop
+
+    offsets = np.concatenate(offsets)
+    addresses = np.concatenate(addresses).astype(np.uint32, copy=False)
+    values = np.concatenate(values)
+
+    start = end = None
+    if frames:
+        keep = np.zeros(len(offsets), dtype=bool)
+        for begin, stop, _, _ in frames:
+            keep |= (offsets >= begin) & (offsets < stop)
+        addresses, values = addresses[keep], values[keep]
+        bounds = [(s, e) for _, _, s, e in frames if s is not None]
+        if bounds:
+            start, end = bounds[0][0], bounds[-1][1]
+
+    return DumpLog(addresses, values, start, end, errors, path)
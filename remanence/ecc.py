@@ -0,0 +1,258 @@
+"""Replay measured error maps through ECC codes under interleaving.
+
+The 125 µs captures fail in long contiguous runs (0x686-0x699,
+0x6C6-0x6D0), which single-word codes handle badly. evaluate_dataset()
+replays a dump's flipped bits through any number of codes, each under any
+number of row/column interleavings, and counts per code and layout how
+many codewords were corrected, detected as uncorrectable, miscorrected or
+never noticed.
+
+A code is any object with `name`, `k` (data symbols per codeword),
+`symbol_bits` and `decode(errors) -> (residual, status)`, where `errors`
+is an (N, k) array of data-symbol error values and status uses the
+bch.CLEAN / CORRECTED / FAILED codes. Three are built in (see CODES):
+
+    SECDED(22,16)   Hsiao code, syndrome lookup table
+    BCH(63,45)      bch.BCH, syndrome tables + Berlekamp-Massey/Chien
+    RS(18,16)       byte symbols over GF(2^8), t = 1, log/antilog tables
+
+As in bch, codewords carry the measured errors in their data part only;
+check symbols live in storage no dump covers and are taken as intact.
+Only the codewords holding at least one error are ever materialized: the
+codeword and slot of every flipped symbol follow from its address, so a
+sparse full-chip dump costs no more than its error list.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from .bch import BCH_63_45, CLEAN, CORRECTED, FAILED, GF2m
+from .flips import popcount
+from .geometry import CHIP, WORD_BITS
+from .index import error_entries
+
+
+class SECDED:
+    """Single-error-correcting, double-error-detecting Hsiao(22,16)."""
+
+    name = 'SECDED(22,16)'
+    k = 16
+    symbol_bits = 1
+
+    def __init__(self):
+        # Data columns: 16 of the 6-bit weight-3 vectors; check bits are
+        # the weight-1 columns. Any odd-weight syndrome that matches no
+        # column, and every even-weight one, is a detected error.
+        weight3 = [v for v in range(64) if bin(v).count('1') == 3]
+        self.columns = np.array(weight3[:self.k], dtype=np.int64)
+        self.position = np.full(64, -1, dtype=np.int64)
+        self.position[self.columns] = np.arange(self.k)
+        self.status = np.full(64, FAILED, dtype=np.int8)
+        self.status[0] = CLEAN
+        self.status[self.columns] = CORRECTED
+        self.status[1 << np.arange(6)] = CORRECTED  # a check bit
+
+    def decode(self, errors):
+        syndrome = np.bitwise_xor.reduce(
+            np.where(errors != 0, self.columns, 0), axis=1)
+        residual = errors.copy()
+        position = self.position[syndrome]
+        fix = np.flatnonzero(position >= 0)
+        residual[fix, position[fix]] ^= 1
+        return residual, self.status[syndrome]
+
+
+class BCHCode:
+    """Adapter running a bch.BCH code on (N, k) bit arrays."""
+
+    symbol_bits = 1
+
+    def __init__(self, code=BCH_63_45):
+        self.code = code
+        self.name = f'BCH({code.n},{code.k})'
+        self.k = code.k
+
+    def decode(self, errors):
+        code = self.code
+        padded = np.zeros((len(errors), 64), dtype=np.uint8)
+        padded[:, code.parity_bits:code.parity_bits + code.k] = errors
+        received = np.packbits(padded, axis=1,
+                               bitorder='little').view('<u8')[:, 0]
+        decoded, status = code.decode(received)
+        bits = np.unpackbits(decoded.view(np.uint8).reshape(-1, 8), axis=1,
+                             bitorder='little')
+        return bits[:, code.parity_bits:code.parity_bits + code.k], status
+
+
+class ReedSolomon:
+    """Single-symbol-correcting RS(k + 2, k) over GF(2^m).
+
+    With roots alpha^0 and alpha^1 a single error of value v at position
+    i gives S0 = v and S1 = v alpha^i, so i = log S1 - log S0 and the
+    whole decoder is two syndromes and two table lookups.
+    """
+
+    def __init__(self, k=16, m=8):
+        self.field = GF2m(m)
+        if k + 2 > self.field.order:
+            raise ValueError(f'RS over GF(2^{m}) holds at most '
+                             f'{self.field.order - 2} data symbols')
+        self.k = k
+        self.n = k + 2
+        self.symbol_bits = m
+        self.name = f'RS({self.n},{k})'
+        self.alpha = self.field.exp[np.arange(2, self.n)]  # data positions
+
+    def decode(self, errors):
+        field = self.field
+        values = errors.astype(np.int64)
+        s0 = np.bitwise_xor.reduce(values, axis=1)
+        s1 = np.bitwise_xor.reduce(field.mul(values, self.alpha), axis=1)
+        location = np.mod(field.log[s1] - field.log[s0], field.order)
+        located = (s0 != 0) & (s1 != 0) & (location < self.n)
+        status = np.where((s0 == 0) & (s1 == 0), CLEAN,
+                          np.where(located, CORRECTED, FAILED))
+        residual = errors.copy()
+        fix = np.flatnonzero(located & (location >= 2))  # else a check symbol
+        residual[fix, location[fix] - 2] ^= s0[fix].astype(errors.dtype)
+        return residual, status.astype(np.int8)
+
+
+CODES = {
+    'secded': SECDED,
+    'bch': BCHCode,
+    'rs': ReedSolomon,
+}
+
+
+class Interleaving(namedtuple('Interleaving', 'rows cols')):
+    """Block interleaving of codeword symbols over the cell array.
+
+    Each row is a sequence of symbols (words in column order, symbols
+    within a word lowest first). With `cols` = d, consecutive symbols of
+    a row go to d different codewords; with `rows` = r, a codeword takes
+    its symbols round-robin from r neighbouring rows. 1x1 is plain
+    address order.
+    """
+
+    @classmethod
+    def parse(cls, text):
+        """'4x16' -> Interleaving(rows=4, cols=16)."""
+        rows, _, cols = text.lower().partition('x')
+        return cls(int(rows), int(cols or 1))
+
+    def __str__(self):
+        return f'{self.rows}x{self.cols}'
+
+    def positions(self, addresses, symbols, per_word, first_row,
+                  geometry=CHIP):
+        """Stream position of symbol `symbols` of each address; codeword
+        c holds positions [c * k, (c + 1) * k)."""
+        r, d = self.rows, self.cols
+        per_row = geometry.row_size * per_word
+        if per_row % d:
+            raise ValueError(f'column depth {d} does not divide the '
+                             f'{per_row} symbols of a row')
+        addresses = np.asarray(addresses, dtype=np.int64)
+        row = (addresses >> geometry.col_bits) - first_row
+        column = ((addresses & (geometry.row_size - 1)) * per_word
+                  + np.asarray(symbols, dtype=np.int64))
+        block, within = np.divmod(row, r)
+        rank, group = np.divmod(column, d)
+        return ((block * d + group) * (per_row // d) + rank) * r + within
+
+
+def error_symbols(addresses, masks, symbol_bits):
+    """(addresses, symbol index, value) of every non-zero symbol of the
+    flip masks, symbols taken lowest bits first."""
+    per_word = WORD_BITS // symbol_bits
+    shifts = symbol_bits * np.arange(per_word, dtype=np.uint16)
+    symbols = (np.asarray(masks, dtype=np.uint16)[:, None] >> shifts) & \
+        np.uint16((1 << symbol_bits) - 1)
+    word, index = np.nonzero(symbols)
+    return np.asarray(addresses)[word], index, symbols[word, index]
+
+
+def codeword_errors(addresses, masks, start, words, code, interleaving,
+                    geometry=CHIP):
+    """(N, k) error symbols of the codewords holding any error, and the
+    number of codewords needed for `words` words from `start` (a layout
+    whose last block is partial leaves some codewords part-empty)."""
+    if WORD_BITS % code.symbol_bits:
+        raise ValueError(f'{code.name}: symbols must divide a word')
+    per_word = WORD_BITS // code.symbol_bits
+    addresses, index, values = error_symbols(addresses, masks,
+                                             code.symbol_bits)
+    positions = interleaving.positions(addresses, index, per_word,
+                                       start >> geometry.col_bits, geometry)
+    ids, slot = np.divmod(positions, code.k)
+    ids, rows = np.unique(ids, return_inverse=True)
+    dtype = np.uint8 if code.symbol_bits <= 8 else np.uint16
+    errors = np.zeros((len(ids), code.k), dtype=dtype)
+    errors[rows, slot] = values
+    return errors, -(-words * per_word // code.k)
+
+
+def replay(code, errors):
+    """Decode error patterns and classify the outcome of each codeword."""
+    residual, status = code.decode(errors)
+    left = residual.any(axis=1)
+    return {
+        'raw_bits': int(popcount(errors).sum(dtype=np.int64)),
+        'residual_bits': int(popcount(residual).sum(dtype=np.int64)),
+        'error_codewords': len(errors),
+        'corrected': int(((status == CORRECTED) & ~left).sum()),
+        'uncorrectable': int((status == FAILED).sum()),
+        'miscorrected': int(((status == CORRECTED) & left).sum()),
+        'undetected': int((status == CLEAN).sum()),
+    }
+
+
+def evaluate_dataset(dataset, codes, interleavings=(Interleaving(1, 1),),
+                     geometry=CHIP):
+    """replay() of one capture for every code and interleaving.
+
+    Returns a list of dicts, one per (code, interleaving), each holding
+    the counts, `codewords` and `words`, and the dataset description.
+    """
+    addresses, values = error_entries(dataset)
+    masks = values ^ np.uint16(dataset.pattern)
+    description = dataset.as_dict()
+    results = []
+    for code in codes:
+        for interleaving in interleavings:
+            errors, codewords = codeword_errors(
+                addresses, masks, dataset.start, dataset.total_words, code,
+                interleaving, geometry)
+            results.append(dict(replay(code, errors), code=code.name,
+                                interleaving=str(interleaving),
+                                codewords=codewords,
+                                words=dataset.total_words,
+                                dataset=description))
+    return results
+
+
+def combine(results):
+    """Pool per-dataset results by (code, interleaving), adding
+    raw/residual BER and uncorrectable/miscorrection rates per codeword."""
+    pooled = {}
+    counts = ('raw_bits', 'residual_bits', 'error_codewords', 'corrected',
+              'uncorrectable', 'miscorrected', 'undetected', 'codewords',
+              'words')
+    for r in results:
+        row = pooled.setdefault((r['code'], r['interleaving']), dict(
+            {key: 0 for key in counts}, code=r['code'],
+            interleaving=r['interleaving'], dumps=0))
+        row['dumps'] += 1
+        for key in counts:
+            row[key] += r[key]
+    rows = list(pooled.values())
+    for row in rows:
+        bits = row['words'] * WORD_BITS
+        row['raw_ber'] = row['raw_bits'] / bits if bits else 0.0
+        row['residual_ber'] = row['residual_bits'] / bits if bits else 0.0
+        for key in ('uncorrectable', 'miscorrected', 'undetected'):
+            row[f'{key}_rate'] = (row[key] / row['codewords']
+                                  if row['codewords'] else 0.0)
+    return rows
@@ -0,0 +1,175 @@
+"""Vectorized bit-flip counting.
+
+Replaces the per-value `bin(val ^ PATTERN).count('1')` comprehensions of the
+plot scripts. Every function takes whole arrays (plain arrays, memmaps from
+a DumpStore, ...) and an expected pattern that is either a scalar or one
+word per address.
+"""
+
+import numpy as np
+
+from .geometry import WORD_BITS
+
+CHUNK_WORDS = 1 << 20
+
+# Bit count of every byte, for NumPy builds without np.bitwise_count
+POPCOUNT8 = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None],
+                          axis=1).sum(axis=1).astype(np.uint8)
+
+
+def popcount(words):
+    """Per-element number of set bits of an unsigned integer array."""
+    words = np.asarray(words)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(words)
+    as_bytes = words.view(np.uint8).reshape(words.shape + (words.itemsize,))
+    return POPCOUNT8[as_bytes].sum(axis=-1, dtype=np.uint8)
+
+
+def flip_masks(values, pattern):
+    """XOR of each word against the expected pattern (set bit = flipped)."""
+    values = np.asarray(values, dtype=np.uint16)
+    return values ^ np.asarray(pattern, dtype=np.uint16)
+
+
+def flip_counts(values, pattern):
+    """Number of flipped bits per word (uint8, 0-16)."""
+    return popcount(flip_masks(values, pattern)).astype(np.uint8, copy=False)
+
+
+def lane_flips(values, pattern):
+    """Flip count per bit lane (index 0 = DQ0) over all words."""
+    masks = flip_masks(values, pattern)
+    bits = np.unpackbits(masks.astype('<u2').view(np.uint8), bitorder='little')
+    return bits.reshape(-1, WORD_BITS).sum(axis=0, dtype=np.int64)
+
+
+def _chunks(values, pattern, chunk):
+    values = np.asarray(values)
+    pattern = np.asarray(pattern)
+    for lo in range(0, len(values), chunk):
+        hi = lo + chunk
+        yield lo, values[lo:hi], pattern if pattern.ndim == 0 else pattern[lo:hi]
+
+
+def flip_stats(values, pattern, total_words=None, valid=None,
+               chunk=CHUNK_WORDS):
+    """Summary statistics of a capture in one pass.
+
+    `valid` masks out addresses that were never read. `total_words` is the
+    size of the tested address space (e.g. TOTAL_ADDRESS_SPACE for the
+    first-rows logs, which list only the words that differ); it defaults to
+    the number of words considered.
+
+    Returns a dict with total flips, per-lane flips, words with errors, the
+    worst word and the average flips per word / bit error rate over
+    total_words.
+    """
+    lanes = np.zeros(WORD_BITS, dtype=np.int64)
+    total = words = error_words = 0
+    max_flips, max_index = 0, None
+    for lo, vals, pat in _chunks(values, pattern, chunk):
+        if valid is not None:
+            keep = np.asarray(valid[lo:lo + len(vals)], dtype=bool)
+            index = np.flatnonzero(keep) + lo
+            vals = vals[keep]
+            pat = pat if np.ndim(pat) == 0 else pat[keep]
+        else:
+            index = None
+        if len(vals) == 0:
+            continue
+        counts = flip_counts(vals, pat)
+        lanes += lane_flips(vals, pat)
+        total += int(counts.sum(dtype=np.int64))
+        words += len(vals)
+        error_words += int(np.count_nonzero(counts))
+        worst = int(counts.argmax())
+        if counts[worst] > max_flips:
+            max_flips = int(counts[worst])
+            max_index = lo + worst if index is None else int(index[worst])
+
+    total_words = words if total_words is None else total_words
+    return {
+        'words': words,
+        'total_words': total_words,
+        'total_flips': total,
+        'error_words': error_words,
+        'lane_flips': lanes,
+        'max_flips': max_flips,
+        'max_index': max_index,
+        'avg_flips': total / total_words if total_words else 0.0,
+        'ber': total / (total_words * WORD_BITS) if total_words else 0.0,
+    }
+
+
+# --- Intra-word adjacency -------------------------------------------------
+#
+# A flip mask with bits i and i+1 both set is one adjacent pair, matching the
+# old count_adjacent_bit_flips loop. Runs of flipped bits ("bursts") are
+# measured with shifted ANDs: after k-1 steps of r &= r >> 1, a set bit marks
+# the low end of k consecutive flipped bits.
+
+_WORD_MASK = (1 << WORD_BITS) - 1
+
+
+def _run_starts(masks):
+    # Lowest bit of every run of set bits
+    return masks & ~((masks << 1) & _WORD_MASK)
+
+
+def adjacent_pairs(values, pattern):
+    """Number of adjacent flipped-bit pairs per word (0-15)."""
+    masks = flip_masks(values, pattern)
+    return popcount(masks & (masks >> 1)).astype(np.uint8, copy=False)
+
+
+def longest_run(values, pattern):
+    """Length of the longest run of consecutive flipped bits per word."""
+    runs = flip_masks(values, pattern)
+    length = np.zeros(runs.shape, dtype=np.uint8)
+    for _ in range(WORD_BITS):
+        nonzero = runs != 0
+        if not nonzero.any():
+            break
+        length += nonzero
+        runs = runs & (runs >> 1)
+    return length
+
+
+def burst_histogram(values, pattern, chunk=CHUNK_WORDS):
+    """Count of flipped-bit bursts by length over all words.
+
+    Index k of the result is the number of maximal runs of exactly k
+    consecutive flipped bits (index 0 is unused).
+    """
+    at_least = np.zeros(WORD_BITS + 2, dtype=np.int64)
+    for _, vals, pat in _chunks(values, pattern, chunk):
+        runs = flip_masks(vals, pat)
+        for k in range(1, WORD_BITS + 1):
+            at_least[k] += int(popcount(_run_starts(runs)).sum(dtype=np.int64))
+            runs = runs & (runs >> 1)
+    hist = at_least[:-1] - at_least[1:]
+    hist[0] = 0
+    return hist
+
+
+def adjacency_stats(values, pattern, chunk=CHUNK_WORDS):
+    """Per-word adjacency arrays plus whole-capture totals.
+
+    Returns a dict with `pairs` and `longest` (one entry per word), the
+    total number of adjacent pairs, the longest run seen and the burst
+    histogram from burst_histogram().
+    """
+    values = np.asarray(values)
+    pairs = np.empty(len(values), dtype=np.uint8)
+    longest = np.empty(len(values), dtype=np.uint8)
+    for lo, vals, pat in _chunks(values, pattern, chunk):
+        pairs[lo:lo + len(vals)] = adjacent_pairs(vals, pat)
+        longest[lo:lo + len(vals)] = longest_run(vals, pat)
+    return {
+        'pairs': pairs,
+        'longest': longest,
+        'total_pairs': int(pairs.sum(dtype=np.int64)),
+        'max_run': int(longest.max()) if len(longest) else 0,
+        'bursts': burst_histogram(values, pattern, chunk),
+    }
@@ -0,0 +1,58 @@
+"""Address geometry of the MT48LC4M16A2 as addressed by the `.ino` sketch.
+
+The sketch forms word addresses as `addr = (row << 10) | col` with
+`ROW_SIZE` 1024; the two bits above the row select the bank, giving the
+4M x 16 chip (4 banks x 1024 rows x 1024 words).
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+ROW_SIZE = 1024
+COL_BITS = 10
+ROW_BITS = 10
+BANK_BITS = 2
+
+CHIP_WORDS = 1 << (COL_BITS + ROW_BITS + BANK_BITS)  # 0x400000
+WORD_BITS = 16
+
+# Range covered by the existing "first 10 rows" captures
+DUMP_START = 0x0000
+DUMP_END = 0x09FF
+TOTAL_ADDRESS_SPACE = DUMP_END + 1
+
+
+class Geometry(namedtuple('Geometry', 'col_bits row_bits bank_bits')):
+    """Bit widths of the column, row and bank fields of a word address."""
+
+    @property
+    def row_size(self):
+        return 1 << self.col_bits
+
+    @property
+    def rows(self):
+        return 1 << self.row_bits
+
+    @property
+    def banks(self):
+        return 1 << self.bank_bits
+
+    @property
+    def words(self):
+        return 1 << (self.col_bits + self.row_bits + self.bank_bits)
+
+    def split(self, addresses):
+        """Return (bank, row, col) for scalar or array addresses."""
+        addresses = np.asarray(addresses)
+        col = addresses & (self.row_size - 1)
+        row = (addresses >> self.col_bits) & (self.rows - 1)
+        bank = addresses >> (self.col_bits + self.row_bits)
+        return bank, row, col
+
+    def join(self, bank, row, col):
+        bank, row, col = np.asarray(bank), np.asarray(row), np.asarray(col)
+        return (((bank << self.row_bits) | row) << self.col_bits) | col
+
+
+CHIP = Geometry(COL_BITS, ROW_BITS, BANK_BITS)
@@ -0,0 +1,273 @@
+"""Python host for the UART command protocol, with pipelined requests.
+
+The sketch's `sendCommand` is stop-and-wait: one 8-byte frame, then up to
+CMD_TIMEOUT for its ack (and for reads, the data word) before the next.
+Client instead keeps up to `window` commands in flight, each tagged with
+the frame's sequence byte, and matches acks back to commands by that
+byte. A command whose ack has not arrived within `timeout` is sent again,
+up to `retries` times, like the sketch's RETRY_COUNT loop. Round-trip
+latencies, resends, timeouts and CRC mismatches are recorded in the
+client's `metrics` (see metrics.py).
+"""
+
+import time
+
+import numpy as np
+
+from .metrics import AcquisitionMetrics
+from .protocol import (ACK_SIZE, BAUDRATE, CHUNK_SIZE, CMD_BLOCK, CMD_READ,
+                       CMD_TIMEOUT, CMD_WRITE, MAX_BLOCK_CHUNKS, RETRY_COUNT,
+                       WORD_SIZE, FrameError, decode_ack, decode_word,
+                       encode_command, encode_commands)
+
+# Sequence numbers are one byte; stay well inside half the space so a late
+# ack can never be mistaken for a newer command with a reused number.
+MAX_WINDOW = 128
+
+
+def open_serial(path, baudrate=BAUDRATE, **kwargs):
+    """Open a serial port (or pty) with pyserial."""
+    try:
+        import serial
+    except ImportError as exc:
+        raise ImportError('talking to a serial port needs pyserial '
+                          '(pip install pyserial)') from exc
+    return serial.Serial(path, baudrate=baudrate, timeout=0.01, **kwargs)
+
+
+class Client:
+    """Pipelined command client over a pyserial-like port."""
+
+    def __init__(self, port, window=32, timeout=CMD_TIMEOUT,
+                 retries=RETRY_COUNT, metrics=None):
+        if not 1 <= window <= MAX_WINDOW:
+            raise ValueError(f'window must be 1-{MAX_WINDOW}')
+        self.port = port
+        self.window = window
+        self.timeout = timeout
+        self.retries = retries
+        self.metrics = metrics or AcquisitionMetrics(
+            baudrate=getattr(port, 'baudrate', None), window=window,
+            timeout_s=timeout, retries=retries)
+        self._seq = 0
+
+    def _read(self, n):
+        data = self.port.read(n)
+        if data:
+            self.metrics.count(bytes_in=len(data))
+        return data
+
+    def _write(self, data):
+        self.port.write(data)
+        self.metrics.count(bytes_out=len(data))
+
+    def _read_exact(self, n, deadline):
+        buf = b''
+        while len(buf) < n:
+            chunk = self._read(n - len(buf))
+            if chunk:
+                buf += chunk
+            elif time.monotonic() >= deadline:
+                return None
+        return buf
+
+    def _drain(self):
+        # Throw away whatever is buffered after a corrupted reply
+        reset = getattr(self.port, 'reset_input_buffer', None)
+        if reset is not None:
+            reset()
+        while self._read(256):
+            pass
+
+    def discard(self, limit):
+        """Read and throw away up to `limit` bytes, stopping early once the
+        line has been silent for `timeout`; returns the count discarded.
+
+        Used after a block stream went wrong, so its remaining bytes are
+        not parsed as the reply to the next request.
+        """
+        skipped = 0
+        deadline = time.monotonic() + self.timeout
+        while skipped < limit:
+            data = self._read(min(limit - skipped, 4096))
+            if data:
+                skipped += len(data)
+                deadline = time.monotonic() + self.timeout
+            elif time.monotonic() >= deadline:
+                break
+        if skipped:
+            self.metrics.count(bytes_discarded=skipped)
+        return skipped
+
+    def transact(self, cmds, addresses, data=None):
+        """Run a batch of commands; return (read values, ok mask).
+
+        `cmds` is one command byte per entry (or a single byte for all).
+        Values are filled in for read commands; `ok` is False where a
+        command exhausted its retries.
+        """
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        n = len(addresses)
+        cmds = np.broadcast_to(np.asarray(
+            [ord(c) if isinstance(c, str) else c for c in np.atleast_1d(cmds)],
+            dtype=np.uint8), (n,))
+        data = np.broadcast_to(np.asarray(0 if data is None else data,
+                                          dtype=np.uint16), (n,))
+        # Frames are built and CRC'd in bulk; only the sequence byte is
+        # filled in as each one is sent
+        frames = encode_commands(cmds, addresses, data)
+        values = np.zeros(n, dtype=np.uint16)
+        done = np.zeros(n, dtype=bool)
+        failed = np.zeros(n, dtype=bool)
+
+        metrics = self.metrics
+        # seq -> [index, frame, attempts, deadline, last sent]
+        outstanding = {}
+        next_index = 0
+        while next_index < n or outstanding:
+            now = time.monotonic()
+            batch = bytearray()
+            while next_index < n and len(outstanding) < self.window:
+                # Don't let new numbers run more than MAX_WINDOW ahead of
+                # the oldest command still waiting for its ack
+                if outstanding and (self._seq - next(iter(outstanding))) \
+                        & 0xFF >= MAX_WINDOW:
+                    break
+                i = next_index
+                frames[i, 7] = self._seq
+                frame = frames[i].tobytes()
+                outstanding[self._seq] = [i, frame, 1, now + self.timeout,
+                                          now]
+                self._seq = (self._seq + 1) & 0xFF
+                batch += frame
+                next_index += 1
+                metrics.sent(cmds[i])
+            for seq, entry in list(outstanding.items()):
+                if entry[3] <= now:
+                    cmd = cmds[entry[0]]
+                    # A zero deadline is a forced resend after a bad ack
+                    if entry[3]:
+                        metrics.timed_out(cmd)
+                    if entry[2] > self.retries:
+                        failed[entry[0]] = True
+                        metrics.failed(cmd)
+                        del outstanding[seq]
+                        continue
+                    entry[2] += 1
+                    entry[3] = now + self.timeout
+                    entry[4] = now
+                    batch += entry[1]
+                    metrics.sent(cmd, resend=True)
+            if batch:
+                self._write(bytes(batch))
+            if not outstanding:
+                continue
+
+            deadline = min(entry[3] for entry in outstanding.values())
+            ack = self._read_exact(ACK_SIZE, deadline)
+            if ack is None:
+                continue
+            try:
+                cmd, seq = decode_ack(ack)
+            except FrameError:
+                metrics.count(crc_ack=1)
+                self._drain()
+                for entry in outstanding.values():
+                    entry[3] = 0
+                continue
+            word = None
+            if cmd == CMD_READ:
+                word = self._read_exact(WORD_SIZE,
+                                        time.monotonic() + self.timeout)
+                if word is None:
+                    metrics.count(word_timeouts=1)
+                    continue
+            entry = outstanding.get(seq)
+            if entry is None or cmds[entry[0]] != cmd:
+                metrics.count(late_acks=1)
+                continue  # late ack for a command already retried
+            i = entry[0]
+            if word is not None:
+                values[i] = decode_word(word)
+                metrics.count(words=1)
+            done[i] = True
+            metrics.completed(cmd, time.monotonic() - entry[4])
+            del outstanding[seq]
+        return values, done & ~failed
+
+    def write(self, addr, value):
+        return bool(self.transact(CMD_WRITE, [addr], [value])[1][0])
+
+    def read(self, addr):
+        """Word at addr, or None if the read failed."""
+        values, ok = self.transact(CMD_READ, [addr])
+        return int(values[0]) if ok[0] else None
+
+    def write_many(self, addresses, values):
+        return self.transact(CMD_WRITE, addresses, values)[1]
+
+    def read_many(self, addresses, passes=1):
+        """Read words; failed reads are re-requested in bulk `passes` - 1
+        more times."""
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        values, ok = self.transact(CMD_READ, addresses)
+        for _ in range(passes - 1):
+            failed = np.flatnonzero(~ok)
+            if not len(failed):
+                break
+            values[failed], ok[failed] = self.transact(CMD_READ,
+                                                       addresses[failed])
+        return values, ok
+
+    def dump(self, start, stop, passes=1):
+        """Read every word in [start, stop); returns (values, ok)."""
+        return self.read_many(np.arange(start, stop, dtype=np.uint32), passes)
+
+    def block(self, start, chunks):
+        """Issue one block read; return the raw chunk bytes received.
+
+        The result may be short (or empty) if the ack or part of the
+        stream was lost; callers validate it with protocol.decode_chunks.
+        """
+        if not 1 <= chunks <= MAX_BLOCK_CHUNKS:
+            raise ValueError(f'chunks must be 1-{MAX_BLOCK_CHUNKS}')
+        metrics = self.metrics
+        seq = self._seq
+        self._seq = (self._seq + 1) & 0xFF
+        sent = time.monotonic()
+        self._write(encode_command(CMD_BLOCK, start, chunks, seq))
+        metrics.sent(CMD_BLOCK)
+        ack = self._read_exact(ACK_SIZE, sent + self.timeout)
+        acked = False
+        if ack is None:
+            metrics.timed_out(CMD_BLOCK)
+        else:
+            try:
+                acked = decode_ack(ack) == (CMD_BLOCK, seq)
+                if not acked:
+                    metrics.count(late_acks=1)
+            except FrameError:
+                metrics.count(crc_ack=1)
+        want = chunks * CHUNK_SIZE
+        if not acked:
+            # The board may be streaming the block behind a corrupted or
+            # late ack: let it run out before the next request
+            metrics.failed(CMD_BLOCK)
+            self.discard(want)
+            return b''
+        buf = bytearray()
+        deadline = time.monotonic() + self.timeout
+        # Keep reading while data arrives; give up after a silent timeout
+        while len(buf) < want:
+            data = self._read(want - len(buf))
+            if data:
+                buf += data
+                deadline = time.monotonic() + self.timeout
+            elif time.monotonic() >= deadline:
+                metrics.timed_out(CMD_BLOCK)
+                break
+        if len(buf) == want:
+            metrics.completed(CMD_BLOCK, time.monotonic() - sent)
+        else:
+            metrics.failed(CMD_BLOCK)
+        return bytes(buf)
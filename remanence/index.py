@@ -0,0 +1,145 @@
+"""Sparse error index over many dumps.
+
+Only the words that differ from each dump's pattern are kept, CSR style:
+one flat, per-dump sorted array of addresses and one of observed values,
+with `indptr[d]:indptr[d + 1]` delimiting dump d. Each entry also gets the
+sort key `(d << 32) | address`, so one searchsorted call finds an address
+range in every selected dump at once and a query never builds a dense
+image:
+
+    index = ErrorIndex.build(discover('Test'))
+    hits = index.rows(6, 7, dumps=index.select(refresh_us=125.0))
+"""
+
+import json
+
+import numpy as np
+
+from .analysis import load_entries
+from .geometry import CHIP
+from .sparsediff import differing_entries
+
+
+def error_entries(dataset):
+    """Sorted (addresses, values) of the words differing from the pattern."""
+    addresses, values = differing_entries(*load_entries(dataset),
+                                          dataset.pattern)
+    return addresses.astype(np.uint32), values
+
+
+class ErrorIndex:
+    """Error words of many dumps in compressed sparse row form."""
+
+    def __init__(self, indptr, addresses, values, patterns, datasets):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.addresses = np.asarray(addresses, dtype=np.uint32)
+        self.values = np.asarray(values, dtype=np.uint16)
+        self.patterns = np.asarray(patterns, dtype=np.uint16)
+        self.datasets = list(datasets)  # Dataset.as_dict() of each dump
+        dump = np.repeat(np.arange(len(self.datasets), dtype=np.uint64),
+                         np.diff(self.indptr))
+        self.keys = (dump << np.uint64(32)) | self.addresses
+
+    @classmethod
+    def build(cls, datasets, map_func=map):
+        """Index datasets, loading them through map_func (e.g. a pool)."""
+        datasets = list(datasets)
+        loaded = list(map_func(error_entries, datasets))
+        counts = [len(a) for a, _ in loaded]
+        empty = (np.empty(0, np.uint32), np.empty(0, np.uint16))
+        addresses, values = zip(*loaded) if loaded else ([empty[0]],
+                                                         [empty[1]])
+        return cls(np.r_[0, np.cumsum(counts, dtype=np.int64)],
+                   np.concatenate(addresses), np.concatenate(values),
+                   [d.pattern for d in datasets],
+                   [d.as_dict() for d in datasets])
+
+    def __len__(self):
+        return len(self.addresses)
+
+    def __repr__(self):
+        return f'ErrorIndex(dumps={len(self.datasets)}, errors={len(self)})'
+
+    def counts(self):
+        """Number of error words per dump."""
+        return np.diff(self.indptr)
+
+    def dump(self, d):
+        """(addresses, values) of dump d, as views."""
+        lo, hi = self.indptr[d], self.indptr[d + 1]
+        return self.addresses[lo:hi], self.values[lo:hi]
+
+    def select(self, **conditions):
+        """Indices of dumps whose description matches every condition,
+        e.g. select(refresh_us=125.0, direction='forward')."""
+        return np.array([i for i, d in enumerate(self.datasets)
+                         if all(d.get(k) == v for k, v in conditions.items())],
+                        dtype=np.int64)
+
+    def _slices(self, lo, hi, dumps):
+        # [first, last) entry positions of addresses [lo, hi) in each dump.
+        # Bounds are clamped to the 32-bit address field and added, not
+        # ORed, so hi = 1 << 32 ends at the next dump's first key.
+        lo, hi = (np.uint64(min(max(int(b), 0), 1 << 32)) for b in (lo, hi))
+        high = np.asarray(dumps, dtype=np.uint64) << np.uint64(32)
+        return (np.searchsorted(self.keys, high + lo),
+                np.searchsorted(self.keys, high + hi))
+
+    def ranges(self, ranges, dumps=None):
+        """Error words with addresses in any [lo, hi) of ranges.
+
+        Returns (dumps, addresses, values) sorted by dump then address.
+        A range ending at 1 << 32 (or beyond) covers the rest of each dump:
+
+        >>> index = ErrorIndex([0, 2, 3, 5], [4, 9, 1, 0, 0xFFFFFF],
+        ...                    [0] * 5, [0xFFFF] * 3, [{}] * 3)
+        >>> index.ranges([(0, 1 << 32)])[0].tolist()
+        [0, 0, 1, 2, 2]
+        >>> index.range(8, 1 << 40, dumps=[0, 2])[1].tolist()
+        [9, 16777215]
+        """
+        dumps = np.arange(len(self.datasets)) if dumps is None \
+            else np.asarray(dumps, dtype=np.int64)
+        firsts, lasts = [], []
+        for lo, hi in ranges:
+            first, last = self._slices(lo, hi, dumps)
+            firsts.append(first)
+            lasts.append(last)
+        first = np.concatenate(firsts) if firsts else np.empty(0, np.int64)
+        last = np.concatenate(lasts) if lasts else np.empty(0, np.int64)
+        lengths = (last - first).astype(np.int64)
+        # Gather every [first, last) slice with one fancy index
+        starts = np.repeat(first.astype(np.int64), lengths)
+        offset = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths)
+                                                     - lengths, lengths)
+        pos = np.unique(starts + offset)  # overlapping ranges count once
+        dump = (self.keys[pos] >> np.uint64(32)).astype(np.int64)
+        return dump, self.addresses[pos], self.values[pos]
+
+    def range(self, lo, hi, dumps=None):
+        """Error words with lo <= address < hi (see ranges())."""
+        return self.ranges([(lo, hi)], dumps)
+
+    def rows(self, first, last, bank=None, dumps=None, geometry=CHIP):
+        """Error words in rows first..last inclusive, of one bank or all."""
+        banks = range(geometry.banks) if bank is None else [bank]
+        ranges = [(int(geometry.join(b, first, 0)),
+                   int(geometry.join(b, last, 0)) + geometry.row_size)
+                  for b in banks]
+        return self.ranges(ranges, dumps)
+
+    def flips(self, dumps, values):
+        """Flipped-bit masks of query results against each dump's pattern."""
+        return values ^ self.patterns[dumps]
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.savez(f, indptr=self.indptr, addresses=self.addresses,
+                     values=self.values, patterns=self.patterns,
+                     datasets=np.array(json.dumps(self.datasets)))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['indptr'], data['addresses'], data['values'],
+                       data['patterns'], json.loads(str(data['datasets'])))
@@ -0,0 +1,498 @@
+"""March tests with fault classification.
+
+The sketch's `TEST` command writes 0xAAAA everywhere and reads it back,
+which only finds stuck bits. This module runs real March algorithms,
+written in the usual notation with ASCII or arrow address orders:
+
+    MARCH_C_MINUS = 'any(w0); up(r0,w1); up(r1,w0); down(r0,w1); '
+                    'down(r1,w0); any(r0)'
+
+`0` is the data background and `1` its complement. Each element is
+handed to a target as a whole: MemoryModel (an in-memory array with
+injectable faults) or UartTarget (the board, through the pipelined
+Client). Every read of an element comes back as one column of an
+(addresses x reads) matrix, so verification is a single XOR against the
+expected words.
+
+Failures are classified with a fault dictionary. The dictionary comes
+from running the same algorithm and backgrounds on a small MemoryModel
+with each fault primitive injected: stuck-at, transition, inversion and
+idempotent coupling from a lower or higher aggressor, and address-decoder
+faults. The fail signature of every faulty bit (or, for decoder faults,
+whole word) is then looked up. Primitives with identical signatures
+cannot be told apart by the algorithm and are all reported. For example,
+March C- cannot separate a stuck-at-0 from an up-transition fault in a
+cell that powered up at 0.
+"""
+
+import re
+from collections import Counter, namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+from .geometry import WORD_BITS
+from .protocol import CMD_READ, CMD_WRITE
+
+MATS_PLUS = 'any(w0); up(r0,w1); down(r1,w0)'
+MARCH_C_MINUS = ('any(w0); up(r0,w1); up(r1,w0); down(r0,w1); down(r1,w0); '
+                 'any(r0)')
+MARCH_B = ('any(w0); up(r0,w1,r1,w0,r0,w1); up(r1,w0,w1); '
+           'down(r1,w0,w1,w0); down(r0,w1,w0)')
+MARCH_SS = ('any(w0); up(r0,r0,w0,r0,w1); up(r1,r1,w1,r1,w0); '
+            'down(r0,r0,w0,r0,w1); down(r1,r1,w1,r1,w0); any(r0)')
+
+ALGORITHMS = {
+    'mats+': MATS_PLUS,
+    'march-c-': MARCH_C_MINUS,
+    'march-b': MARCH_B,
+    'march-ss': MARCH_SS,
+}
+
+FAULT_CLASSES = ('stuck-at', 'transition', 'coupling', 'address-decoder')
+
+_ORDERS = {'up': 'up', 'u': 'up', '⇑': 'up',
+           'down': 'down', 'd': 'down', '⇓': 'down',
+           'any': 'any', 'b': 'any', '⇕': 'any'}
+_ELEMENT = re.compile(r'^\s*(\S+?)\s*\(([^)]*)\)\s*$')
+_OP = re.compile(r'^([rw])([01])$')
+
+
+class MarchElement(namedtuple('MarchElement', 'order ops')):
+    """Address order ('up', 'down' or 'any') and ((kind, bit), ...) ops."""
+
+    def __str__(self):
+        return f"{self.order}({','.join(k + str(b) for k, b in self.ops)})"
+
+
+def parse_march(text):
+    """List of MarchElements from '{up(r0,w1); down(r1,w0)}' notation."""
+    if text.lower() in ALGORITHMS:
+        text = ALGORITHMS[text.lower()]
+    elements = []
+    for part in text.strip().strip('{}').split(';'):
+        if not part.strip():
+            continue
+        match = _ELEMENT.match(part)
+        if not match or match.group(1).lower() not in _ORDERS:
+            raise ValueError(f'bad March element {part.strip()!r}')
+        ops = []
+        for op in match.group(2).split(','):
+            op_match = _OP.match(op.strip())
+            if not op_match:
+                raise ValueError(f'bad March operation {op.strip()!r}')
+            ops.append((op_match.group(1), int(op_match.group(2))))
+        elements.append(MarchElement(_ORDERS[match.group(1).lower()],
+                                     tuple(ops)))
+    if not elements:
+        raise ValueError('empty March algorithm')
+    return elements
+
+
+def _resolve(ops, background):
+    # (kind, bit) -> (kind, word) for one data background
+    inverse = ~background & 0xFFFF
+    return [(kind, background if bit == 0 else inverse) for kind, bit in ops]
+
+
+class MemoryModel:
+    """Word array with injectable functional faults.
+
+    Cells listed as coupling aggressors or involved in decoder faults are
+    stepped one address at a time; every other address of an element is
+    processed with whole-array operations.
+    """
+
+    def __init__(self, words, fill=0x0000, floating=0x0000):
+        self.memory = np.full(words, fill, dtype=np.uint16)
+        self.floating = floating  # read back by an address with no cell
+        self._sa_mask = self._sa_value = None
+        self._tf_up = self._tf_down = None
+        # aggressor cell -> [(bit, direction, victim, victim bit, effect)]
+        self.couplings = {}
+        self.decoder = {}  # address -> list of cells it really accesses
+
+    def __len__(self):
+        return len(self.memory)
+
+    def _masks(self):
+        if self._sa_mask is None:
+            n = len(self.memory)
+            self._sa_mask = np.zeros(n, np.uint16)
+            self._sa_value = np.zeros(n, np.uint16)
+            self._tf_up = np.zeros(n, np.uint16)
+            self._tf_down = np.zeros(n, np.uint16)
+
+    def add_stuck_at(self, address, bit, value):
+        self._masks()
+        self._sa_mask[address] |= 1 << bit
+        if value:
+            self._sa_value[address] |= 1 << bit
+        else:
+            self._sa_value[address] &= ~(1 << bit) & 0xFFFF
+        self.memory[address] = self._store(np.array([address]),
+                                           self.memory[address:address + 1],
+                                           self.memory[address])[0]
+
+    def add_transition(self, address, bit, direction):
+        """The bit cannot make the 'up' (0->1) or 'down' (1->0) transition."""
+        self._masks()
+        target = self._tf_up if direction == 'up' else self._tf_down
+        target[address] |= 1 << bit
+
+    def add_coupling(self, aggressor, bit, direction, victim, victim_bit,
+                     effect):
+        """An 'up'/'down' transition of aggressor's bit inverts the victim
+        bit (effect 'invert') or forces it to effect (0 or 1)."""
+        self.couplings.setdefault(aggressor, []).append(
+            (bit, direction, victim, victim_bit, effect))
+
+    def add_decoder_fault(self, address, cells):
+        """Accesses to address reach `cells` (none, another, or several)."""
+        self.decoder[address] = list(cells)
+
+    def _store(self, cells, old, value):
+        new = np.broadcast_to(np.asarray(value, np.uint16), old.shape).copy()
+        if self._sa_mask is not None:
+            up, down = self._tf_up[cells], self._tf_down[cells]
+            new = (new & ~(up & ~old)) | (old & down & ~new)
+            mask = self._sa_mask[cells]
+            new = (new & ~mask) | (self._sa_value[cells] & mask)
+        return new
+
+    def _special(self):
+        return np.array(sorted(set(self.couplings) | set(self.decoder)),
+                        dtype=np.int64)
+
+    def run(self, addresses, ops):
+        """Apply ops (kind, word) to every address in order; return the
+        (len(addresses), reads) matrix of words read."""
+        addresses = np.asarray(addresses, dtype=np.int64)
+        nreads = sum(kind == 'r' for kind, _ in ops)
+        out = np.empty((len(addresses), nreads), dtype=np.uint16)
+        special = self._special()
+        stops = np.flatnonzero(np.isin(addresses, special)) if len(special) \
+            else np.empty(0, np.int64)
+        prev = 0
+        for pos in list(stops) + [len(addresses)]:
+            if pos > prev:
+                self._bulk(addresses[prev:pos], ops, out[prev:pos])
+            if pos < len(addresses):
+                self._single(int(addresses[pos]), ops, out[pos])
+            prev = pos + 1
+        return out
+
+    def _bulk(self, cells, ops, out):
+        col = 0
+        for kind, word in ops:
+            if kind == 'r':
+                out[:, col] = self.memory[cells]
+                col += 1
+            else:
+                self.memory[cells] = self._store(cells, self.memory[cells],
+                                                 word)
+
+    def _single(self, address, ops, out):
+        cells = self.decoder.get(address, [address])
+        col = 0
+        for kind, word in ops:
+            if kind == 'r':
+                # Several cells on one address read as a wired AND
+                value = self.floating
+                if cells:
+                    value = int(np.bitwise_and.reduce(self.memory[cells]))
+                out[col] = value
+                col += 1
+                continue
+            for cell in cells:
+                old = int(self.memory[cell])
+                new = int(self._store(np.array([cell]),
+                                      self.memory[cell:cell + 1], word)[0])
+                self.memory[cell] = new
+                self._couple(cell, old, new)
+
+    def _couple(self, cell, old, new):
+        for bit, direction, victim, vbit, effect in self.couplings.get(cell, ()):
+            before, after = (old >> bit) & 1, (new >> bit) & 1
+            if (before, after) != ((0, 1) if direction == 'up' else (1, 0)):
+                continue
+            value = int(self.memory[victim])
+            if effect == 'invert':
+                value ^= 1 << vbit
+            elif effect:
+                value |= 1 << vbit
+            else:
+                value &= ~(1 << vbit)
+            self.memory[victim] = value
+
+
+class UartTarget:
+    """Runs March elements on the board through a pipelined Client.
+
+    All operations of an element go out as one batch, in March order. With
+    window=1 every command is acknowledged before the next is sent, so the
+    order holds even when frames are lost. A larger window is faster, but a
+    resent frame can land after later ones (a dropped r0 resent after its
+    w1 reads the new value), so run() refuses any element in which a
+    command had to be resent rather than report false faults.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    def _resends(self):
+        return sum(c['retries'] for c in self.client.metrics.commands.values())
+
+    def run(self, addresses, ops):
+        addresses = np.asarray(addresses, dtype=np.uint32)
+        n, k = len(addresses), len(ops)
+        cmds = np.array([CMD_READ if kind == 'r' else CMD_WRITE
+                         for kind, _ in ops], dtype=np.uint8)
+        data = np.array([word if kind == 'w' else 0 for kind, word in ops],
+                        dtype=np.uint16)
+        resends = self._resends()
+        values, ok = self.client.transact(np.tile(cmds, n),
+                                          np.repeat(addresses, k),
+                                          np.tile(data, n))
+        if not ok.all():
+            raise OSError(f'{int((~ok).sum())} March commands failed after '
+                          f'retries')
+        if self.client.window > 1 and self._resends() > resends:
+            raise OSError(f'March commands were resent with window '
+                          f'{self.client.window}, so they may have run out '
+                          f'of order; rerun with window 1')
+        reads = [j for j, (kind, _) in enumerate(ops) if kind == 'r']
+        return values.reshape(n, k)[:, reads]
+
+
+class MarchResult:
+    """Failing words of a March run and their classification."""
+
+    def __init__(self, algorithm, backgrounds, start, stop, reads, addresses,
+                 syndromes):
+        self.algorithm = algorithm
+        self.backgrounds = backgrounds
+        self.start = start
+        self.stop = stop
+        self.reads = reads          # (background, element, op) of each read
+        self.addresses = addresses  # failing words, ascending
+        self.syndromes = syndromes  # (words, reads) XOR of read vs expected
+        self.faults = classify(self)
+
+    @property
+    def errors(self):
+        """Number of failing reads, as the sketch's error counter counts."""
+        return int(np.count_nonzero(self.syndromes))
+
+    def summary(self):
+        return dict(Counter(self.faults['class']))
+
+    def as_dict(self):
+        return {
+            'algorithm': self.algorithm,
+            'backgrounds': list(self.backgrounds),
+            'start': self.start,
+            'stop': self.stop,
+            'failing_words': len(self.addresses),
+            'failing_reads': self.errors,
+            'summary': self.summary(),
+            'faults': [
+                {'address': int(a), 'bit': int(b), 'class': c,
+                 'candidates': d}
+                for a, b, c, d in zip(self.faults['address'],
+                                      self.faults['bit'],
+                                      self.faults['class'],
+                                      self.faults['candidates'])],
+        }
+
+
+def _order(element, start, stop):
+    if element.order == 'down':
+        return np.arange(stop - 1, start - 1, -1, dtype=np.int64)
+    return np.arange(start, stop, dtype=np.int64)
+
+
+def run_march(target, algorithm=MARCH_C_MINUS, start=0, stop=None,
+              backgrounds=(0x0000,)):
+    """Run a March algorithm over [start, stop) once per data background."""
+    elements = parse_march(algorithm)
+    stop = len(target) if stop is None else stop
+    reads, failing, syndromes = [], [], []
+    for b, background in enumerate(backgrounds):
+        for e, element in enumerate(elements):
+            ops = _resolve(element.ops, background)
+            expected = np.array([word for kind, word in ops if kind == 'r'],
+                                dtype=np.uint16)
+            reads.extend((b, e, j) for j, (kind, _) in enumerate(ops)
+                         if kind == 'r')
+            if not len(expected):
+                target.run(_order(element, start, stop), ops)
+                continue
+            addresses = _order(element, start, stop)
+            xor = target.run(addresses, ops) ^ expected
+            bad = np.flatnonzero(xor.any(axis=1))
+            failing.append((addresses[bad], len(reads) - len(expected),
+                            xor[bad]))
+    # Gather the per-element failures into one (words, reads) matrix
+    addresses = np.unique(np.concatenate(
+        [a for a, _, _ in failing] or [np.empty(0, np.int64)]))
+    matrix = np.zeros((len(addresses), len(reads)), dtype=np.uint16)
+    for a, first, xor in failing:
+        rows = np.searchsorted(addresses, a)
+        matrix[rows, first:first + xor.shape[1]] = xor
+    name = next((k for k, v in ALGORITHMS.items() if v == algorithm),
+                algorithm)
+    return MarchResult(name, tuple(backgrounds), start, stop, reads,
+                       addresses, matrix)
+
+
+# Fault dictionary ----------------------------------------------------------
+
+_VICTIM, _LOW, _HIGH, _DICT_WORDS = 4, 1, 6, 8
+_PRIORITY = {'SA': 0, 'TF': 1, 'CF': 2, 'AF': 3}
+
+
+def _bit_matrix(syndromes):
+    # (words, reads) uint16 -> (words, bits, reads) bool
+    bits = (syndromes[:, :, None] >> np.arange(WORD_BITS, dtype=np.uint16)) & 1
+    return bits.transpose(0, 2, 1).astype(bool)
+
+
+def _simulate(algorithm, backgrounds, inject, fill, floating=0x0000):
+    model = MemoryModel(_DICT_WORDS, fill, floating)
+    inject(model)
+    elements = parse_march(algorithm)
+    rows = []
+    for background in backgrounds:
+        for element in elements:
+            ops = _resolve(element.ops, background)
+            expected = np.array([w for k, w in ops if k == 'r'], np.uint16)
+            out = model.run(_order(element, 0, _DICT_WORDS), ops)
+            if element.order == 'down':
+                out = out[::-1]
+            rows.append(out ^ expected)
+    return np.concatenate(rows, axis=1) if rows else None
+
+
+def _bit_primitives():
+    for value in (0, 1):
+        yield f'SA{value}', lambda m, b, v=value: m.add_stuck_at(_VICTIM, b, v)
+    for direction in ('up', 'down'):
+        yield f'TF{direction}', \
+            lambda m, b, d=direction: m.add_transition(_VICTIM, b, d)
+    for where, aggressor in (('<', _LOW), ('>', _HIGH)):
+        for direction in ('up', 'down'):
+            for effect in ('invert', 0, 1):
+                name = ('CFin' if effect == 'invert' else f'CFid{effect}') + \
+                    f'-{direction}{where}'
+                yield name, (lambda m, b, a=aggressor, d=direction, e=effect:
+                             m.add_coupling(a, b, d, _VICTIM, b, e))
+
+
+def _word_primitives():
+    yield 'AF-none', {_VICTIM: []}
+    for where, other in (('<', _LOW), ('>', _HIGH)):
+        yield f'AF-alias{where}', {_VICTIM: [other]}
+        yield f'AF-multi{where}', {_VICTIM: [_VICTIM, other]}
+
+
+@lru_cache(maxsize=16)
+def fault_dictionary(algorithm, backgrounds):
+    """({(bit, signature): names}, {word signature: names}) for an
+    algorithm, where signatures are packed fail-per-read bit vectors."""
+    bit_dict, word_dict = {}, {}
+    for fill in (0x0000, 0xFFFF):
+        for name, inject in _bit_primitives():
+            xor = _simulate(algorithm, backgrounds,
+                            lambda m: [inject(m, b) for b in range(WORD_BITS)],
+                            fill)
+            for bit, sig in enumerate(_bit_matrix(xor[_VICTIM:_VICTIM + 1])[0]):
+                if sig.any():
+                    key = (bit, np.packbits(sig).tobytes())
+                    bit_dict.setdefault(key, set()).add(name)
+        for floating in (0x0000, 0xFFFF):
+            for name, faults in _word_primitives():
+                def inject(m, faults=faults):
+                    for address, cells in faults.items():
+                        m.add_decoder_fault(address, cells)
+                xor = _simulate(algorithm, backgrounds, inject, fill, floating)
+                for row in xor:
+                    if row.any():
+                        word_dict.setdefault(row.tobytes(), set()).add(name)
+    return bit_dict, word_dict
+
+
+def _family(names):
+    first = min(names, key=lambda n: (_PRIORITY[n[:2]], n))
+    if first.startswith('SA'):
+        return f'stuck-at-{first[2]}'
+    return {'TF': 'transition', 'CF': 'coupling',
+            'AF': 'address-decoder'}[first[:2]]
+
+
+def classify(result):
+    """Fault class of every failing bit (bit -1: whole word) of a result.
+
+    Returns a dict of parallel lists: address, bit, class, candidates.
+    """
+    algorithm = ALGORITHMS.get(result.algorithm, result.algorithm)
+    bit_dict, word_dict = fault_dictionary(algorithm, result.backgrounds)
+    out = {'address': [], 'bit': [], 'class': [], 'candidates': []}
+    if not len(result.addresses):
+        return out
+
+    syndromes = np.ascontiguousarray(result.syndromes)
+    # Whole-word decoder signatures first
+    word_keys = [row.tobytes() for row in syndromes]
+    is_word = np.array([k in word_dict for k in word_keys])
+    for i in np.flatnonzero(is_word):
+        names = word_dict[word_keys[i]]
+        out['address'].append(int(result.addresses[i]))
+        out['bit'].append(-1)
+        out['class'].append(_family(names))
+        out['candidates'].append('|'.join(sorted(names)))
+
+    # Remaining words bit by bit, one dictionary lookup per distinct signature
+    words = np.flatnonzero(~is_word)
+    bits = _bit_matrix(syndromes[words])            # (w, 16, reads)
+    w, b = np.nonzero(bits.any(axis=2))
+    packed = np.packbits(bits[w, b], axis=1)
+    keys = np.concatenate([b[:, None].astype(np.uint8), packed], axis=1)
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    labels = []
+    for row in unique:
+        names = bit_dict.get((int(row[0]), row[1:].tobytes()))
+        labels.append(('unclassified', '') if names is None
+                      else (_family(names), '|'.join(sorted(names))))
+    for i, j in enumerate(inverse.reshape(-1)):
+        out['address'].append(int(result.addresses[words[w[i]]]))
+        out['bit'].append(int(b[i]))
+        out['class'].append(labels[j][0])
+        out['candidates'].append(labels[j][1])
+    return out
+
+
+def inject_random_faults(model, count, start=0, stop=None, seed=0):
+    """Sprinkle count random faults of every class into a MemoryModel."""
+    rng = np.random.default_rng(seed)
+    stop = len(model) if stop is None else stop
+    injected = []
+    for k in range(count):
+        kind = FAULT_CLASSES[k % len(FAULT_CLASSES)]
+        address = int(rng.integers(start, stop))
+        bit = int(rng.integers(WORD_BITS))
+        if kind == 'stuck-at':
+            model.add_stuck_at(address, bit, int(rng.integers(2)))
+        elif kind == 'transition':
+            model.add_transition(address, bit, ('up', 'down')[rng.integers(2)])
+        elif kind == 'coupling':
+            victim = int(rng.integers(start, stop))
+            while victim == address:
+                victim = int(rng.integers(start, stop))
+            model.add_coupling(address, bit, ('up', 'down')[rng.integers(2)],
+                               victim, bit, ('invert', 0, 1)[rng.integers(3)])
+        else:
+            other = int(rng.integers(start, stop))
+            model.add_decoder_fault(address, [other])
+        injected.append((kind, address, bit))
+    return injected
@@ -0,0 +1,166 @@
+"""Acquisition metrics: where the time on the serial link goes.
+
+Client records every command's round trip (last transmission to ack) in a
+log-binned latency histogram per command type, and counts resends,
+timeouts, commands that exhausted their retries, CRC mismatches and late
+acks -- everything the sketch's RETRY_COUNT loop absorbs silently.
+`as_dict()` / `save()` export a run as JSON so baud rate, timeout and
+window settings can be compared between runs.
+"""
+
+import json
+import math
+import os
+import tempfile
+import time
+from collections import Counter
+
+# Latency bins: PER_DECADE log-spaced bins from LATENCY_MIN over DECADES
+# decades (10 µs - 10 s), plus an underflow and an overflow bin
+LATENCY_MIN = 1e-5
+DECADES = 6
+PER_DECADE = 10
+
+METRICS_SUFFIX = '.metrics.json'
+
+COMMAND_NAMES = {ord('W'): 'W', ord('R'): 'R', ord('B'): 'B'}
+
+
+class LatencyHistogram:
+    """Log-binned histogram of durations in seconds."""
+
+    def __init__(self):
+        self.counts = [0] * (DECADES * PER_DECADE + 2)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        if seconds < LATENCY_MIN:
+            b = 0
+        else:
+            b = 1 + int(math.log10(seconds / LATENCY_MIN) * PER_DECADE)
+            b = min(b, len(self.counts) - 1)
+        self.counts[b] += 1
+        self.n += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @staticmethod
+    def edges():
+        """Upper edge of every bin but the overflow bin."""
+        return [LATENCY_MIN * 10 ** (k / PER_DECADE)
+                for k in range(DECADES * PER_DECADE + 1)]
+
+    def quantile(self, q):
+        """Upper edge of the bin holding quantile q (max for overflow)."""
+        if not self.n:
+            return None
+        target = q * self.n
+        seen = 0
+        edges = self.edges()
+        for b, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return edges[b] if b < len(edges) else self.max
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.n,
+            'mean_s': self.total / self.n if self.n else None,
+            'p50_s': self.quantile(0.50),
+            'p90_s': self.quantile(0.90),
+            'p99_s': self.quantile(0.99),
+            'max_s': self.max if self.n else None,
+            'bin_edges_s': self.edges(),
+            'counts': list(self.counts),
+        }
+
+
+class AcquisitionMetrics:
+    """Counters and latency histograms of one acquisition run."""
+
+    def __init__(self, **settings):
+        self.settings = settings  # baud rate, window, timeout, ...
+        self.started = time.time()
+        self._clock = time.monotonic()
+        self.latency = {}
+        self.commands = {}
+        self.counts = Counter()
+
+    def _command(self, cmd):
+        name = COMMAND_NAMES.get(cmd, str(cmd))
+        if name not in self.commands:
+            self.commands[name] = Counter()
+            self.latency[name] = LatencyHistogram()
+        return name
+
+    def sent(self, cmd, resend=False):
+        name = self._command(cmd)
+        self.commands[name]['sent'] += 1
+        if resend:
+            self.commands[name]['retries'] += 1
+
+    def timed_out(self, cmd):
+        self.commands[self._command(cmd)]['timeouts'] += 1
+
+    def completed(self, cmd, seconds):
+        name = self._command(cmd)
+        self.commands[name]['ok'] += 1
+        self.latency[name].add(seconds)
+
+    def failed(self, cmd):
+        self.commands[self._command(cmd)]['failed'] += 1
+
+    def count(self, **counts):
+        """Add to free-form counters (crc_ack, late_acks, words, ...)."""
+        self.counts.update(counts)
+
+    @property
+    def elapsed(self):
+        return time.monotonic() - self._clock
+
+    def as_dict(self):
+        elapsed = self.elapsed
+        words = self.counts.get('words', 0)
+        return {
+            'started': self.started,
+            'elapsed_s': elapsed,
+            'settings': self.settings,
+            'words': words,
+            'words_per_s': words / elapsed if elapsed > 0 else None,
+            'counters': dict(self.counts),
+            'commands': {name: dict(counter, latency=self.latency[name]
+                                    .as_dict())
+                         for name, counter in self.commands.items()},
+        }
+
+    def summary(self):
+        """One line for the end of a run."""
+        d = self.as_dict()
+        parts = [f"{d['words']} words in {d['elapsed_s']:.1f}s "
+                 f"({d['words_per_s'] or 0:.0f} words/s)"]
+        for name, c in sorted(d['commands'].items()):
+            p50, p99 = c['latency']['p50_s'], c['latency']['p99_s']
+            lat = f', p50 {1e3 * p50:.2f}ms p99 {1e3 * p99:.2f}ms' \
+                if p50 is not None else ''
+            parts.append(f"{name}: {c.get('ok', 0)} ok, "
+                         f"{c.get('retries', 0)} retries, "
+                         f"{c.get('timeouts', 0)} timeouts, "
+                         f"{c.get('failed', 0)} failed{lat}")
+        crc = sum(v for k, v in self.counts.items() if k.startswith('crc_'))
+        parts.append(f'{crc} CRC mismatches')
+        return '; '.join(parts)
+
+    def save(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.as_dict(), f, indent=1)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
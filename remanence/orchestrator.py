@@ -0,0 +1,229 @@
+"""Run acquisitions on several rigs at once.
+
+A campaign plan lists one job per dump, each naming the board, its serial
+port and the conditions the rig is set up for:
+
+    {"output": "campaign", "start": 0, "stop": 4194304, "pattern": 65535,
+     "jobs": [{"board": "rig1", "port": "/dev/ttyACM0",
+               "refresh": "62.5us", "direction": "forward"},
+              {"board": "rig2", "port": "/dev/ttyACM1",
+               "refresh": "125us", "direction": "forward",
+               "temperature_c": 45.0, "voltage_v": 3.3}]}
+
+Jobs on the same port run one after another in that port's worker
+process; different ports run in parallel. Every dump is written to
+`<output>/<board>/<refresh>us_<direction>_<pattern>[_<T>C][_<V>V].rdump`
+with those tags (temperature_c and voltage_v being the measured conditions)
+in its metadata, and one line per finished dump is appended to a shared
+JSON-lines catalog. Running a plan again resumes interrupted dumps and
+skips finished ones.
+"""
+
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .acquire import (DIRECTIONS, Checkpoint, block_acquire,
+                      checkpoint_path, resume_checkpoint, word_acquire)
+from .datasets import DEFAULT_PATTERN, parse_refresh
+from .geometry import CHIP_WORDS
+from .metrics import METRICS_SUFFIX, AcquisitionMetrics
+from .protocol import BAUDRATE
+
+CATALOG_NAME = 'catalog.jsonl'
+
+
+class Catalog:
+    """Append-only JSON-lines record of finished dumps.
+
+    Each entry is written with a single O_APPEND write, so workers in
+    different processes can share one file.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def append(self, entry):
+        line = (json.dumps(entry, sort_keys=True) + '\n').encode()
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def entries(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+
+def _safe(name):
+    return re.sub(r'[^A-Za-z0-9.]+', '_', str(name)).strip('_')
+
+
+def load_plan(path):
+    """Read a plan file and fill every job in with the plan defaults."""
+    with open(path) as f:
+        plan = json.load(f)
+    return expand_plan(plan, os.path.dirname(path))
+
+
+def expand_plan(plan, root='.'):
+    """List of complete job dicts for a plan (see the module docstring)."""
+    defaults = {k: v for k, v in plan.items() if k != 'jobs'}
+    output = os.path.join(root, defaults.pop('output', 'campaign'))
+    jobs = []
+    for job in plan['jobs']:
+        job = dict(defaults, **job)
+        for key in ('board', 'port', 'refresh'):
+            if key not in job:
+                raise ValueError(f'plan job {job} has no {key!r}')
+        refresh = job['refresh']
+        job['refresh_us'] = parse_refresh(refresh) \
+            if isinstance(refresh, str) else float(refresh)
+        job.setdefault('direction', 'forward')
+        if job['direction'] not in DIRECTIONS:
+            raise ValueError(f"plan job {job} has direction "
+                             f"{job['direction']!r}, not one of {DIRECTIONS}")
+        job.setdefault('pattern', DEFAULT_PATTERN)
+        job.setdefault('start', 0)
+        job.setdefault('stop', CHIP_WORDS)
+        job.setdefault('baud', BAUDRATE)
+        job.setdefault('window', 32)
+        job.setdefault('word', False)
+        name = (f"{job['refresh_us']:g}us_{job['direction']}_"
+                f"{job['pattern']:04X}")
+        for key, unit in (('temperature_c', 'C'), ('voltage_v', 'V')):
+            if job.get(key) is not None:
+                name += f'_{job[key]:g}{unit}'
+        job.setdefault('path', os.path.join(output, _safe(job['board']),
+                                            name + '.rdump'))
+        job.setdefault('catalog', os.path.join(output, CATALOG_NAME))
+        jobs.append(job)
+    return jobs
+
+
+def run_job(job, client):
+    """Acquire one dump on an open client; return its catalog entry, or
+    None if the dump was already complete."""
+    from .store import create_dump_store, open_dump_store
+
+    path = job['path']
+    if os.path.exists(path):
+        store = open_dump_store(path, mode='r+')
+        checkpoint = resume_checkpoint(store)
+        if not len(checkpoint.missing()):
+            return None
+    else:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        store = create_dump_store(
+            path, words=job['stop'] - job['start'], base=job['start'],
+            refresh_us=job['refresh_us'], direction=job['direction'],
+            pattern=job['pattern'], board=job['board'],
+            temperature_c=job.get('temperature_c'),
+            voltage_v=job.get('voltage_v'))
+        checkpoint = Checkpoint(checkpoint_path(path), store.base,
+                                store.base + len(store))
+
+    started = time.time()
+    client.metrics = AcquisitionMetrics(**client.metrics.settings)
+    acquire = word_acquire if job['word'] else block_acquire
+    result = acquire(client, store, checkpoint=checkpoint,
+                     direction=job['direction'])
+    elapsed = time.time() - started
+    store.update_metadata(acquired=started)
+    client.metrics.save(path + METRICS_SUFFIX)
+    return {
+        'board': job['board'],
+        'port': job['port'],
+        'refresh_us': job['refresh_us'],
+        'direction': job['direction'],
+        'pattern': job['pattern'],
+        'temperature_c': job.get('temperature_c'),
+        'voltage_v': job.get('voltage_v'),
+        'path': path,
+        'start': store.base,
+        'stop': store.base + len(store),
+        'coverage': store.coverage(),
+        'failed': len(result['failed']),
+        'started': started,
+        'elapsed': elapsed,
+        'words_per_s': client.metrics.as_dict()['words_per_s'],
+        'metrics': path + METRICS_SUFFIX,
+    }
+
+
+def _error_entry(job, exc):
+    return {'board': job['board'], 'port': job['port'],
+            'refresh_us': job['refresh_us'], 'direction': job['direction'],
+            'path': job['path'], 'error': f'{type(exc).__name__}: {exc}'}
+
+
+def run_port(jobs):
+    """Worker: run every job for one serial port in order.
+
+    Errors are recorded in the catalog instead of raised, so a dead rig
+    does not stop the others.
+    """
+    from .host import Client, open_serial
+
+    first = jobs[0]
+    try:
+        client = Client(open_serial(first['port'], first['baud']),
+                        window=first['window'])
+    except Exception as exc:
+        client, error = None, exc
+    entries = []
+    for job in jobs:
+        if client is None:
+            entry = _error_entry(job, error)
+        else:
+            try:
+                entry = run_job(job, client)
+            except Exception as exc:
+                entry = _error_entry(job, exc)
+        if entry is None:
+            continue
+        Catalog(job['catalog']).append(entry)
+        entries.append(entry)
+    return entries
+
+
+def by_port(jobs):
+    """Group jobs per serial port, keeping plan order within each port."""
+    ports = {}
+    for job in jobs:
+        ports.setdefault(job['port'], []).append(job)
+    return list(ports.values())
+
+
+def orchestrate(jobs, report=print):
+    """Run jobs with one worker process per port; return catalog entries
+    in completion order."""
+    groups = by_port(jobs)
+    if not groups:
+        return []
+    for job in jobs:
+        os.makedirs(os.path.dirname(job['catalog']) or '.', exist_ok=True)
+    entries = []
+    with ProcessPoolExecutor(max_workers=len(groups)) as pool:
+        futures = [pool.submit(run_port, group) for group in groups]
+        for future in as_completed(futures):
+            for entry in future.result():
+                if report is not None:
+                    report(format_entry(entry))
+                entries.append(entry)
+    return entries
+
+
+def format_entry(entry):
+    head = (f"{entry['board']:>8} {entry['refresh_us']:>7g}us "
+            f"{entry['direction']:9}")
+    if 'error' in entry:
+        return f"{head} FAILED {entry['error']}"
+    return (f"{head} {entry['coverage']}/{entry['stop'] - entry['start']} "
+            f"words in {entry['elapsed']:.1f}s, {entry['failed']} failed "
+            f"-> {entry['path']}")
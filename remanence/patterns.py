@@ -0,0 +1,173 @@
+"""Measured data-pattern sensitivity.
+
+The DUMP scripts used to derive the 0x0000/0xAAAA/0x5555 BER by scaling
+the 0xFFFF result by 0.15/0.45/0.55. pattern_campaign() measures them
+instead. For each pattern it writes the pattern over the range through the
+pipelined client, waits, and block-reads the range back into its own
+.rdump, tagged with that pattern. pattern_ber() then analyses any set of
+such dumps, one worker per dump, and pools the results per pattern.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from .acquire import Checkpoint, block_acquire, checkpoint_path
+from .analysis import load_entries
+from .datasets import discover
+from .flips import lane_flips, popcount
+from .geometry import CHIP_WORDS, WORD_BITS
+from .store import create_dump_store
+
+PATTERNS = (0xFFFF, 0x0000, 0xAAAA, 0x5555)
+
+WRITE_BATCH = 1 << 16
+
+
+def write_pattern(client, pattern, start, stop, batch=WRITE_BATCH, passes=2):
+    """Write pattern to [start, stop) with pipelined W commands; return the
+    addresses whose writes never got acknowledged."""
+    failed = []
+    for lo in range(start, stop, batch):
+        addresses = np.arange(lo, min(lo + batch, stop), dtype=np.uint32)
+        ok = client.write_many(addresses, pattern)
+        for _ in range(passes - 1):
+            retry = np.flatnonzero(~ok)
+            if not len(retry):
+                break
+            ok[retry] = client.write_many(addresses[retry], pattern)
+        failed.extend(int(a) for a in addresses[~ok])
+    return failed
+
+
+def pattern_campaign(client, outdir, patterns=PATTERNS, start=0, stop=CHIP_WORDS,
+                     wait_s=0.0, report=print, direction='forward', **meta):
+    """Write, wait and dump every pattern; return the store paths.
+
+    Dumps are read in `direction` order; it and `meta` (refresh_us,
+    board, ...) are recorded in each store.
+    """
+    os.makedirs(outdir, exist_ok=True)
+    paths = []
+    for pattern in patterns:
+        path = os.path.join(outdir, f'pattern_{pattern:04X}.rdump')
+        failed_writes = write_pattern(client, pattern, start, stop)
+        written = time.time()
+        if wait_s:
+            time.sleep(wait_s)
+        store = create_dump_store(path, words=stop - start, base=start,
+                                  pattern=pattern, written=written,
+                                  wait_s=wait_s,
+                                  failed_writes=len(failed_writes),
+                                  direction=direction, **meta)
+        checkpoint = Checkpoint(checkpoint_path(path), start, stop)
+        result = block_acquire(client, store, checkpoint=checkpoint,
+                               direction=direction)
+        if report is not None:
+            report(f'0x{pattern:04X}: {len(failed_writes)} failed writes, '
+                   f'{store.coverage()} / {len(store)} words read -> {path}')
+        if result['failed']:
+            report(f'  {len(result["failed"])} chunks never arrived intact')
+        paths.append(path)
+    return paths
+
+
+def measure_pattern(dataset):
+    """Flip counts of one dump against the pattern it was written with.
+
+    Every entry is compared with one vectorized XOR; flips are split by
+    direction, since true cells decay 1->0 and anti cells 0->1.
+    """
+    addresses, values = load_entries(dataset)
+    pattern = np.uint16(dataset.pattern)
+    values = np.asarray(values, dtype=np.uint16)
+    fell = popcount(pattern & ~values)  # 1 -> 0
+    rose = popcount(~pattern & values)  # 0 -> 1
+    ones = int(popcount(np.array([pattern]))[0])
+    words = dataset.total_words
+    return {
+        'dataset': dataset.as_dict(),
+        'pattern': int(pattern),
+        'words': words,
+        'error_words': int(np.count_nonzero(fell + rose)),
+        'one_to_zero': int(fell.sum(dtype=np.int64)),
+        'zero_to_one': int(rose.sum(dtype=np.int64)),
+        'ones_written': ones * words,
+        'zeros_written': (WORD_BITS - ones) * words,
+        'lane_flips': lane_flips(values, int(pattern)),
+    }
+
+
+def pattern_ber(datasets, map_func=map):
+    """Per-pattern BER pooled over every dump written with that pattern.
+
+    Returns rows sorted by pattern with the raw counts and
+    `ber` (flipped bits / bits), `ber_one_to_zero` (per 1 written) and
+    `ber_zero_to_one` (per 0 written).
+    """
+    results = list(map_func(measure_pattern, list(datasets)))
+    pooled = {}
+    for r in results:
+        row = pooled.setdefault(r['pattern'], {
+            'pattern': r['pattern'], 'runs': 0, 'words': 0, 'error_words': 0,
+            'one_to_zero': 0, 'zero_to_one': 0, 'ones_written': 0,
+            'zeros_written': 0, 'lane_flips': np.zeros(WORD_BITS, np.int64),
+            'datasets': []})
+        row['runs'] += 1
+        for key in ('words', 'error_words', 'one_to_zero', 'zero_to_one',
+                    'ones_written', 'zeros_written'):
+            row[key] += r[key]
+        row['lane_flips'] = row['lane_flips'] + r['lane_flips']
+        row['datasets'].append(r['dataset']['name'])
+    rows = []
+    for pattern in sorted(pooled, reverse=True):
+        row = pooled[pattern]
+        flips = row['one_to_zero'] + row['zero_to_one']
+        row['flips'] = flips
+        row['ber'] = flips / (row['words'] * WORD_BITS) if row['words'] else 0.0
+        row['ber_one_to_zero'] = (row['one_to_zero'] / row['ones_written']
+                                  if row['ones_written'] else None)
+        row['ber_zero_to_one'] = (row['zero_to_one'] / row['zeros_written']
+                                  if row['zeros_written'] else None)
+        rows.append(row)
+    return rows
+
+
+def campaign_dumps(capture, campaign):
+    """{pattern: [datasets]} of the pattern campaign dumps under the
+    directory `campaign` (see pattern_campaign()); `capture` stands in
+    for its own pattern when the campaign has no dump of it."""
+    dumps = {}
+    if campaign is not None and os.path.isdir(campaign):
+        for dataset in discover(campaign):
+            dumps.setdefault(dataset.pattern, []).append(dataset)
+    dumps.setdefault(capture.pattern, [capture])
+    return dumps
+
+
+def capture_pattern_ber(capture, campaign, patterns=PATTERNS):
+    """pattern_ber() of each of `patterns` for a capture and its campaign
+    directory (see campaign_dumps()), NaN for patterns never measured."""
+    dumps = campaign_dumps(capture, campaign)
+    return np.array([pattern_ber(dumps[p])[0]['ber'] if p in dumps
+                     else np.nan for p in patterns])
+
+
+def plot_pattern_ber(rows, ax=None):
+    """Bar chart of measured BER per pattern."""
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        ax = plt.figure(figsize=(8, 5)).gca()
+    labels = [f"0x{row['pattern']:04X}" for row in rows]
+    ber = [row['ber'] for row in rows]
+    ax.bar(labels, ber, color='purple')
+    for i, row in enumerate(rows):
+        ax.annotate(f"{row['runs']} run{'s' if row['runs'] != 1 else ''}",
+                    (i, ber[i]), ha='center', va='bottom', fontsize=8)
+    ax.set_title('Measured BER per Data Pattern')
+    ax.set_xlabel('Data Pattern')
+    ax.set_ylabel('Bit Error Rate')
+    ax.grid(True, alpha=0.3)
+    return ax
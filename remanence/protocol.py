@@ -0,0 +1,192 @@
+"""The 8-byte UART command frame spoken by `SDRAM_Data_Remanence.ino`.
+
+Command (host -> device), as built by `sendCommand`:
+
+    cmd  addr[23:16] addr[15:8] addr[7:0]  data[15:8] data[7:0]  crc8  seq
+
+`crc8` (poly 0x07, init 0) covers the first six bytes. The device answers
+every command it accepts with a 3-byte ack, `cmd seq crc8(cmd, seq)`, and
+an `R` command's ack is followed by the 2-byte big-endian word
+(`readResponse`). The sketch only checks the ack CRC; echoing the command
+and sequence byte lets a host keep several commands in flight and match
+each ack to its command.
+"""
+
+import struct
+
+import numpy as np
+
+FRAME_SIZE = 8
+ACK_SIZE = 3
+WORD_SIZE = 2
+
+CMD_WRITE = ord('W')
+CMD_READ = ord('R')
+CMD_BLOCK = ord('B')
+CHUNK_TAG = ord('C')
+
+# Block read: `B` with the start address and the number of chunks in the
+# data field. After the ack the device streams that many chunks of
+#     'C' addr[23:16] addr[15:8] addr[7:0]  CHUNK_WORDS big-endian words  crc8
+# with the CRC over everything before it.
+CHUNK_WORDS = 256
+CHUNK_SIZE = 4 + 2 * CHUNK_WORDS + 1
+MAX_BLOCK_CHUNKS = 0xFFFF
+
+BAUDRATE = 115200
+CMD_TIMEOUT = 0.150  # seconds, CMD_TIMEOUT in the sketch
+RETRY_COUNT = 8
+
+CRC8_POLY = 0x07
+
+
+def _crc8_table(poly=CRC8_POLY):
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return bytes(table)
+
+
+CRC8_TABLE = _crc8_table()
+
+
+def crc8(data, crc=0):
+    """Table-driven equivalent of the sketch's bitwise crc8()."""
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+
+CRC8_TABLE_NP = np.frombuffer(CRC8_TABLE, dtype=np.uint8)
+
+
+def crc8_rows(frames, length=None):
+    """crc8 of the first `length` bytes of every row of a uint8 matrix.
+
+    One table gather per column validates millions of frames at once.
+    """
+    frames = np.asarray(frames, dtype=np.uint8)
+    length = frames.shape[1] if length is None else length
+    crc = np.zeros(frames.shape[0], dtype=np.uint8)
+    for col in range(length):
+        crc = CRC8_TABLE_NP[crc ^ frames[:, col]]
+    return crc
+
+
+def as_frames(buffer, size):
+    """View back-to-back frames (bytes or a flat array) as an (n, size) matrix."""
+    if isinstance(buffer, np.ndarray) and buffer.ndim == 2:
+        return buffer
+    data = np.frombuffer(buffer, dtype=np.uint8) \
+        if not isinstance(buffer, np.ndarray) else buffer
+    if len(data) % size:
+        raise FrameError(f'buffer is not a whole number of {size}-byte frames')
+    return data.reshape(-1, size)
+
+
+def bad_commands(frames):
+    """Mask of command frames whose CRC byte does not match."""
+    frames = as_frames(frames, FRAME_SIZE)
+    return crc8_rows(frames, 6) != frames[:, 6]
+
+
+def bad_acks(frames):
+    """Mask of acks whose CRC byte does not match."""
+    frames = as_frames(frames, ACK_SIZE)
+    return crc8_rows(frames, 2) != frames[:, 2]
+
+
+def encode_commands(cmds, addresses, data=0, seqs=0):
+    """(n, 8) uint8 matrix of command frames, built and CRC'd in bulk."""
+    addresses = np.asarray(addresses, dtype=np.uint32)
+    n = len(addresses)
+    frames = np.empty((n, FRAME_SIZE), dtype=np.uint8)
+    frames[:, 0] = np.broadcast_to(np.asarray(cmds, dtype=np.uint8), (n,))
+    frames[:, 1] = addresses >> 16
+    frames[:, 2] = addresses >> 8
+    frames[:, 3] = addresses
+    data = np.broadcast_to(np.asarray(data, dtype=np.uint16), (n,))
+    frames[:, 4] = data >> 8
+    frames[:, 5] = data
+    frames[:, 6] = crc8_rows(frames, 6)
+    frames[:, 7] = np.broadcast_to(np.asarray(seqs, dtype=np.uint8), (n,))
+    return frames
+
+
+def encode_chunks(start, words, chunk_words=CHUNK_WORDS):
+    """Chunk frames for consecutive words starting at address start."""
+    words = np.asarray(words, dtype='>u2').reshape(-1, chunk_words)
+    n = len(words)
+    frames = np.empty((n, 4 + 2 * chunk_words + 1), dtype=np.uint8)
+    addr = start + np.arange(n, dtype=np.uint32) * chunk_words
+    frames[:, 0] = CHUNK_TAG
+    frames[:, 1] = addr >> 16
+    frames[:, 2] = addr >> 8
+    frames[:, 3] = addr
+    frames[:, 4:-1] = words.view(np.uint8).reshape(n, -1)
+    frames[:, -1] = crc8_rows(frames, frames.shape[1] - 1)
+    return frames
+
+
+def decode_chunks(frames, chunk_words=CHUNK_WORDS):
+    """Validate chunk frames in bulk.
+
+    Returns (addresses, words, ok): the start address of each chunk, an
+    (n, chunk_words) uint16 matrix and a mask of chunks that passed their
+    tag and CRC check.
+    """
+    frames = as_frames(frames, 4 + 2 * chunk_words + 1)
+    ok = (frames[:, 0] == CHUNK_TAG) & \
+        (crc8_rows(frames, frames.shape[1] - 1) == frames[:, -1])
+    addr = (frames[:, 1].astype(np.uint32) << 16) | \
+        (frames[:, 2].astype(np.uint32) << 8) | frames[:, 3]
+    words = np.ascontiguousarray(frames[:, 4:-1]).view('>u2').astype(np.uint16)
+    return addr, words, ok
+
+
+class FrameError(ValueError):
+    """A frame failed its CRC or is malformed."""
+
+
+_COMMAND = struct.Struct('>B3sH')
+
+
+def encode_command(cmd, addr, data=0, seq=0):
+    if isinstance(cmd, str):
+        cmd = ord(cmd)
+    head = _COMMAND.pack(cmd, (addr & 0xFFFFFF).to_bytes(3, 'big'),
+                         data & 0xFFFF)
+    return head + bytes((crc8(head), seq & 0xFF))
+
+
+def decode_command(frame):
+    """(cmd, addr, data, seq) of an 8-byte command frame."""
+    if len(frame) != FRAME_SIZE:
+        raise FrameError(f'command frame must be {FRAME_SIZE} bytes')
+    if crc8(frame[:6]) != frame[6]:
+        raise FrameError('command CRC mismatch')
+    cmd, addr, data = _COMMAND.unpack(frame[:6])
+    return cmd, int.from_bytes(addr, 'big'), data, frame[7]
+
+
+def encode_ack(cmd, seq):
+    head = bytes((cmd & 0xFF, seq & 0xFF))
+    return head + bytes((crc8(head),))
+
+
+def decode_ack(ack):
+    """(cmd, seq) of a 3-byte ack."""
+    if len(ack) != ACK_SIZE or crc8(ack[:2]) != ack[2]:
+        raise FrameError('ack CRC mismatch')
+    return ack[0], ack[1]
+
+
+def encode_word(value):
+    return (value & 0xFFFF).to_bytes(2, 'big')
+
+
+def decode_word(data):
+    return int.from_bytes(data, 'big')
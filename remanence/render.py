@@ -0,0 +1,232 @@
+"""Headless figure rendering.
+
+Figures are drawn on bare `matplotlib.figure.Figure` objects with the Agg
+canvas, never through pyplot, so nothing blocks on `plt.show()` and no
+display is needed. Each worker process keeps one Figure per template and
+clears it between datasets instead of building a new one.
+"""
+
+import os
+import re
+from functools import partial
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MaxNLocator
+
+DPI = 300
+
+# Above this many points the stem plot gives way to the binned flip map
+STEM_LIMIT = 5000
+
+HEX_FORMATTER = FuncFormatter(lambda x, _: f'0x{int(x):X}')
+
+_figures = {}
+
+
+def figure(name, figsize):
+    """Cleared, reusable Figure for the template called name."""
+    fig = _figures.get(name)
+    if fig is None or tuple(fig.get_size_inches()) != figsize:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        _figures[name] = fig
+    else:
+        fig.clf()
+    return fig
+
+
+def hex_axis(ax, ticks=10):
+    ax.xaxis.set_major_locator(MaxNLocator(ticks, integer=True))
+    ax.xaxis.set_major_formatter(HEX_FORMATTER)
+
+
+def _title_suffix(ds):
+    refresh = ds['refresh_us']
+    refresh = f'{refresh:g}µs' if refresh is not None else 'unknown refresh'
+    return f"{ds['direction'].capitalize()}, {refresh}"
+
+
+def bin_flips(addresses, flips, start, stop, bins):
+    """Reduce per-address flips to `bins` equal address buckets.
+
+    Returns (edges, minimum, maximum, total); buckets without any listed
+    address have minimum and maximum 0.
+    """
+    addresses = np.asarray(addresses, dtype=np.int64)
+    flips = np.asarray(flips)
+    if len(addresses) > 1 and np.any(addresses[1:] < addresses[:-1]):
+        order = np.argsort(addresses, kind='stable')
+        addresses, flips = addresses[order], flips[order]
+    edges = np.linspace(start, stop, bins + 1)
+    bucket = ((addresses - start) * bins // max(stop - start, 1)).clip(0, bins - 1)
+    minimum = np.zeros(bins, dtype=flips.dtype)
+    maximum = np.zeros(bins, dtype=flips.dtype)
+    total = np.bincount(bucket, weights=flips, minlength=bins)
+    if len(bucket):
+        # Sorted addresses give contiguous buckets: reduce over each segment
+        first = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        minimum[bucket[first]] = np.minimum.reduceat(flips, first)
+        maximum[bucket[first]] = np.maximum.reduceat(flips, first)
+    return edges, minimum, maximum, total
+
+
+def draw_flip_map(result, fig=None, bins=None):
+    """Binned bit-flip map for large address ranges.
+
+    The address axis is cut into roughly one bucket per output pixel. The
+    per-bucket min-max range is one LineCollection and the flips per
+    bucket an image strip, so cost no longer grows with the number of
+    addresses.
+    """
+    fig = fig or figure('flip_map', (12, 6))
+    ds = result['dataset']
+    entries = result['entries']
+    start, stop = ds['start'], ds['end'] + 1
+    if bins is None:
+        bins = int(min(stop - start, fig.get_figwidth() * DPI))
+    edges, low, high, total = bin_flips(entries['addresses'], entries['flips'],
+                                        start, stop, bins)
+    centres = (edges[:-1] + edges[1:]) / 2
+
+    ax, strip = fig.subplots(2, 1, sharex=True,
+                             gridspec_kw={'height_ratios': [5, 1]})
+    segments = np.stack([np.column_stack([centres, low]),
+                         np.column_stack([centres, high])], axis=1)
+    ax.add_collection(LineCollection(segments[high > 0], colors='g',
+                                     linewidths=0.8))
+    ax.set_ylim(0, 16.5)
+    ax.set_title(f'Bit-Flip Map ({_title_suffix(ds)}, '
+                 f'{(stop - start) / bins:.3g} addresses/bucket)', fontsize=14)
+    ax.set_ylabel('Bit Flips (min-max per bucket)', fontsize=12)
+    ax.grid(True, alpha=0.3)
+
+    strip.imshow(total[None, :], aspect='auto', cmap='inferno',
+                 interpolation='nearest', extent=(start, stop, 0, 1))
+    strip.set_yticks([])
+    strip.set_xlabel('Memory Address (Hex)', fontsize=12)
+    strip.set_xlim(start, stop)
+    hex_axis(strip)
+    return fig
+
+
+def draw_bit_flips(result, fig=None):
+    """Stem plot of bit flips per listed address (the "bit flips" figure).
+
+    Falls back to draw_flip_map() when there are too many addresses for
+    one artist per point.
+    """
+    entries = result['entries']
+    if len(entries['addresses']) > STEM_LIMIT:
+        return draw_flip_map(result, fig or figure('bit_flips', (12, 6)))
+    fig = fig or figure('bit_flips', (12, 6))
+    ds, st = result['dataset'], result['stats']
+    ax = fig.add_subplot()
+    if len(entries['addresses']):
+        _, stemlines, _ = ax.stem(entries['addresses'], entries['flips'],
+                                  linefmt='g-', markerfmt=' ', basefmt='k-')
+        stemlines.set_linewidth(0.5)
+        ax.set_xlim(ds['start'], ds['end'])
+    ax.set_title(f'Bit Flips vs. Memory Address ({_title_suffix(ds)})',
+                 fontsize=14)
+    ax.set_xlabel('Memory Address (Hex)', fontsize=12)
+    ax.set_ylabel('Bit Flips', fontsize=12)
+    ax.grid(True, alpha=0.3)
+    hex_axis(ax)
+    if st['max_address'] is not None:
+        fig.text(0.99, 0.01, f"Max Bit Flips: {st['max_flips']} at "
+                 f"0x{st['max_address']:X}", fontsize=9, ha='right')
+    return fig
+
+
+def draw_adjacency(result, fig=None):
+    """Adjacent flipped-bit pairs per erroneous word."""
+    fig = fig or figure('adjacency', (12, 6))
+    errors = result['errors']
+    ax = fig.add_subplot()
+    ax.vlines(errors['addresses'], 0, errors['pairs'], color='orange',
+              linewidth=2)
+    ax.set_ylim(bottom=0)
+    ax.set_title('Adjacency Bit-Flip Count per Address (within 16-bit word) - '
+                 + _title_suffix(result['dataset']))
+    ax.set_xlabel('Address')
+    ax.set_ylabel('Number of Adjacent Bit-Flips')
+    ax.grid(True, alpha=0.3)
+    hex_axis(ax)
+    return fig
+
+
+def draw_bursts(result, fig=None):
+    """Histogram of flipped-bit burst lengths within words."""
+    fig = fig or figure('bursts', (8, 5))
+    bursts = np.asarray(result['adjacency']['bursts'])
+    ax = fig.add_subplot()
+    ax.bar(np.arange(1, len(bursts)), bursts[1:], color='purple')
+    ax.set_title('Flipped-Bit Burst Lengths - ' + _title_suffix(result['dataset']))
+    ax.set_xlabel('Consecutive Flipped Bits')
+    ax.set_ylabel('Bursts')
+    ax.set_xticks(range(1, len(bursts)))
+    ax.grid(True, alpha=0.3)
+    return fig
+
+
+def draw_lanes(result, fig=None):
+    """Flips per DQ bit lane."""
+    fig = fig or figure('lanes', (8, 5))
+    lanes = np.asarray(result['stats']['lane_flips'])
+    ax = fig.add_subplot()
+    ax.bar([f'DQ{i}' for i in range(len(lanes))], lanes, color='skyblue')
+    ax.set_title('Bit Flips per Data Lane - ' + _title_suffix(result['dataset']))
+    ax.set_xlabel('Data Lane')
+    ax.set_ylabel('Bit Flips')
+    ax.tick_params(axis='x', rotation=45)
+    ax.grid(True, alpha=0.3)
+    return fig
+
+
+TEMPLATES = {
+    'bit_flips': draw_bit_flips,
+    'flip_map': draw_flip_map,
+    'adjacency': draw_adjacency,
+    'bursts': draw_bursts,
+    'lanes': draw_lanes,
+}
+
+
+def slug(name):
+    return re.sub(r'[^A-Za-z0-9.]+', '_', name).strip('_')
+
+
+def save(fig, path, dpi=DPI):
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi)
+
+
+def render_result(result, outdir, templates=None, dpi=DPI):
+    """Write every template's figure for one analysis result."""
+    target = os.path.join(outdir, slug(result['dataset']['name']))
+    os.makedirs(target, exist_ok=True)
+    written = []
+    for name in templates or TEMPLATES:
+        path = os.path.join(target, name + '.png')
+        save(TEMPLATES[name](result), path, dpi)
+        written.append(path)
+    return written
+
+
+def render_dataset(dataset, outdir, cache=None, templates=None, dpi=DPI):
+    """Analyse (through the cache) and render one dataset in a worker."""
+    from .analysis import analyze_cached
+
+    return render_result(analyze_cached(dataset, cache), outdir, templates,
+                         dpi)
+
+
+def render_all(datasets, outdir, cache=None, templates=None, dpi=DPI,
+               map_func=map):
+    """Render all datasets, fanned out with map_func (e.g. a process pool)."""
+    work = partial(render_dataset, outdir=outdir, cache=cache,
+                   templates=templates, dpi=dpi)
+    return [path for paths in map_func(work, datasets) for path in paths]
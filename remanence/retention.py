@@ -0,0 +1,391 @@
+"""Retention-time models fitted to refresh sweeps under measured conditions.
+
+Section 5 of the DUMP scripts plotted invented exp() curves against supply
+voltage and temperature. Here every capture is one point of a refresh
+sweep: the fraction of written bits that flipped at its refresh period t.
+Within one condition (board, direction, temperature, voltage) cell
+retention times are taken as log-normal, so that fraction is
+
+    F(t) = Phi((ln t - mu) / sigma)          (t in µs, as in the simulator)
+
+and mu, sigma come from a binomial maximum-likelihood fit (probit IRLS,
+started from least squares on probit(k / n) against ln t), run for every
+condition at once on padded (condition, refresh) arrays. Across conditions
+mu carries the physics, fitted as weighted least-squares lines (weights
+1 / se(mu)^2), again all groups at once:
+
+    Arrhenius   mu(T) = ln tau0 + Ea / (k_B T)    per board, direction, voltage
+    voltage     mu(V) = mu0 + beta V              per board, direction, temperature
+
+Counting the flips of each capture is the expensive part; it goes through
+map_func, one worker per capture, and an optional ResultCache.
+"""
+
+import math
+import os
+from functools import partial
+
+import numpy as np
+
+from .cache import DEFAULT_DIR, ResultCache
+from .datasets import discover
+from .geometry import WORD_BITS
+from .patterns import measure_pattern
+from .simulator import BOLTZMANN_EV, norm_cdf, norm_ppf
+
+KELVIN = 273.15
+
+CONDITION_KEYS = ('board', 'direction', 'temperature_c', 'voltage_v')
+
+# Probabilities are kept this far from 0 and 1 inside the fits
+EPS = 1e-12
+
+
+def measure(dataset):
+    """Flipped and tested bits of one capture, with its conditions."""
+    counts = measure_pattern(dataset)
+    return {
+        'dataset': counts['dataset'],
+        'flips': counts['one_to_zero'] + counts['zero_to_one'],
+        'bits': counts['words'] * WORD_BITS,
+    }
+
+
+def measure_cached(dataset, cache=None):
+    """measure() through a ResultCache, when one is given."""
+    if cache is None:
+        return measure(dataset)
+    params = {k: v for k, v in dataset.as_dict().items()
+              if k not in ('path', 'name')}
+    result = cache.cached('measure', dataset.path, lambda: measure(dataset),
+                          **params)
+    result['dataset'] = dataset.as_dict()
+    return result
+
+
+def sweep_table(measurements):
+    """Group measurements by condition into padded (C, P) arrays.
+
+    Returns (conditions, refresh_us, flips, bits): one description dict
+    per condition and arrays with one column per refresh period; captures
+    at the same condition and period are pooled, absent cells have 0 bits.
+    """
+    cells = {}
+    for m in measurements:
+        ds = m['dataset']
+        if ds.get('refresh_us') is None:
+            continue
+        key = tuple(ds.get(k) for k in CONDITION_KEYS)
+        cell = cells.setdefault(key, {}).setdefault(ds['refresh_us'], [0, 0, 0])
+        cell[0] += m['flips']
+        cell[1] += m['bits']
+        cell[2] += 1
+    width = max((len(c) for c in cells.values()), default=0)
+    shape = (len(cells), width)
+    refresh = np.ones(shape)
+    flips = np.zeros(shape)
+    bits = np.zeros(shape)
+    conditions = []
+    for i, (key, periods) in enumerate(sorted(cells.items(), key=_order)):
+        for j, period in enumerate(sorted(periods)):
+            refresh[i, j] = period
+            flips[i, j], bits[i, j] = periods[period][:2]
+        conditions.append(dict(zip(CONDITION_KEYS, key),
+                               captures=sum(p[2] for p in periods.values())))
+    return conditions, refresh, flips, bits
+
+
+def _order(item):
+    # Sort conditions with None before any value
+    return tuple((v is not None, v if v is not None else 0) for v in item[0])
+
+
+def _solve_line(x, y, w):
+    # Weighted least squares y = a + b x per row; returns a, b and the
+    # inverse normal matrix entries (var a, var b, cov ab) up to scale
+    s0 = w.sum(axis=1)
+    s1 = (w * x).sum(axis=1)
+    s2 = (w * x * x).sum(axis=1)
+    t0 = (w * y).sum(axis=1)
+    t1 = (w * x * y).sum(axis=1)
+    det = s0 * s2 - s1 * s1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        a = (s2 * t0 - s1 * t1) / det
+        b = (s0 * t1 - s1 * t0) / det
+        return a, b, s2 / det, s0 / det, -s1 / det
+
+
+def _distinct(x, w):
+    # Number of distinct x with non-zero weight per row
+    x = np.where(w > 0, x, np.nan)
+    x = np.sort(x, axis=1)
+    return (np.isfinite(x) & (np.diff(x, axis=1, prepend=np.nan) != 0)).sum(
+        axis=1)
+
+
+def fit_lognormal(refresh_us, flips, bits, iterations=100, tol=1e-10):
+    """Binomial MLE of log-normal retention for every row at once.
+
+    Arguments are (C, P) arrays (bits = 0 marks an absent point). Returns
+    a dict of (C,) arrays: mu, sigma (of ln retention in µs), their
+    standard errors, the log-likelihood, and `valid` (at least two
+    periods, some flips, and a fraction rising with the period).
+    """
+    x = np.log(np.asarray(refresh_us, dtype=np.float64))
+    k = np.asarray(flips, dtype=np.float64)
+    n = np.asarray(bits, dtype=np.float64)
+    present = n > 0
+    rate = np.where(present, k / np.where(present, n, 1), 0.5)
+
+    # Start: least squares of probit(rate) on ln t, weighted by n
+    z = norm_ppf(np.clip((k + 0.5) / (n + 1), EPS, 1 - EPS))
+    a, b = _solve_line(x, z, n)[:2]
+    valid = (_distinct(x, n) >= 2) & (k.sum(axis=1) > 0) & (b > 0)
+    a = np.where(valid, a, 0.0)
+    b = np.where(valid, b, 1.0)
+
+    converged = np.zeros(len(x), dtype=bool)
+    for _ in range(iterations):
+        eta = a[:, None] + b[:, None] * x
+        p = np.clip(norm_cdf(eta), EPS, 1 - EPS)
+        density = np.maximum(np.exp(-0.5 * eta * eta) / math.sqrt(2 * math.pi),
+                             EPS)
+        w = np.where(present, n * density ** 2 / (p * (1 - p)), 0.0)
+        working = eta + (rate - p) / density
+        new_a, new_b, var_a, var_b, cov = _solve_line(x, working, w)
+        ok = valid & np.isfinite(new_a) & np.isfinite(new_b) & (new_b > 0)
+        step = np.abs(new_a - a) + np.abs(new_b - b)
+        a = np.where(ok, new_a, a)
+        b = np.where(ok, new_b, b)
+        converged = ok & (step < tol * (1 + np.abs(a) + np.abs(b)))
+        valid &= ok
+        if converged[valid].all():
+            break
+
+    eta = a[:, None] + b[:, None] * x
+    p = np.clip(norm_cdf(eta), EPS, 1 - EPS)
+    loglik = np.where(present, k * np.log(p) + (n - k) * np.log(1 - p),
+                      0.0).sum(axis=1)
+    mu, sigma = -a / b, 1 / b
+    # Delta method from the (a, b) covariance
+    var_mu = (var_a / b ** 2 + a ** 2 * var_b / b ** 4
+              - 2 * a * cov / b ** 3)
+    nan = np.full(len(x), np.nan)
+    return {
+        'mu': np.where(valid, mu, nan),
+        'sigma': np.where(valid, sigma, nan),
+        'mu_se': np.where(valid, np.sqrt(np.abs(var_mu)), nan),
+        'sigma_se': np.where(valid, np.sqrt(np.abs(var_b)) / b ** 2, nan),
+        'loglik': np.where(valid, loglik, nan),
+        'valid': valid,
+        'converged': converged & valid,
+    }
+
+
+def predicted_ber(refresh_us, mu, sigma):
+    """Fraction of bits failing at refresh_us under a log-normal model."""
+    return norm_cdf((np.log(refresh_us) - np.asarray(mu))
+                    / np.asarray(sigma))
+
+
+def _fit_groups(conditions, fits, along, keys, transform):
+    # Weighted line mu = a + b * transform(condition[along]) per group of
+    # conditions sharing `keys`, all groups solved at once
+    groups = {}
+    for i, cond in enumerate(conditions):
+        if cond[along] is None or not fits['valid'][i]:
+            continue
+        groups.setdefault(tuple(cond[k] for k in keys), []).append(i)
+    if not groups:
+        return []
+    items = sorted(groups.items(), key=_order)
+    width = max(len(members) for _, members in items)
+    x = np.zeros((len(items), width))
+    y = np.zeros_like(x)
+    w = np.zeros_like(x)
+    for g, (_, members) in enumerate(items):
+        x[g, :len(members)] = [transform(conditions[i][along])
+                               for i in members]
+        y[g, :len(members)] = fits['mu'][members]
+        w[g, :len(members)] = 1 / np.maximum(fits['mu_se'][members], EPS) ** 2
+    a, b, var_a, var_b, _ = _solve_line(x, y, w)
+    usable = _distinct(x, w) >= 2
+    results = []
+    for g, (key, members) in enumerate(items):
+        weights = w[g, :len(members)]
+        sigma = float(np.average(fits['sigma'][members], weights=weights))
+        results.append(dict(
+            zip(keys, key), intercept=float(a[g]) if usable[g] else None,
+            slope=float(b[g]) if usable[g] else None,
+            intercept_se=float(np.sqrt(var_a[g])) if usable[g] else None,
+            slope_se=float(np.sqrt(var_b[g])) if usable[g] else None,
+            sigma=sigma, **{along: [conditions[i][along] for i in members]}))
+    return results
+
+
+def _inverse_kt(temperature_c):
+    return 1 / (BOLTZMANN_EV * (temperature_c + KELVIN))
+
+
+def fit_arrhenius(conditions, fits):
+    """mu(T) = ln tau0 + Ea / (k_B T) per board, direction and voltage.
+
+    Each result holds `activation_ev` and `ln_tau0` (None with fewer than
+    two temperatures), their standard errors and the weighted mean sigma.
+    """
+    results = _fit_groups(conditions, fits, 'temperature_c',
+                          ('board', 'direction', 'voltage_v'), _inverse_kt)
+    for r in results:
+        r['activation_ev'] = r.pop('slope')
+        r['activation_ev_se'] = r.pop('slope_se')
+        r['ln_tau0'] = r.pop('intercept')
+        r['ln_tau0_se'] = r.pop('intercept_se')
+    return results
+
+
+def fit_voltage(conditions, fits):
+    """mu(V) = mu0 + beta V per board, direction and temperature."""
+    results = _fit_groups(conditions, fits, 'voltage_v',
+                          ('board', 'direction', 'temperature_c'), float)
+    for r in results:
+        r['beta_per_v'] = r.pop('slope')
+        r['beta_per_v_se'] = r.pop('slope_se')
+        r['mu0'] = r.pop('intercept')
+        r['mu0_se'] = r.pop('intercept_se')
+    return results
+
+
+def fit_retention(datasets, map_func=map, cache=None):
+    """Measure every capture (through map_func and cache) and fit all
+    models.
+
+    Returns {'conditions': [...], 'arrhenius': [...], 'voltage': [...]};
+    each condition carries its sweep points and log-normal fit.
+    """
+    conditions, refresh, flips, bits = sweep_table(
+        map_func(partial(measure_cached, cache=cache), list(datasets)))
+    fits = fit_lognormal(refresh, flips, bits)
+    for i, cond in enumerate(conditions):
+        present = bits[i] > 0
+        cond['refresh_us'] = refresh[i][present].tolist()
+        cond['ber'] = (flips[i][present] / bits[i][present]).tolist()
+        for key in ('mu', 'sigma', 'mu_se', 'sigma_se', 'loglik'):
+            value = fits[key][i]
+            cond[key] = float(value) if np.isfinite(value) else None
+        cond['converged'] = bool(fits['converged'][i])
+    return {
+        'conditions': conditions,
+        'arrhenius': fit_arrhenius(conditions, fits),
+        'voltage': fit_voltage(conditions, fits),
+    }
+
+
+def fit_stress(root, map_func=map, cache=None):
+    """fit_retention() of the captures under root tagged with a measured
+    temperature or supply voltage, the only ones the Arrhenius and voltage
+    fits use."""
+    return fit_retention([d for d in discover(root)
+                          if d.temperature_c is not None
+                          or d.voltage_v is not None], map_func, cache)
+
+
+def _label(entry, keys):
+    parts = []
+    for key in keys:
+        value = entry.get(key)
+        if value is None:
+            continue
+        unit = {'temperature_c': '°C', 'voltage_v': 'V'}.get(key, '')
+        parts.append(f'{value:g}{unit}' if unit else str(value))
+    return ' '.join(parts) or 'all'
+
+
+def plot_retention(model, ax=None):
+    """Measured BER against refresh period with each condition's fit."""
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        ax = plt.figure(figsize=(8, 5)).gca()
+    for cond in model['conditions']:
+        line = ax.plot(cond['refresh_us'], cond['ber'], 'o',
+                       label=_label(cond, CONDITION_KEYS))[0]
+        if cond['mu'] is not None:
+            t = np.geomspace(min(cond['refresh_us']) / 2,
+                             max(cond['refresh_us']) * 2, 100)
+            ax.plot(t, predicted_ber(t, cond['mu'], cond['sigma']),
+                    color=line.get_color())
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.set_title('Log-normal Retention Fits')
+    ax.set_xlabel('Refresh Period (µs)')
+    ax.set_ylabel('Bit Error Rate')
+    ax.grid(True, alpha=0.3)
+    if model['conditions']:
+        ax.legend(fontsize=7)
+    return ax
+
+
+def _stress_panel(ax, model, fits, along, mean, refresh_us, title, xlabel,
+                  keys):
+    # Per-condition fits as markers, the fitted line of mu as a curve
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(f'Bit Error Rate at {refresh_us:g} µs')
+    ax.grid(True, alpha=0.3)
+    if not fits:
+        ax.text(0.5, 0.5, f'no {xlabel.split()[0].lower()}-tagged captures',
+                ha='center', va='center', transform=ax.transAxes)
+        return ax
+    for fit in fits:
+        points = [c for c in model['conditions']
+                  if c['mu'] is not None and c[along] is not None
+                  and all(c[k] == fit[k] for k in keys)]
+        x = np.array([c[along] for c in points], dtype=np.float64)
+        ber = predicted_ber(refresh_us, [c['mu'] for c in points],
+                            [c['sigma'] for c in points])
+        line = ax.plot(x, ber, 'o', label=_label(fit, keys))[0]
+        if fit[mean] is not None:
+            grid = np.linspace(x.min(), x.max(), 100)
+            ax.plot(grid, predicted_ber(refresh_us, fit['curve'](grid),
+                                        fit['sigma']),
+                    color=line.get_color())
+    ax.set_yscale('log')
+    ax.legend(fontsize=7)
+    return ax
+
+
+def plot_stress(model, refresh_us, ax_voltage=None, ax_temperature=None):
+    """BER against supply voltage and temperature at one refresh period,
+    from the fitted voltage and Arrhenius models."""
+    import matplotlib.pyplot as plt
+
+    if ax_voltage is None or ax_temperature is None:
+        fig = plt.figure(figsize=(12, 5))
+        ax_voltage = fig.add_subplot(1, 2, 1)
+        ax_temperature = fig.add_subplot(1, 2, 2)
+    voltage = [dict(f, curve=lambda v, f=f: f['mu0'] + f['beta_per_v'] * v)
+               for f in model['voltage']]
+    arrhenius = [dict(f, curve=lambda t, f=f: f['ln_tau0']
+                      + f['activation_ev'] * _inverse_kt(t))
+                 for f in model['arrhenius']]
+    _stress_panel(ax_voltage, model, voltage, 'voltage_v', 'mu0', refresh_us,
+                  'BER vs Voltage (fitted)', 'Voltage (V)',
+                  ('board', 'direction', 'temperature_c'))
+    _stress_panel(ax_temperature, model, arrhenius, 'temperature_c',
+                  'activation_ev', refresh_us,
+                  'BER vs Temperature (Arrhenius fit)', 'Temperature (°C)',
+                  ('board', 'direction', 'voltage_v'))
+    return ax_voltage, ax_temperature
+
+
+def plot_tree_stress(root, refresh_us, ax_voltage=None, ax_temperature=None,
+                     cache_dir=DEFAULT_DIR):
+    """plot_stress() of fit_stress(root), for the figure scripts.
+
+    Measurements are cached in `cache_dir` under root (None to always
+    recompute), so re-running a script only measures new captures.
+    """
+    cache = None if cache_dir is None else \
+        ResultCache(os.path.join(root, cache_dir))
+    return plot_stress(fit_stress(root, cache=cache), refresh_us,
+                       ax_voltage, ax_temperature)
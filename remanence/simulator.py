@@ -0,0 +1,264 @@
+"""Simulated MT48LC4M16A2 with refresh-dependent data remanence.
+
+Each cell has a retention time drawn from a log-normal distribution whose
+log-mean varies per row (weak rows show up as the clustered runs in the
+125 µs captures). A cell whose retention is shorter than the refresh
+period loses its charge and reads back as its ground state: 0 for true
+cells, 1 for the anti cells. Retention shortens with temperature following
+an Arrhenius factor.
+
+Only cells that can fail at some period up to `max_refresh_us`, at any
+temperature up to `max_temperature_c`, are kept, as flat arrays (address, bit, retention), so building and decaying a
+full-chip image are a handful of vectorized operations. RemanenceDevice
+serves the result through the same frame protocol as ArrayDevice, so it
+can stand in for the board on a pty.
+"""
+
+import math
+
+import numpy as np
+
+from .device import ArrayDevice
+from .geometry import CHIP, WORD_BITS
+
+# ln(retention / µs), fitted so about 0.46% of bits fail at 15.6 µs and
+# 1.9% at 125 µs like the Test/Forward sweep
+RETENTION_MU = 13.0
+RETENTION_SIGMA = 3.95
+ROW_SIGMA = 0.5
+ANTI_CELL_FRACTION = 0.1
+
+REFRESH_PERIODS_US = (15.6, 31.3, 62.5, 125.0)
+
+BOLTZMANN_EV = 8.617333262e-5
+ACTIVATION_EV = 0.6
+REFERENCE_C = 25.0
+
+
+# Chebyshev fit of erfc(z) = t exp(-z^2 + P(t)), t = 1 / (1 + z/2), z >= 0
+# (Numerical Recipes' erfcc, fractional error below 1.2e-7 everywhere)
+_ERFC = (-1.26551223, 1.00002368, 0.37409196, 0.09678418, -0.18628806,
+         0.27886807, -1.13520398, 1.48851587, -0.82215223, 0.17087277)
+
+
+def erfc(x):
+    """Complementary error function of an array, fully vectorized."""
+    x = np.asarray(x, dtype=np.float64)
+    z = np.abs(x)
+    t = 1 / (1 + 0.5 * z)
+    poly = np.full_like(t, _ERFC[-1])
+    for c in _ERFC[-2::-1]:
+        poly = poly * t + c
+    with np.errstate(under='ignore'):
+        tail = t * np.exp(poly - z * z)
+    return np.where(x >= 0, tail, 2 - tail)
+
+
+def norm_cdf(x):
+    return 0.5 * erfc(-np.asarray(x, dtype=np.float64) / math.sqrt(2))
+
+
+def norm_ppf(p):
+    """Inverse standard normal CDF (Acklam's rational approximation)."""
+    p = np.asarray(p, dtype=np.float64)
+    a = (-3.969683028665376e+01, 2.209460984245205e+02,
+         -2.759285104469687e+02, 1.383577518672690e+02,
+         -3.066479806614716e+01, 2.506628277459239e+00)
+    b = (-5.447609879822406e+01, 1.615858368580409e+02,
+         -1.556989798598866e+02, 6.680131188771972e+01,
+         -1.328068155288572e+01)
+    c = (-7.784894002430293e-03, -3.223964580411365e-01,
+         -2.400758277161838e+00, -2.549732539343734e+00,
+         4.374664141464968e+00, 2.938163982698783e+00)
+    d = (7.784695709041462e-03, 3.224671290700398e-01,
+         2.445134137142996e+00, 3.754408661907416e+00)
+    low = 0.02425
+    out = np.empty_like(p)
+
+    tail = np.minimum(p, 1 - p)
+    q = np.sqrt(-2 * np.log(np.where(tail < low, tail, 0.5)))
+    x_tail = (((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q
+              + c[5]) / ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1)
+    q = p - 0.5
+    r = q * q
+    x_mid = (((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r
+             + a[5]) * q / (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r
+                             + b[4]) * r + 1)
+    out[:] = x_mid
+    out = np.where(p < low, x_tail, out)
+    out = np.where(p > 1 - low, -x_tail, out)
+    return out
+
+
+def arrhenius_factor(temperature_c, activation_ev=ACTIVATION_EV,
+                     reference_c=REFERENCE_C):
+    """Retention at temperature_c relative to reference_c."""
+    t = temperature_c + 273.15
+    ref = reference_c + 273.15
+    return math.exp(activation_ev / BOLTZMANN_EV * (1 / t - 1 / ref))
+
+
+class RetentionModel:
+    """Weak-cell population of one simulated chip."""
+
+    def __init__(self, geometry=CHIP, words=None, mu=RETENTION_MU,
+                 sigma=RETENTION_SIGMA, row_sigma=ROW_SIGMA,
+                 anti_fraction=ANTI_CELL_FRACTION, max_refresh_us=250.0,
+                 max_temperature_c=REFERENCE_C, seed=0):
+        self.geometry = geometry
+        self.words = geometry.words if words is None else words
+        self.max_refresh_us = max_refresh_us
+        self.max_temperature_c = max_temperature_c
+        # Longest 25 °C retention that can still fail within those limits
+        self.cutoff_us = max_refresh_us / min(
+            1.0, arrhenius_factor(max_temperature_c))
+        rng = np.random.default_rng(seed)
+
+        row_size = geometry.row_size
+        rows = -(-self.words // row_size)
+        row_mu = mu + row_sigma * rng.standard_normal(rows)
+        cutoff = math.log(self.cutoff_us)
+        # P(cell retention < cutoff) per row, then the weak cells per row
+        p_row = norm_cdf((cutoff - row_mu) / sigma)
+        counts = rng.binomial(row_size * WORD_BITS, p_row)
+        total = int(counts.sum())
+
+        row = np.repeat(np.arange(rows, dtype=np.int64), counts)
+        cell = rng.integers(0, row_size * WORD_BITS, size=total)
+        address = row * row_size + cell // WORD_BITS
+        keep = address < self.words
+        # Retention drawn from the per-row distribution truncated at cutoff
+        u = rng.random(total) * p_row[row]
+        log_retention = row_mu[row] + sigma * norm_ppf(np.clip(u, 1e-300, 1))
+
+        # Address order lets decay() merge several bits of a word at once
+        order = np.argsort(address[keep], kind='stable')
+        self.address = address[keep][order].astype(np.uint32)
+        self.bit = (cell % WORD_BITS)[keep][order].astype(np.uint8)
+        self.retention_us = np.exp(log_retention[keep][order]).astype(np.float32)
+        self.ground = (rng.random(len(self.address))
+                       < anti_fraction).astype(np.uint8)
+
+    def __len__(self):
+        return len(self.address)
+
+    def cells(self, words):
+        """Indices, in address order, of the weak cells of the given
+        sorted, unique words."""
+        words = np.asarray(words, dtype=np.int64)
+        lo = np.searchsorted(self.address, words, 'left')
+        n = np.searchsorted(self.address, words, 'right') - lo
+        return (np.repeat(lo - (np.cumsum(n) - n), n)
+                + np.arange(n.sum(), dtype=np.int64))
+
+    def failing(self, refresh_us, temperature_c=REFERENCE_C, jitter=0.0,
+                rng=None, cells=None):
+        """Mask of weak cells (all, or those indexed by `cells`) that lose
+        their charge at this refresh period.
+
+        `jitter` is the sigma of a per-call log-normal factor on every
+        cell's retention, for variable-retention-time noise between runs.
+        """
+        if refresh_us / arrhenius_factor(temperature_c) > self.cutoff_us:
+            raise ValueError(f'model only covers refresh periods up to '
+                             f'{self.max_refresh_us} us at up to '
+                             f'{self.max_temperature_c} C')
+        retention = self.retention_us if cells is None \
+            else self.retention_us[cells]
+        retention = retention * arrhenius_factor(temperature_c)
+        if jitter:
+            rng = rng or np.random.default_rng()
+            retention = retention * np.exp(
+                jitter * rng.standard_normal(len(retention)))
+        return retention < refresh_us
+
+    def decay(self, image, refresh_us, temperature_c=REFERENCE_C, jitter=0.0,
+              rng=None, base=0, cells=None):
+        """Apply one refresh interval of charge loss to image in place.
+
+        `image` holds words base .. base+len(image)-1. With `cells` (see
+        cells()) only those weak cells are considered.
+        """
+        fail = self.failing(refresh_us, temperature_c, jitter, rng, cells)
+        index = np.flatnonzero(fail) if cells is None else cells[fail]
+        addr = self.address[index].astype(np.int64) - base
+        index = index[(addr >= 0) & (addr < len(image))]
+        addr = self.address[index].astype(np.int64) - base
+        if len(addr) == 0:
+            return image
+        mask = (1 << self.bit[index].astype(np.uint16)).astype(np.uint16)
+        ones = self.ground[index].astype(bool)
+        # One clear mask and one set mask per affected word
+        first = np.flatnonzero(np.r_[True, addr[1:] != addr[:-1]])
+        clear = np.bitwise_or.reduceat(np.where(ones, 0, mask).astype(np.uint16),
+                                       first)
+        set_ = np.bitwise_or.reduceat(np.where(ones, mask, 0).astype(np.uint16),
+                                      first)
+        words = addr[first]
+        image[words] = (image[words] & ~clear) | set_
+        return image
+
+
+class RemanenceDevice(ArrayDevice):
+    """ArrayDevice whose contents decay according to a RetentionModel.
+
+    Writes recharge the memory; the first read after any write sees the
+    image after one interval at `refresh_us` (and `temperature_c`). Only
+    the words written since the last read are decayed again, so word
+    writes cost time in proportion to the words touched, not the chip.
+    """
+
+    def __init__(self, model=None, refresh_us=REFRESH_PERIODS_US[0],
+                 temperature_c=REFERENCE_C, jitter=0.0, fill=0xFFFF,
+                 drop_rate=0.0, seed=0):
+        self.model = model or RetentionModel(
+            max_temperature_c=temperature_c, seed=seed)
+        super().__init__(self.model.words, fill, drop_rate, seed)
+        self.refresh_us = refresh_us
+        self.temperature_c = temperature_c
+        self.jitter = jitter
+        # Words written since the last settle(); None once the whole chip
+        # has been (it starts out freshly filled)
+        self._written = None
+
+    @property
+    def charged(self):
+        """True while some written word has not decayed yet."""
+        return self._written is None or len(self._written) > 0
+
+    def write_word(self, addr, value):
+        super().write_word(addr, value)
+        if self._written is not None:
+            self._written.append(addr % len(self.memory))
+
+    def read_word(self, addr):
+        if self.charged:
+            self.settle()
+        return super().read_word(addr)
+
+    def read_block(self, start, count):
+        if self.charged:
+            self.settle()
+        return super().read_block(start, count)
+
+    def fill(self, value):
+        """Write value to every address (a full-chip pattern write)."""
+        self.memory[:] = value
+        self._written = None
+
+    def settle(self):
+        """Decay the words written since the last settle()."""
+        cells = None
+        if self._written is not None:
+            cells = self.model.cells(np.unique(self._written))
+        self.model.decay(self.memory, self.refresh_us, self.temperature_c,
+                         self.jitter, self.rng, cells=cells)
+        self._written = []
+
+    def snapshot(self, pattern=None):
+        """Full decayed image, optionally after writing pattern everywhere."""
+        if pattern is not None:
+            self.fill(pattern)
+        if self.charged:
+            self.settle()
+        return self.memory.copy()
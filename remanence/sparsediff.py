@@ -0,0 +1,260 @@
+"""Compact binary sparse-diff dumps (`.rdiff`).
+
+A dump written with a known pattern is stored as the words that differ
+from it, grouped into runs of consecutive addresses holding the same
+value (0x686-0x699 all reading 0x0000 is one run), plus the address
+ranges that were actually read. An address inside the coverage that no
+run lists read back as the pattern; one outside it was never read.
+
+Layout, all little-endian:
+
+    magic, JSON length, JSON metadata   pattern, coverage, section sizes
+    gaps      varints   run start minus the end of the previous run
+    lengths   varints   run length - 1
+    values    uint16    one word per run
+
+Varints are LEB128 (7 bits per byte, high bit set on all but the last).
+Every section is encoded and decoded with whole-array NumPy operations.
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+MAGIC = b'RDIFF\x00\x01\x00'
+_PREFIX = struct.Struct('<8sI')
+
+_MAX_VARINT = 10  # bytes for a 64-bit value
+
+
+def encode_varints(values):
+    """LEB128 bytes for an array of non-negative integers."""
+    values = np.asarray(values, dtype=np.uint64)
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, _MAX_VARINT):
+        nbytes += values >= np.uint64(1) << np.uint64(7 * k)
+    ends = np.cumsum(nbytes)
+    starts = ends - nbytes
+    out = np.empty(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+    for k in range(int(nbytes.max()) if len(nbytes) else 0):
+        sel = nbytes > k
+        byte = (values[sel] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = np.where(nbytes[sel] > k + 1, 0x80, 0).astype(np.uint64)
+        out[starts[sel] + k] = byte | more
+    return out.tobytes()
+
+
+def decode_varints(data):
+    """uint64 array of the LEB128 values packed back to back in data."""
+    data = np.frombuffer(data, dtype=np.uint8) \
+        if not isinstance(data, np.ndarray) else data
+    if not len(data):
+        return np.empty(0, dtype=np.uint64)
+    ends = np.flatnonzero(data < 0x80)
+    if not len(ends) or ends[-1] != len(data) - 1:
+        raise ValueError('truncated varint')
+    starts = np.r_[0, ends[:-1] + 1]
+    lengths = ends - starts + 1
+    if lengths.max() > _MAX_VARINT:
+        raise ValueError('varint too long')
+    shift = np.arange(len(data)) - np.repeat(starts, lengths)
+    parts = (data & 0x7F).astype(np.uint64) << (7 * shift).astype(np.uint64)
+    return np.add.reduceat(parts, starts)
+
+
+def coverage_ranges(valid, base=0):
+    """[start, stop) address ranges of the True runs in a validity mask."""
+    valid = np.asarray(valid, dtype=bool)
+    edges = np.flatnonzero(np.diff(np.r_[False, valid, False].astype(np.int8)))
+    return [(base + int(a), base + int(b))
+            for a, b in zip(edges[0::2], edges[1::2])]
+
+
+def value_runs(addresses, values):
+    """(starts, lengths, values) of runs of consecutive addresses holding
+    equal values; addresses must be sorted and unique."""
+    addresses = np.asarray(addresses, dtype=np.int64)
+    values = np.asarray(values, dtype=np.uint16)
+    if not len(addresses):
+        return (np.empty(0, np.int64), np.empty(0, np.int64),
+                np.empty(0, np.uint16))
+    new = np.r_[True, (np.diff(addresses) != 1) | (values[1:] != values[:-1])]
+    first = np.flatnonzero(new)
+    lengths = np.diff(np.r_[first, len(addresses)])
+    return addresses[first], lengths, values[first]
+
+
+def differing_entries(addresses, values, pattern):
+    """Ascending (addresses, values) of the words that differ from pattern.
+
+    Entries need not be sorted; for an address listed more than once the
+    last entry wins.
+    """
+    addresses = np.asarray(addresses, dtype=np.int64)
+    values = np.asarray(values, dtype=np.uint16)
+    keep = values != pattern
+    addresses, values = addresses[keep], values[keep]
+    order = np.argsort(addresses, kind='stable')
+    addresses, values = addresses[order], values[order]
+    last = np.ones(len(addresses), dtype=bool)
+    last[:-1] = addresses[1:] != addresses[:-1]
+    return addresses[last], values[last]
+
+
+class SparseDiff:
+    """Runs of words differing from `pattern`, plus the read coverage."""
+
+    def __init__(self, starts, lengths, values, pattern, coverage, meta=None):
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.values = np.asarray(values, dtype=np.uint16)
+        self.pattern = pattern
+        self.coverage = [(int(a), int(b)) for a, b in coverage]
+        self.meta = dict(meta or {})
+
+    @classmethod
+    def from_entries(cls, addresses, values, pattern, coverage, meta=None):
+        """Build from (address, value) pairs; words equal to pattern are
+        dropped and the rest need not be sorted."""
+        return cls(*value_runs(*differing_entries(addresses, values,
+                                                  pattern)),
+                   pattern, coverage, meta)
+
+    def __len__(self):
+        return int(self.lengths.sum())
+
+    def __repr__(self):
+        return (f'SparseDiff(words={len(self)}, runs={len(self.starts)}, '
+                f'pattern=0x{self.pattern:04X}, '
+                f'covered={self.covered_words})')
+
+    @property
+    def covered_words(self):
+        return sum(b - a for a, b in self.coverage)
+
+    @property
+    def span(self):
+        """[start, stop) from the first to the last covered address."""
+        if not self.coverage:
+            return None
+        return min(a for a, _ in self.coverage), max(b for _, b in self.coverage)
+
+    def entries(self):
+        """(addresses, values) of every differing word, ascending."""
+        total = len(self)
+        offset = np.arange(total) - np.repeat(np.cumsum(self.lengths)
+                                              - self.lengths, self.lengths)
+        addresses = np.repeat(self.starts, self.lengths) + offset
+        return (addresses.astype(np.uint32),
+                np.repeat(self.values, self.lengths))
+
+    def dense(self, start=None, stop=None):
+        """(values, valid) arrays for addresses [start, stop).
+
+        Covered addresses hold the pattern unless a run says otherwise;
+        uncovered ones are 0 and not valid.
+        """
+        span = self.span or (0, 0)
+        start = span[0] if start is None else start
+        stop = span[1] if stop is None else stop
+        values = np.zeros(stop - start, dtype=np.uint16)
+        valid = np.zeros(stop - start, dtype=bool)
+        for a, b in self.coverage:
+            a, b = max(a, start) - start, min(b, stop) - start
+            if a < b:
+                values[a:b] = self.pattern
+                valid[a:b] = True
+        addresses, words = self.entries()
+        inside = (addresses >= start) & (addresses < stop)
+        values[addresses[inside].astype(np.int64) - start] = words[inside]
+        return values, valid
+
+
+def encode_diff(diff):
+    """Serialize a SparseDiff to bytes."""
+    ends = np.r_[0, diff.starts[:-1] + diff.lengths[:-1]]
+    gaps = encode_varints(diff.starts - ends)
+    lengths = encode_varints(diff.lengths - 1)
+    values = diff.values.astype('<u2').tobytes()
+    meta = dict(diff.meta, pattern=diff.pattern,
+                coverage=[list(r) for r in diff.coverage],
+                runs=len(diff.starts), words=len(diff),
+                sections=[len(gaps), len(lengths), len(values)])
+    body = json.dumps(meta, sort_keys=True).encode()
+    return b''.join((_PREFIX.pack(MAGIC, len(body)), body, gaps, lengths,
+                     values))
+
+
+def decode_diff(data):
+    """SparseDiff from bytes written by encode_diff."""
+    data = memoryview(data)
+    magic, length = _PREFIX.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('not an .rdiff stream')
+    pos = _PREFIX.size
+    meta = json.loads(bytes(data[pos:pos + length]))
+    pos += length
+    sizes = meta.pop('sections')
+    if pos + sum(sizes) > len(data):
+        raise ValueError('truncated .rdiff stream')
+    raw = np.frombuffer(data, dtype=np.uint8, count=sum(sizes), offset=pos)
+    gaps = decode_varints(raw[:sizes[0]]).astype(np.int64)
+    lengths = decode_varints(raw[sizes[0]:sizes[0] + sizes[1]]).astype(
+        np.int64) + 1
+    values = raw[sizes[0] + sizes[1]:].view('<u2').astype(np.uint16)
+    runs = meta.pop('runs')
+    meta.pop('words')
+    if not len(gaps) == len(lengths) == len(values) == runs:
+        raise ValueError('corrupt .rdiff stream: section lengths disagree')
+    # Each run starts `gap` words after the previous run ended
+    starts = np.cumsum(gaps + np.r_[0, lengths[:-1]])
+    return SparseDiff(starts, lengths, values, meta.pop('pattern'),
+                      meta.pop('coverage'), meta)
+
+
+def save_diff(diff, path):
+    with open(path, 'wb') as f:
+        f.write(encode_diff(diff))
+
+
+def load_diff(path):
+    with open(path, 'rb') as f:
+        return decode_diff(f.read())
+
+
+def is_diff_file(path):
+    if not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def diff_from_store(store, pattern=None, chunk=1 << 20):
+    """SparseDiff of an .rdump store against pattern (default: its
+    metadata pattern)."""
+    meta = dict(store.meta)
+    pattern = meta.pop('pattern', None) if pattern is None else pattern
+    if pattern is None:
+        raise ValueError('store has no pattern in its metadata; pass one')
+    meta.pop('pattern', None)
+    base, words = meta.pop('base'), meta.pop('words')
+    addresses, values, coverage = [], [], []
+    for lo in range(base, base + words, chunk):
+        hi = min(lo + chunk, base + words)
+        chunk_values, valid = store.read(lo, hi)
+        coverage.extend(coverage_ranges(valid, lo))
+        hit = np.flatnonzero(valid & (chunk_values != pattern))
+        addresses.append(hit + lo)
+        values.append(np.asarray(chunk_values[hit]))
+    # Merge coverage ranges that touch across chunk boundaries
+    merged = []
+    for a, b in coverage:
+        if merged and merged[-1][1] == a:
+            merged[-1] = (merged[-1][0], b)
+        else:
+            merged.append((a, b))
+    return SparseDiff(*value_runs(np.concatenate(addresses),
+                                  np.concatenate(values)),
+                      pattern, merged, meta)
@@ -0,0 +1,109 @@
+"""Spatial correlation of errors over the dense address space.
+
+The DUMP2 script treated consecutive entries of the sparse list as
+neighbours, so 0x5E8 and 0x600 counted as adjacent. Here errors are laid
+out on the `.ino` geometry (`addr = (row << 10) | col`, bank above the row)
+as a (bank, row, col) grid, and neighbour-error counts along each axis come
+from a box convolution over that grid.
+"""
+
+import numpy as np
+
+from .flips import flip_counts, flip_masks
+from .geometry import CHIP
+
+AXES = ('col', 'row', 'bank')
+_AXIS_INDEX = {'bank': 0, 'row': 1, 'col': 2}
+
+
+def dense_flips(addresses, values, pattern, start, stop):
+    """Per-address flip counts for [start, stop) from sparse log entries.
+
+    Addresses missing from the log are taken as read back unchanged, which
+    is how the serial logs are written.
+    """
+    dense = np.zeros(stop - start, dtype=np.uint8)
+    addresses = np.asarray(addresses, dtype=np.int64)
+    inside = (addresses >= start) & (addresses < stop)
+    dense[addresses[inside] - start] = flip_counts(
+        np.asarray(values)[inside], pattern)
+    return dense
+
+
+def dense_masks(addresses, values, pattern, start, stop):
+    """Like dense_flips(), but the flipped-bit mask of every word (uint16)."""
+    dense = np.zeros(stop - start, dtype=np.uint16)
+    addresses = np.asarray(addresses, dtype=np.int64)
+    inside = (addresses >= start) & (addresses < stop)
+    dense[addresses[inside] - start] = flip_masks(
+        np.asarray(values)[inside], pattern)
+    return dense
+
+
+def to_grid(dense, start=0, geometry=CHIP):
+    """Scatter a dense per-address array onto a (bank, row, col) grid.
+
+    The grid spans every bank touched by [start, start + len(dense));
+    cells outside the range are zero. Returns (grid, first_bank).
+    """
+    dense = np.asarray(dense)
+    words_per_bank = geometry.rows * geometry.row_size
+    first_bank = start // words_per_bank
+    last_bank = (start + len(dense) - 1) // words_per_bank
+    grid = np.zeros((last_bank - first_bank + 1) * words_per_bank,
+                    dtype=dense.dtype)
+    offset = start - first_bank * words_per_bank
+    grid[offset:offset + len(dense)] = dense
+    return grid.reshape(-1, geometry.rows, geometry.row_size), first_bank
+
+
+def _box_sum(grid, axis, radius):
+    # Sum over a window of 2*radius+1 along axis via cumulative sums
+    pad = [(0, 0)] * grid.ndim
+    pad[axis] = (radius + 1, radius)
+    csum = np.cumsum(np.pad(grid, pad), axis=axis, dtype=np.int32)
+    n = grid.shape[axis]
+    hi = np.take(csum, np.arange(2 * radius + 1, n + 2 * radius + 1), axis=axis)
+    lo = np.take(csum, np.arange(0, n), axis=axis)
+    return hi - lo
+
+
+def neighbour_counts(errors, start=0, geometry=CHIP, radius=1, axes=AXES):
+    """Error-neighbour counts per address along each geometry axis.
+
+    `errors` is a dense per-address array over [start, start + len);
+    any non-zero entry is an error. For each axis the result holds, for
+    every address, how many of the 2*radius nearest cells along that axis
+    (same row for 'col', same column and bank for 'row', same row and
+    column for 'bank') are errors.
+    """
+    errors = np.asarray(errors) != 0
+    grid, first_bank = to_grid(errors.astype(np.uint8), start, geometry)
+    words_per_bank = geometry.rows * geometry.row_size
+    offset = start - first_bank * words_per_bank
+    result = {}
+    for axis in axes:
+        counts = _box_sum(grid, _AXIS_INDEX[axis], radius) - grid
+        result[axis] = counts.reshape(-1)[offset:offset + len(errors)]
+    return result
+
+
+def clustering(errors, start=0, geometry=CHIP, radius=1, axes=AXES):
+    """Summary of how strongly errors cluster along each axis.
+
+    For every axis reports the fraction of erroneous words that have at
+    least one erroneous neighbour, next to the fraction expected if errors
+    were spread independently at the same rate.
+    """
+    errors = np.asarray(errors) != 0
+    rate = errors.mean() if len(errors) else 0.0
+    counts = neighbour_counts(errors, start, geometry, radius, axes)
+    summary = {'error_words': int(errors.sum()), 'error_rate': float(rate)}
+    for axis, count in counts.items():
+        hit = count[errors] > 0
+        summary[axis] = {
+            'neighbour_errors': count,
+            'clustered_fraction': float(hit.mean()) if len(hit) else 0.0,
+            'expected_fraction': float(1 - (1 - rate) ** (2 * radius)),
+        }
+    return summary
@@ -0,0 +1,179 @@
+"""Dense on-disk dump images (`.rdump`).
+
+Layout, all little-endian:
+
+    HEADER_SIZE bytes   magic, header length, JSON metadata (space padded)
+    words * 2 bytes     uint16 image, one word per address from `base`
+    ceil(words / 8)     validity bitmap, bit i set once address base+i is read
+
+Both arrays are opened with `numpy.memmap`, so any address range can be
+sliced without reading the rest of the capture. The fixed-size header lets
+metadata be rewritten in place while a capture is still being filled.
+"""
+
+import json
+import os
+import struct
+
+import numpy as np
+
+from .flips import popcount
+from .geometry import CHIP_WORDS
+
+MAGIC = b'RDUMP\x00\x01\x00'
+HEADER_SIZE = 4096
+_PREFIX = struct.Struct('<8sI')
+
+
+def _bitmap_size(words):
+    return (words + 7) // 8
+
+
+def _encode_header(meta):
+    body = json.dumps(meta, sort_keys=True).encode()
+    if _PREFIX.size + len(body) > HEADER_SIZE:
+        raise ValueError('dump metadata does not fit in the header')
+    header = _PREFIX.pack(MAGIC, len(body)) + body
+    return header.ljust(HEADER_SIZE, b' ')
+
+
+def _read_header(f):
+    raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f'{f.name}: truncated dump header')
+    magic, length = _PREFIX.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f'{f.name}: not an .rdump file')
+    return json.loads(raw[_PREFIX.size:_PREFIX.size + length])
+
+
+class DumpStore:
+    """Memory-mapped dump image plus validity bitmap and metadata."""
+
+    def __init__(self, path, mode='r'):
+        self.path = path
+        self.mode = mode
+        with open(path, 'rb') as f:
+            self.meta = _read_header(f)
+        words = self.meta['words']
+        self.values = np.memmap(path, dtype='<u2', mode=mode,
+                                offset=HEADER_SIZE, shape=(words,))
+        self.valid_bits = np.memmap(path, dtype=np.uint8, mode=mode,
+                                    offset=HEADER_SIZE + 2 * words,
+                                    shape=(_bitmap_size(words),))
+
+    def __repr__(self):
+        return f'DumpStore({self.path!r}, {self.meta})'
+
+    def __len__(self):
+        return self.meta['words']
+
+    @property
+    def base(self):
+        return self.meta['base']
+
+    def _index(self, start, stop):
+        start = self.base if start is None else start
+        stop = self.base + len(self) if stop is None else stop
+        lo, hi = start - self.base, stop - self.base
+        if lo < 0 or hi > len(self) or lo > hi:
+            raise IndexError(f'address range 0x{start:X}-0x{stop:X} outside '
+                             f'store 0x{self.base:X}-0x{self.base + len(self):X}')
+        return lo, hi
+
+    def valid(self, start=None, stop=None):
+        """Boolean validity for addresses [start, stop)."""
+        lo, hi = self._index(start, stop)
+        bits = np.unpackbits(self.valid_bits[lo >> 3:(hi + 7) >> 3],
+                             bitorder='little')
+        return bits[lo & 7:(lo & 7) + hi - lo].astype(bool)
+
+    def read(self, start=None, stop=None):
+        """Return (values, valid) for addresses [start, stop)."""
+        lo, hi = self._index(start, stop)
+        return self.values[lo:hi], self.valid(start, stop)
+
+    def write(self, addresses, values):
+        """Store values at arbitrary addresses and mark them valid."""
+        idx = np.asarray(addresses, dtype=np.int64) - self.base
+        if len(idx) and (idx.min() < 0 or idx.max() >= len(self)):
+            raise IndexError('address outside store')
+        self.values[idx] = values
+        np.bitwise_or.at(self.valid_bits, idx >> 3,
+                         (1 << (idx & 7)).astype(np.uint8))
+
+    def write_range(self, start, values):
+        """Store a contiguous block of words beginning at address start."""
+        lo, hi = self._index(start, start + len(values))
+        self.values[lo:hi] = values
+        self.mark_valid(start, start + len(values))
+
+    def mark_valid(self, start, stop):
+        lo, hi = self._index(start, stop)
+        if lo == hi:
+            return
+        first, last = lo >> 3, (hi - 1) >> 3
+        head = (0xFF << (lo & 7)) & 0xFF
+        tail = 0xFF >> (7 - ((hi - 1) & 7))
+        if first == last:
+            self.valid_bits[first] |= head & tail
+            return
+        self.valid_bits[first] |= head
+        self.valid_bits[first + 1:last] = 0xFF
+        self.valid_bits[last] |= tail
+
+    def coverage(self):
+        """Number of addresses that have been read."""
+        return int(popcount(self.valid_bits).sum(dtype=np.int64))
+
+    def update_metadata(self, **meta):
+        self.meta.update(meta)
+        with open(self.path, 'r+b') as f:
+            f.write(_encode_header(self.meta))
+
+    def flush(self):
+        if self.mode != 'r':
+            self.values.flush()
+            self.valid_bits.flush()
+
+
+def create_dump_store(path, words=CHIP_WORDS, base=0, refresh_us=None,
+                      direction=None, pattern=None, board=None, **extra):
+    """Create an empty store (all words invalid) and open it for writing."""
+    meta = dict(extra, base=base, words=words, refresh_us=refresh_us,
+                direction=direction, pattern=pattern, board=board)
+    with open(path, 'wb') as f:
+        f.write(_encode_header(meta))
+        f.truncate(HEADER_SIZE + 2 * words + _bitmap_size(words))
+    return DumpStore(path, mode='r+')
+
+
+def open_dump_store(path, mode='r'):
+    return DumpStore(path, mode=mode)
+
+
+def store_from_log(log, path, words=None, base=None, fill=None, **meta):
+    """Convert a parsed DumpLog into a dense store covering its range.
+
+    The serial logs only list words that differ from the written pattern;
+    pass that pattern as `fill` to mark every other address in the range as
+    read back unchanged. Without it, unlisted addresses stay invalid.
+    """
+    if base is None or words is None:
+        rng = log.address_range or (0, -1)
+        base = rng[0] if base is None else base
+        words = rng[1] - base + 1 if words is None else words
+    store = create_dump_store(path, words=words, base=base, **meta)
+    if fill is not None:
+        store.values[:] = fill
+        store.mark_valid(base, base + words)
+    store.write(log.addresses, log.values)
+    store.flush()
+    return store
+
+
+def is_dump_store(path):
+    if not os.path.isfile(path):
+        return False
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
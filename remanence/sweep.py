@@ -0,0 +1,139 @@
+"""Refresh-period sweep aggregation with bootstrap confidence intervals.
+
+Every analysed capture contributes one run to its (direction, refresh
+period) group. The bit flip percentage of a group is the share of tested
+bits that flipped, 100 * flips / (words * 16), averaged over its runs.
+
+Confidence intervals come from a bootstrap over the tested addresses: the
+logs list only the words that differ, so a resample of N addresses is a
+multinomial draw over the K erroneous words plus one bucket holding all
+N - K clean words. That keeps each replicate O(K) instead of O(N), and
+groups are bootstrapped in parallel worker processes.
+"""
+
+from functools import partial
+
+import numpy as np
+
+from .analysis import analyze_cached
+from .geometry import WORD_BITS
+
+N_BOOT = 2000
+CONFIDENCE = 0.95
+
+
+def _bootstrap_percentages(flips, total_words, n_boot, rng):
+    # Bit flip percentage of n_boot resamples of one run
+    flips = np.asarray(flips, dtype=np.float64)
+    flips = flips[flips > 0]
+    clean = total_words - len(flips)
+    pvals = np.append(np.full(len(flips), 1 / total_words),
+                      clean / total_words)
+    pvals[-1] = max(0.0, 1 - pvals[:-1].sum())
+    out = np.empty(n_boot)
+    # Bound the (n_boot, K) count matrix for very large error sets
+    step = max(1, (1 << 22) // (len(flips) + 1))
+    for lo in range(0, n_boot, step):
+        counts = rng.multinomial(total_words, pvals, size=min(step, n_boot - lo))
+        out[lo:lo + len(counts)] = counts[:, :-1] @ flips
+    return 100 * out / (total_words * WORD_BITS)
+
+
+def bootstrap_group(runs, n_boot=N_BOOT, confidence=CONFIDENCE, seed=0):
+    """Point estimate and CI of the mean bit flip percentage of runs.
+
+    `runs` is a list of (per-error-word flip counts, total_words). With
+    several runs the runs themselves are resampled too, so run-to-run
+    spread widens the interval.
+    """
+    rng = np.random.default_rng(seed)
+    per_run = np.array([_bootstrap_percentages(f, n, n_boot, rng)
+                        for f, n in runs])
+    point = np.mean([100 * np.sum(f, dtype=np.int64) / (n * WORD_BITS)
+                     for f, n in runs])
+    if len(runs) > 1:
+        pick = rng.integers(0, len(runs), size=(n_boot, len(runs)))
+        boot = per_run[pick, np.arange(n_boot)[:, None]].mean(axis=1)
+    else:
+        boot = per_run[0]
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(boot, [alpha, 1 - alpha])
+    return {'percentage': float(point), 'ci_low': float(low),
+            'ci_high': float(high), 'runs': len(runs),
+            'run_percentages': [float(100 * np.sum(f, dtype=np.int64)
+                                      / (n * WORD_BITS)) for f, n in runs]}
+
+
+def group_results(results):
+    """{(direction, refresh_us): [(error flips, total_words), ...]}"""
+    groups = {}
+    for result in results:
+        ds = result['dataset']
+        if ds['refresh_us'] is None:
+            continue
+        key = (ds['direction'], ds['refresh_us'])
+        groups.setdefault(key, []).append(
+            (result['errors']['flips'], result['stats']['total_words']))
+    return groups
+
+
+def _bootstrap_item(item, n_boot, confidence, seed):
+    key, runs = item
+    return key, bootstrap_group(runs, n_boot, confidence, seed)
+
+
+def aggregate_sweep(results, n_boot=N_BOOT, confidence=CONFIDENCE, seed=0,
+                    map_func=map):
+    """Sweep table from analyze_dataset() results.
+
+    Returns {direction: [row, ...]} with rows sorted by refresh period,
+    each row a bootstrap_group() dict plus 'refresh_us'. `map_func` lets
+    the caller fan the per-group bootstraps out to a process pool.
+    """
+    groups = sorted(group_results(results).items())
+    work = partial(_bootstrap_item, n_boot=n_boot, confidence=confidence,
+                   seed=seed)
+    sweep = {}
+    for (direction, refresh_us), row in map_func(work, groups):
+        sweep.setdefault(direction, []).append(dict(row, refresh_us=refresh_us))
+    return sweep
+
+
+def run_sweep(datasets, cache=None, n_boot=N_BOOT, confidence=CONFIDENCE,
+              map_func=map):
+    """Analyse datasets (through `cache`, if given) and aggregate them into
+    a refresh sweep. `map_func` runs both the per-dataset analysis and the
+    per-group bootstraps, e.g. on a process pool."""
+    results = list(map_func(partial(analyze_cached, cache=cache),
+                            list(datasets)))
+    return aggregate_sweep(results, n_boot, confidence, map_func=map_func)
+
+
+def plot_sweep(sweep, ax=None):
+    """Bit flip percentage vs refresh period with CI error bars."""
+    import matplotlib.pyplot as plt
+
+    if ax is None:
+        ax = plt.figure(figsize=(8, 5)).gca()
+    colors = {'forward': 'b', 'backward': 'r'}
+    top = 0
+    for direction, rows in sorted(sweep.items()):
+        x = [r['refresh_us'] for r in rows]
+        y = np.array([r['percentage'] for r in rows])
+        err = np.array([[r['percentage'] - r['ci_low'] for r in rows],
+                        [r['ci_high'] - r['percentage'] for r in rows]])
+        ax.errorbar(x, y, yerr=err, marker='o', linestyle='-', capsize=4,
+                    color=colors.get(direction), label=direction.capitalize())
+        for xi, yi, hi in zip(x, y, y + err[1]):
+            ax.text(xi, hi + 0.05, f'{yi:.2f}%', ha='center', va='bottom',
+                    fontsize=10, color=colors.get(direction))
+        top = max(top, max(y + err[1], default=0))
+    periods = sorted({r['refresh_us'] for rows in sweep.values() for r in rows})
+    ax.set_title('Bit Flip Percentage vs. Refresh Period', fontsize=14)
+    ax.set_xlabel('Refresh Period per Row (µs)', fontsize=12)
+    ax.set_ylabel('Bit Flip Percentage (%)', fontsize=12)
+    ax.grid(True)
+    ax.set_xticks(periods)
+    ax.set_ylim(0, top * 1.3 or 1)
+    ax.legend(fontsize=10)
+    return ax
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from remanence.bch import BCH, BCH_63_45, CLEAN, CORRECTED, FAILED
+
+
+def _flip(codewords, positions):
+    errors = np.zeros(len(codewords), dtype=np.uint64)
+    for row, cols in enumerate(positions):
+        for c in cols:
+            errors[row] |= np.uint64(1) << np.uint64(c)
+    return codewords ^ errors
+
+
+@pytest.mark.parametrize('errors', [0, 1, 2, 3])
+def test_round_trip_corrects_up_to_t_errors(errors):
+    code = BCH_63_45
+    rng = np.random.default_rng(errors)
+    data = rng.integers(0, 1 << code.k, size=500, dtype=np.uint64)
+    codewords = code.encode(data)
+    positions = [rng.choice(code.n, errors, replace=False)
+                 for _ in range(len(data))]
+    decoded, status = code.decode(_flip(codewords, positions))
+    assert np.array_equal(code.extract(decoded), data)
+    assert np.all(status == (CLEAN if errors == 0 else CORRECTED))
+
+
+def test_more_than_t_errors_never_decode_silently_to_the_sent_word():
+    code = BCH_63_45
+    rng = np.random.default_rng(4)
+    data = rng.integers(0, 1 << code.k, size=500, dtype=np.uint64)
+    codewords = code.encode(data)
+    positions = [rng.choice(code.n, 4, replace=False) for _ in data]
+    decoded, status = code.decode(_flip(codewords, positions))
+    assert not np.any(decoded == codewords)
+    assert np.any(status == FAILED)
+
+
+def test_parameters():
+    assert (BCH_63_45.n, BCH_63_45.k, BCH_63_45.t) == (63, 45, 3)
+    assert (BCH(4, 2).n, BCH(4, 2).k) == (15, 7)
@@ -0,0 +1,49 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from remanence.capture import capture
+from remanence.store import create_dump_store
+
+
+class FakePort:
+    """Hands out `chunks` one read at a time, then raises `error` (or
+    returns nothing, like a quiet line)."""
+
+    def __init__(self, chunks, error=None):
+        self.chunks = list(chunks)
+        self.error = error
+
+    def read(self, n):
+        if self.chunks:
+            return self.chunks.pop(0)
+        if self.error is not None:
+            raise self.error
+        return b''
+
+
+def _run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 5))
+
+
+def test_capture_writes_log_and_store(tmp_path):
+    port = FakePort([b'BEGIN DUMP (0x0000-0x000F)\r\n[0x1] = 0x',
+                     b'7\r\n[0x2] = 0x0\r\n', b'[0x40] = 0x1\r\nEND DUMP\r\n'])
+    store = create_dump_store(str(tmp_path / 'd.rdump'), words=16)
+    stats = _run(capture(port, str(tmp_path / 'log.txt'), store,
+                         duration=0.3, report_every=0))
+    assert stats['entries'] == 3
+    assert stats['written'] == 2  # 0x40 is outside the store
+    assert (tmp_path / 'log.txt').read_bytes().endswith(b'END DUMP\r\n')
+    assert np.array_equal(store.valid(0, 4), [False, True, True, False])
+    assert store.values[1] == 0x7 and store.values[2] == 0x0
+
+
+def test_capture_with_failing_port_raises_and_keeps_what_was_read(tmp_path):
+    port = FakePort([b'[0x1] = 0x7\r\n[0x2] = 0x'],
+                    error=OSError('device disconnected'))
+    log = tmp_path / 'log.txt'
+    with pytest.raises(OSError, match='disconnected'):
+        _run(capture(port, str(log), duration=10, report_every=0))
+    assert log.read_bytes() == b'[0x1] = 0x7\r\n[0x2] = 0x'
@@ -0,0 +1,33 @@
+import numpy as np
+
+from remanence.dumplog import load_dump_log, parse_entries
+
+
+def test_parse_entries_accepts_both_separators_and_any_blanks():
+    data = (b'BEGIN DUMP (0x0000-0x09FF)\r\n'
+            b'[0x0] = 0xBA\r\n'
+            b'[0x579] =0x0\r\n'
+            b'[0x5E8]=  0x7\n'
+            b'(0x600, 0xCE00),\n'
+            b'# [0x...] comment lines are not entries\n'
+            b'END DUMP')
+    addresses, values = parse_entries(data)
+    assert addresses.tolist() == [0x0, 0x579, 0x5E8, 0x600]
+    assert values.tolist() == [0xBA, 0x0, 0x7, 0xCE00]
+
+
+def test_parse_entries_empty():
+    addresses, values = parse_entries(b'')
+    assert len(addresses) == len(values) == 0
+
+
+def test_load_dump_log_reads_frame_and_error_count(tmp_path):
+    path = tmp_path / 'log.txt'
+    path.write_bytes(b'March Test Complete. Errors: 2\r\n'
+                     b'BEGIN DUMP (0x0000-0x09FF)\r\n'
+                     b'[0x1] = 0x0\r\n[0x2] = 0xFFFE\r\nEND DUMP\r\n')
+    log = load_dump_log(str(path))
+    assert np.array_equal(log.addresses, [1, 2])
+    assert np.array_equal(log.values, [0x0, 0xFFFE])
+    assert (log.start, log.end, log.errors) == (0x0, 0x9FF, 2)
+    assert not log.descending
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('serial')
+
+from remanence.acquire import block_acquire, word_acquire
+from remanence.device import ArrayDevice, PtyServer
+from remanence.host import Client, open_serial
+from remanence.store import create_dump_store
+
+WORDS = 0x2000
+
+
+def _device(**kwargs):
+    device = ArrayDevice(words=WORDS, **kwargs)
+    device.memory[:] = np.random.default_rng(1).integers(
+        0, 1 << 16, WORDS, dtype=np.uint16)
+    return device
+
+
+def _store(tmp_path, direction='forward'):
+    return create_dump_store(str(tmp_path / 'd.rdump'), words=WORDS,
+                             direction=direction)
+
+
+def test_client_reads_and_writes():
+    device = _device()
+    with PtyServer(device) as server:
+        client = Client(open_serial(server.path), timeout=0.05)
+        assert client.write(0x10, 0x1234)
+        assert client.read(0x10) == 0x1234
+        values, ok = client.dump(0x100, 0x180)
+        assert ok.all()
+        assert np.array_equal(values, device.memory[0x100:0x180])
+
+
+def test_client_retries_dropped_commands():
+    device = _device(drop_rate=0.2)
+    with PtyServer(device) as server:
+        client = Client(open_serial(server.path), timeout=0.05)
+        values, ok = client.dump(0, 0x200, passes=2)
+        assert ok.all()
+        assert np.array_equal(values, device.memory[:0x200])
+        assert client.metrics.commands['R']['retries']
+
+
+@pytest.mark.parametrize('direction', ['forward', 'backward'])
+def test_block_acquire_survives_corrupted_and_dropped_chunks(tmp_path,
+                                                              direction):
+    device = _device(drop_rate=0.1, corrupt_rate=0.05)
+    store = _store(tmp_path, direction)
+    with PtyServer(device) as server:
+        client = Client(open_serial(server.path), timeout=0.05)
+        result = block_acquire(client, store, request_chunks=4,
+                               direction=direction)
+    assert result['failed'] == []
+    assert store.valid().all()
+    assert np.array_equal(store.values, device.memory)
+
+
+def test_word_acquire_backward(tmp_path):
+    device = _device()
+    store = _store(tmp_path, 'backward')
+    with PtyServer(device) as server:
+        client = Client(open_serial(server.path), timeout=0.05)
+        result = word_acquire(client, store, 0x200, 0x600,
+                              direction='backward')
+    assert result['failed'] == []
+    assert store.valid(0x200, 0x600).all() and not store.valid(0, 0x200).any()
+    assert np.array_equal(store.values[0x200:0x600], device.memory[0x200:0x600])
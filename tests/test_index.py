@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from remanence.datasets import discover
+from remanence.index import ErrorIndex, error_entries
+
+
+def _capture(root, period, lines):
+    directory = root / 'Test' / 'Forward' / period
+    directory.mkdir(parents=True)
+    (directory / 'data.txt').write_text('\n'.join(lines) + '\n')
+
+
+@pytest.fixture
+def tree(tmp_path):
+    _capture(tmp_path, '15.6us', ['[0x1] = 0xFFFF', '[0x2] = 0xFFFF'])
+    _capture(tmp_path, '31.3us', ['[0x9] = 0x0', '[0x5] = 0xFFFE',
+                                  '[0x9] = 0x7FFF'])
+    _capture(tmp_path, '62.5us', ['[0x9] = 0x0'])
+    return tmp_path
+
+
+def test_error_entries_of_a_clean_dump(tree):
+    clean, = discover(str(tree / 'Test' / 'Forward' / '15.6us'))
+    addresses, values = error_entries(clean)
+    assert len(addresses) == len(values) == 0
+
+
+def test_error_entries_sorted_last_entry_wins(tree):
+    dump, = discover(str(tree / 'Test' / 'Forward' / '31.3us'))
+    addresses, values = error_entries(dump)
+    assert addresses.tolist() == [5, 9]
+    assert values.tolist() == [0xFFFE, 0x7FFF]
+
+
+def test_whole_range_query_keeps_every_dump(tree):
+    index = ErrorIndex.build(discover(str(tree)))
+    assert index.counts().tolist() == [0, 2, 1]
+    dumps, addresses, values = index.range(0, 1 << 32)
+    assert dumps.tolist() == [1, 1, 2]
+    assert addresses.tolist() == [5, 9, 9]
+    assert np.array_equal(index.range(9, 10, dumps=[2])[1], [9])
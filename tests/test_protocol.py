@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from remanence.protocol import (CHUNK_SIZE, CMD_BLOCK, CMD_READ, FrameError,
+                                decode_ack, decode_chunks, decode_command,
+                                encode_ack, encode_chunks, encode_command,
+                                encode_commands)
+
+
+def test_command_round_trip_and_bulk_encoding_agree():
+    frame = encode_command(CMD_READ, 0x123456, 0xBEEF, seq=7)
+    assert decode_command(frame) == (CMD_READ, 0x123456, 0xBEEF, 7)
+    frames = encode_commands(np.array([CMD_READ], np.uint8), [0x123456],
+                             [0xBEEF], [7])
+    assert frames[0].tobytes() == frame
+
+
+def test_corrupted_frames_are_rejected():
+    frame = bytearray(encode_command(CMD_BLOCK, 0x100, 4, seq=1))
+    frame[2] ^= 0x10
+    with pytest.raises(FrameError):
+        decode_command(bytes(frame))
+    ack = bytearray(encode_ack(CMD_BLOCK, 1))
+    ack[1] ^= 0x01
+    with pytest.raises(FrameError):
+        decode_ack(bytes(ack))
+
+
+def test_chunks_round_trip_and_flag_bad_crc():
+    words = np.arange(1024, dtype=np.uint16)
+    raw = encode_chunks(0x400, words)
+    raw[2, 10] ^= 0x04
+    addr, decoded, ok = decode_chunks(raw.tobytes())
+    assert raw.shape[1] == CHUNK_SIZE
+    assert addr.tolist() == [0x400, 0x500, 0x600, 0x700]
+    assert ok.tolist() == [True, True, False, True]
+    assert np.array_equal(decoded[ok].ravel(),
+                          np.r_[words[:512], words[768:]])
@@ -0,0 +1,52 @@
+import numpy as np
+
+from remanence.sparsediff import (SparseDiff, decode_diff, decode_varints,
+                                  differing_entries, encode_diff,
+                                  encode_varints, load_diff, save_diff)
+
+
+def test_varints_round_trip():
+    values = np.array([0, 1, 127, 128, 300, 1 << 35, (1 << 64) - 1],
+                      dtype=np.uint64)
+    assert np.array_equal(decode_varints(encode_varints(values)), values)
+
+
+def test_differing_entries_sorts_and_last_entry_wins():
+    addresses, values = differing_entries([5, 1, 5, 3], [0x1, 0xFFFF, 0x2, 0x0],
+                                          0xFFFF)
+    assert addresses.tolist() == [3, 5]
+    assert values.tolist() == [0x0, 0x2]
+
+
+def test_differing_entries_empty_and_clean():
+    for addresses, values in (([], []), ([1, 2], [0xFFFF, 0xFFFF])):
+        a, v = differing_entries(addresses, values, 0xFFFF)
+        assert len(a) == len(v) == 0
+
+
+def test_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    addresses = np.r_[np.arange(0x686, 0x69A), rng.choice(0x2000, 200)]
+    values = np.r_[np.zeros(20, np.uint16),
+                   rng.integers(0, 0xFFFF, 200, dtype=np.uint16)]
+    diff = SparseDiff.from_entries(addresses, values, 0xFFFF, [(0, 0x2000)],
+                                   {'board': 'rig1'})
+    path = str(tmp_path / 'dump.rdiff')
+    save_diff(diff, path)
+    loaded = load_diff(path)
+    expected = np.full(0x2000, 0xFFFF, dtype=np.uint16)
+    expected[addresses] = values
+    dense, valid = loaded.dense()
+    assert np.array_equal(dense, expected)
+    assert valid.all()
+    assert loaded.meta['board'] == 'rig1'
+
+
+def test_round_trip_with_no_differing_words():
+    diff = SparseDiff.from_entries([0x10, 0x11], [0xFFFF, 0xFFFF], 0xFFFF,
+                                   [(0, 0xA00)])
+    assert len(diff) == 0
+    loaded = decode_diff(encode_diff(diff))
+    assert len(loaded) == 0
+    dense, valid = loaded.dense()
+    assert np.all(dense == 0xFFFF) and valid.all() and len(dense) == 0xA00
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from remanence.store import create_dump_store, open_dump_store
+
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / 'd.rdump')
+    store = create_dump_store(path, words=100, base=0x1000, refresh_us=15.6,
+                              direction='backward', pattern=0xFFFF)
+    assert store.coverage() == 0
+    store.write_range(0x1003, np.arange(10, dtype=np.uint16))
+    store.write([0x1063, 0x1000], [0xAAAA, 0x5555])
+    store.update_metadata(board='rig1')
+    store.flush()
+
+    store = open_dump_store(path)
+    assert store.meta['direction'] == 'backward'
+    assert store.meta['board'] == 'rig1'
+    assert store.coverage() == 12
+    values, valid = store.read(0x1000, 0x1010)
+    assert np.flatnonzero(valid).tolist() == [0] + list(range(3, 13))
+    assert values[3:13].tolist() == list(range(10))
+    assert store.read(0x1063, 0x1064)[0].tolist() == [0xAAAA]
+
+
+def test_store_rejects_addresses_outside_it(tmp_path):
+    store = create_dump_store(str(tmp_path / 'd.rdump'), words=16, base=16)
+    with pytest.raises(IndexError):
+        store.write([15], [0])